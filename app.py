@@ -10,11 +10,13 @@ from services import (
     generative_fill,
     generate_hd_image,
     erase_foreground,
+    CancellationToken,
     # Auth and project management
     is_authenticated,
     restore_session
 )
 import extra_streamlit_components as stx
+from components.result_grid import ResultGrid, render_result_gallery
 from components.auth_ui import (
     render_auth_page, render_user_sidebar, 
     render_settings_modal, check_authentication
@@ -27,12 +29,33 @@ from components.project_ui import (
 from services.storage_service import (
     upload_image, list_user_files, download_image_from_url, delete_file
 )
-from PIL import Image, ImageFilter, ImageEnhance, ImageDraw, ImageFont
+from services.rate_limiter import estimate_wait, get_rate_limit_status
+from services.concurrency import get_concurrency_status
+from services.circuit_breaker import get_breaker_states, OPEN, HALF_OPEN
+from services.upload_optimizer import get_upload_stats
+from services.hedging import get_hedge_stats
+from services.job_manager import get_job_manager, EXPIRED as JOB_EXPIRED, FAILED as JOB_FAILED
+from services.callback_server import callbacks_enabled, start_callback_server
+from services.pipeline import parse_pipeline, pipeline_leaves, run_pipeline
+from services.prompt_batch import parse_prompts, run_prompt_batch
+from services.sweep import SWEEP_MAX_CALLS, sweep_combinations, sweep_label, run_sweep
+from services.bria_client import get_bria_session
+from services.bria_logging import log_event
+from utils.image_utils import create_contact_sheet
+from utils.renditions import encode_crop, rendition_boxes
+from services.errors import (
+    BriaAuthError, BriaContentModerationError, BriaRateLimitError,
+    BriaServerError, BriaConnectionError, BriaCircuitOpenError, BriaTimeoutError
+)
+from PIL import Image, ImageFilter, ImageEnhance, ImageDraw, ImageFont, ImageOps
 import io
+import logging
 import requests
 import json
 import time
+import threading
 import base64
+import concurrent.futures
 from streamlit_drawable_canvas import st_canvas
 import numpy as np
 from datetime import datetime
@@ -864,16 +887,72 @@ def initialize_session_state():
     if 'gallery_loaded' not in st.session_state:
         st.session_state.gallery_loaded = False
 
+# Seconds to wait for a hosted image
+IMAGE_FETCH_TIMEOUT = 60
+
+@st.cache_data(max_entries=32, ttl=3600, show_spinner=False)
+def fetch_image_bytes(url):
+    """Hosted image bytes through the pooled Bria session, cached by URL across reruns."""
+    response = get_bria_session().get(url, timeout=IMAGE_FETCH_TIMEOUT)
+    response.raise_for_status()
+    return response.content
+
 def download_image(url):
     """Download image from URL and return as bytes."""
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.content
+        return fetch_image_bytes(url)
     except Exception as e:
         st.error(f"Error downloading image: {str(e)}")
         return None
 
+def is_hosted_url(value):
+    """Whether an image reference is a URL Bria can fetch itself."""
+    return isinstance(value, str) and value.startswith(("http://", "https://"))
+
+def select_input_image(uploaded_file, key):
+    """Choose between the uploaded file and the latest hosted result.
+
+    A hosted result is sent to Bria by URL, so chained edits never download
+    and re-upload the image.
+
+    Args:
+        uploaded_file: The tab's Streamlit upload, or None
+        key: Widget key prefix for the tab
+
+    Returns:
+        (image_data, image_url) with at most one of them set
+    """
+    latest = st.session_state.get('edited_image')
+    if is_hosted_url(latest):
+        source = st.radio(
+            "Input image",
+            ["Uploaded image", "Latest result"],
+            index=0 if uploaded_file else 1,
+            key=f"{key}_input_source",
+            horizontal=True
+        )
+        if source == "Latest result":
+            return None, latest
+    if uploaded_file:
+        return uploaded_file.getvalue(), None
+    return None, None
+
+def mask_canvas_image(source_data, source_url, key):
+    """Pixels for a tab's mask canvas.
+
+    A hosted result is only fetched once the user opens the canvas for it,
+    so tabs that are merely rendered on a rerun never download anything.
+
+    Returns:
+        Image bytes, or None while there is nothing to draw on
+    """
+    if source_data or not source_url:
+        return source_data
+    if not st.checkbox("✏️ Draw a mask on the latest result", key=f"{key}_open_canvas"):
+        st.image(source_url, caption="Latest result", width=300)
+        return None
+    return download_image(source_url)
+
 def apply_image_filter(image, filter_type):
     """Apply various filters to the image."""
     try:
@@ -1038,47 +1117,337 @@ def render_save_to_db_button(image_url_or_bytes, key_suffix="", button_text="
             return result["success"]
     return False
 
+def show_api_error_hint(error):
+    """Show a follow-up hint for typed Bria API errors."""
+    if isinstance(error, BriaCircuitOpenError):
+        st.warning(f"🚧 This feature is temporarily unavailable while Bria recovers. Please try again in about {error.retry_after or 0:.0f}s.")
+    elif isinstance(error, BriaAuthError):
+        st.error("🔑 Invalid API key. Please check your credentials.")
+    elif isinstance(error, BriaContentModerationError):
+        st.warning("⚠️ Content moderation blocked this request. Please ensure the content is appropriate.")
+    elif isinstance(error, BriaRateLimitError):
+        st.warning("⏳ Bria is rate limiting requests right now. Please try again in a moment.")
+    elif isinstance(error, BriaTimeoutError):
+        st.warning("⌛ Bria took too long to respond. Please try again, or request fewer results.")
+    elif isinstance(error, (BriaServerError, BriaConnectionError)):
+        st.warning("🌐 Bria is having trouble right now. Please try again shortly.")
 
-def check_generated_images():
-    """Check if pending images are ready and update the display."""
-    if st.session_state.pending_urls:
-        ready_images = []
-        still_pending = []
-        
-        for url in st.session_state.pending_urls:
-            try:
-                response = requests.head(url)
-                # Consider an image ready if we get a 200 response with any content length
-                if response.status_code == 200:
-                    ready_images.append(url)
-                else:
-                    still_pending.append(url)
-            except Exception as e:
-                still_pending.append(url)
-        
-        # Update the pending URLs list
-        st.session_state.pending_urls = still_pending
-        
-        # If we found any ready images, update the display
-        if ready_images:
-            st.session_state.edited_image = ready_images[0]  # Display the first ready image
-            if len(ready_images) > 1:
-                st.session_state.generated_images = ready_images  # Store all ready images
-            return True
-            
-    return False
 
-def auto_check_images(status_container):
-    """Automatically check for image completion a few times."""
-    max_attempts = 3
-    attempt = 0
-    while attempt < max_attempts and st.session_state.pending_urls:
-        time.sleep(2)  # Wait 2 seconds between checks
-        if check_generated_images():
-            status_container.success("✨ Image ready!")
-            return True
-        attempt += 1
-    return False
+def bria_call_token():
+    """
+    Cancellation token for a Bria call made by this script run.
+
+    The token is cancelled as soon as Streamlit asks the run to stop or
+    rerun (the user clicked something else or closed the page), so the
+    call is abandoned instead of holding this session's script thread.
+    """
+    token = CancellationToken()
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        script_requests = ctx.script_requests
+        script_requests._state
+    except Exception:
+        # Not running under Streamlit, or its internals changed
+        return token
+
+    def watch():
+        while not token.cancelled:
+            state = script_requests._state.value
+            # A rerun asked for by the job manager is not the user leaving
+            if state != "CONTINUE" and not (state == "RERUN" and job_rerun_recent(ctx.session_id)):
+                token.cancel()
+                return
+            time.sleep(0.25)
+
+    threading.Thread(target=watch, name="bria-call-watcher", daemon=True).start()
+    return token
+
+
+def show_queue_estimate(endpoint):
+    """Tell the user how long their request will queue behind the local rate limiter."""
+    if not st.session_state.api_key:
+        return
+    wait = estimate_wait(st.session_state.api_key, endpoint)
+    if wait >= 1:
+        st.info(f"⏳ High demand: your request will be sent in about {wait:.0f}s.")
+
+def show_endpoint_health(*endpoints):
+    """Warn at the top of a tab when a Bria endpoint it uses is failing fast."""
+    breaker_states = get_breaker_states()
+    for endpoint in endpoints:
+        state = breaker_states.get(endpoint)
+        if not state:
+            continue
+        if state["state"] == OPEN:
+            st.warning(f"🚧 This feature is temporarily unavailable while Bria recovers. Requests will be retried in about {state['retry_in']:.0f}s.")
+        elif state["state"] == HALF_OPEN:
+            st.info("🩺 Bria is recovering; requests may be slower than usual.")
+
+
+# Multi-step pipelines offered in the Product Photography tab, built from
+# (background colour, SKU, scene description)
+PIPELINE_PRESETS = {
+    "Packshot → Shadow": lambda bg, sku, scene: [
+        {"name": "Packshot", "operation": "packshot", "params": {"background_color": bg, "sku": sku}},
+        {"name": "Shadow", "operation": "shadow", "params": {"sku": sku}},
+    ],
+    "Packshot → Natural + Floating Shadows": lambda bg, sku, scene: [
+        {"name": "Packshot", "operation": "packshot", "params": {"background_color": bg, "sku": sku}},
+        {"name": "Natural Shadow", "operation": "shadow", "input": "Packshot",
+         "params": {"shadow_type": "regular", "sku": sku}},
+        {"name": "Floating Shadow", "operation": "shadow", "input": "Packshot",
+         "params": {"shadow_type": "float", "sku": sku}},
+    ],
+    "Packshot → Shadow → Lifestyle Shot": lambda bg, sku, scene: [
+        {"name": "Packshot", "operation": "packshot", "params": {"background_color": bg, "sku": sku}},
+        {"name": "Shadow", "operation": "shadow", "params": {"sku": sku}},
+        {"name": "Lifestyle Shot", "operation": "lifestyle_text",
+         "params": {"scene_description": scene, "sku": sku}},
+    ],
+}
+
+
+def current_session_id():
+    """Id of the Streamlit session running this script, or None outside Streamlit."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        return get_script_run_ctx().session_id
+    except Exception:
+        return None
+
+
+# Seconds job updates are gathered into one rerun, and between checks
+# whether a busy session has finished its current run
+JOB_RERUN_DELAY = 0.5
+# Seconds a job manager rerun is told apart from one the user started
+JOB_RERUN_GRACE = 2.0
+
+# Sessions with a job manager rerun queued, and when each was last sent
+_job_reruns_lock = threading.Lock()
+_queued_job_reruns = set()
+_job_rerun_sent = {}
+# Set once Streamlit's internals turn out not to support pushing reruns;
+# sessions then pick up job results when they next run (see collect_finished_jobs)
+_job_reruns_unavailable = threading.Event()
+
+
+def _job_reruns_failed(session_id, error):
+    with _job_reruns_lock:
+        _queued_job_reruns.discard(session_id)
+    if not _job_reruns_unavailable.is_set():
+        _job_reruns_unavailable.set()
+        log_event(logging.WARNING, "bria.job_rerun_unavailable", error=error)
+
+
+def job_rerun_recent(session_id):
+    """Whether the job manager just asked this session to rerun."""
+    with _job_reruns_lock:
+        sent = _job_rerun_sent.get(session_id)
+    return sent is not None and time.monotonic() - sent < JOB_RERUN_GRACE
+
+
+def rerun_session_when_done(session_id):
+    """
+    Job manager callback that reruns a session so it picks up its jobs' results.
+
+    Updates arriving close together share one rerun, and a session busy
+    with a run of its own (e.g. a generation the user just started) is only
+    rerun once that run ends, so the update neither aborts its Bria calls
+    nor swallows the click that started them.
+
+    This relies on Streamlit internals; where they differ, no rerun is
+    pushed and the session shows a button to check for results instead.
+    """
+    def rerun_when_idle():
+        try:
+            from streamlit.runtime import Runtime
+            runtime = Runtime.instance()
+            info = runtime._session_mgr.get_active_session_info(session_id)
+            if info is None:
+                # The browser tab is gone
+                with _job_reruns_lock:
+                    _queued_job_reruns.discard(session_id)
+                    _job_rerun_sent.pop(session_id, None)
+                return
+            if info.session._state.value == "APP_IS_RUNNING":
+                runtime._get_async_objs().eventloop.call_later(JOB_RERUN_DELAY, rerun_when_idle)
+                return
+            with _job_reruns_lock:
+                _queued_job_reruns.discard(session_id)
+                _job_rerun_sent[session_id] = time.monotonic()
+            info.session.request_rerun(None)
+        except Exception as e:
+            _job_reruns_failed(session_id, e)
+
+    def on_update(job):
+        if _job_reruns_unavailable.is_set():
+            return
+        with _job_reruns_lock:
+            if session_id in _queued_job_reruns:
+                return
+            _queued_job_reruns.add(session_id)
+        try:
+            from streamlit.runtime import Runtime
+            # AppSession is not thread-safe; look at it and rerun it on Streamlit's event loop
+            eventloop = Runtime.instance()._get_async_objs().eventloop
+            eventloop.call_soon_threadsafe(eventloop.call_later, JOB_RERUN_DELAY, rerun_when_idle)
+        except Exception as e:
+            _job_reruns_failed(session_id, e)
+    return on_update
+
+
+def track_bria_job(urls, label):
+    """Hand the result URLs of a sync=False request to the background job manager."""
+    st.session_state.pending_urls = list(urls)
+    session_id = current_session_id()
+    if session_id is None:
+        return None
+    return get_job_manager().submit(session_id, urls, label, on_update=rerun_session_when_done(session_id),
+                                    expect_callback=callbacks_enabled())
+
+
+def collect_finished_jobs():
+    """Show the results of this session's background jobs as they become ready."""
+    session_id = current_session_id()
+    if session_id is None:
+        return
+    manager = get_job_manager()
+
+    # Results of jobs still rendering show up one by one, the first in focus
+    for job in manager.pending(session_id):
+        ready = job.ready_urls()
+        if ready:
+            show_job_results(job, ready)
+
+    for job in manager.collect(session_id):
+        ready = job.ready_urls()
+        if ready:
+            show_job_results(job, ready)
+            for url in ready:
+                save_to_history(url, job.label, "")
+            st.toast(f"✨ {job.label}: {len(ready)} image{'s' if len(ready) > 1 else ''} ready!")
+        if job.status == JOB_EXPIRED:
+            st.toast(f"⌛ {job.label}: {len(job.urls) - len(ready)} image{'s' if len(job.urls) - len(ready) > 1 else ''} did not finish in time.")
+        elif job.status == JOB_FAILED:
+            st.toast(f"❌ {job.label}: Bria reported the job as failed.")
+    st.session_state.pending_urls = [url for job in manager.pending(session_id) for url in job.pending_urls]
+
+    # Without pushed reruns, results only show up when the session runs again
+    if st.session_state.pending_urls and _job_reruns_unavailable.is_set():
+        st.info("⏳ Your images are still rendering.")
+        st.button("↻ Check for results", key="check_job_results")
+
+
+def show_job_results(job, ready):
+    """Put a job's first ready result in focus, once, and list all of them."""
+    if st.session_state.get("focused_job") != job.job_id:
+        st.session_state.focused_job = job.job_id
+        st.session_state.edited_image = ready[0]
+    st.session_state.generated_images = ready if len(ready) > 1 else []
+
+def run_sweep_ui(generate, axes, key, **fixed_kwargs):
+    """
+    Run a parameter sweep, showing each result with its parameters as it lands.
+
+    The finished sweep is kept as a contact sheet in st.session_state under
+    sweep_sheet_<key>, for render_sweep_sheet.
+    """
+    combinations = sweep_combinations(axes)
+    labels = [sweep_label(combination) for combination in combinations]
+    progress = st.progress(0.0, text=f"0 / {len(combinations)} generations")
+    grid = ResultGrid(len(combinations), labels=labels)
+    finished = {"count": 0}
+
+    def show_sweep_result(idx, combination, outcome):
+        finished["count"] += 1
+        progress.progress(finished["count"] / len(combinations),
+                          text=f"{finished['count']} / {len(combinations)} generations")
+        if outcome["error"]:
+            grid.fail(idx, outcome["error"])
+            return
+        grid.add(idx, outcome["url"])
+        save_to_history(outcome["url"], "Parameter Sweep", outcome["label"])
+
+    outcomes = run_sweep(generate, axes, on_result=show_sweep_result, cancel_token=bria_call_token(),
+                         **fixed_kwargs)
+
+    def fetch(outcome):
+        if not outcome["url"]:
+            return None
+        try:
+            response = get_bria_session().get(outcome["url"], timeout=60)
+            response.raise_for_status()
+            return response.content
+        except Exception:
+            return None
+
+    # Thumbnails are fetched concurrently; a failed one leaves a blank tile
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        images = list(executor.map(fetch, outcomes))
+    st.session_state[f"sweep_sheet_{key}"] = create_contact_sheet(
+        [(image, outcome["label"]) for image, outcome in zip(images, outcomes)]
+    )
+    urls = grid.ready_urls()
+    st.session_state.generated_images = urls if len(urls) > 1 else []
+    failed = sum(1 for outcome in outcomes if outcome["error"])
+    if failed:
+        st.warning(f"⚠️ {len(urls)} of {len(outcomes)} generations finished, {failed} failed.")
+    else:
+        st.success(f"✅ {len(urls)} generations finished!")
+    return outcomes
+
+
+def render_sweep_sheet(key):
+    """Download button for the contact sheet of the last sweep run under key."""
+    sheet = st.session_state.get(f"sweep_sheet_{key}")
+    if sheet:
+        st.image(sheet, caption="Sweep contact sheet", use_column_width=True)
+        st.download_button("⬇️ Download Contact Sheet", sheet,
+                           f"Stencil_sweep_{key}_{int(time.time())}.png", "image/png",
+                           key=f"sweep_sheet_download_{key}")
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def encode_rendition(image_url, box):
+    """PNG of one crop of a hosted image, for its download button."""
+    image = ImageOps.exif_transpose(Image.open(io.BytesIO(fetch_image_bytes(image_url))))
+    return encode_crop(image, tuple(box))
+
+def render_renditions_panel(image_url, key):
+    """Crop the image in focus to every ad aspect ratio locally, with a download per ratio.
+
+    Only the crop boxes are kept in the session; previews are thumbnails and
+    just the crop picked for download is encoded at full size.
+    """
+    state_key = f"renditions_{key}"
+    if st.button("📐 Crop to Every Aspect Ratio", key=f"renditions_button_{key}",
+                 help="Smart crops made on this machine, so all formats cost a single generation. "
+                      "Square sources leave the most room for both wide and tall crops."):
+        image_data = download_image(image_url)
+        if image_data:
+            with st.spinner("Cropping..."):
+                image = ImageOps.exif_transpose(Image.open(io.BytesIO(image_data)))
+                st.session_state[state_key] = (image_url, rendition_boxes(image))
+    
+    # Only for the image they were made from, not after a newer result
+    renditions = st.session_state.get(state_key)
+    if not renditions or renditions[0] != image_url:
+        return
+    image_data = download_image(image_url)
+    if not image_data:
+        return
+    image = ImageOps.exif_transpose(Image.open(io.BytesIO(image_data)))
+    boxes = renditions[1]
+    cols = st.columns(len(boxes))
+    for col, (ratio, box) in zip(cols, boxes.items()):
+        with col:
+            preview = image.crop(box)
+            preview.thumbnail((256, 256))
+            st.image(preview, caption=ratio, use_column_width=True)
+    ratio = st.radio("Rendition", list(boxes), horizontal=True, key=f"renditions_ratio_{key}")
+    st.download_button("⬇️ Download Rendition", encode_rendition(image_url, boxes[ratio]),
+                       f"Stencil_{ratio.replace(':', 'x')}_{int(time.time())}.png",
+                       "image/png", key=f"renditions_download_{key}")
 
 def add_text_to_image(image, text, font_size=50, color="#000000", position="center", x_offset=0, y_offset=0):
     """
@@ -1184,6 +1553,12 @@ def main():
     if not check_authentication():
         render_auth_page(cookie_manager)
         return
+
+    # Receive Bria's completion callbacks, if configured, then pick up
+    # results of sync=False jobs finished in the background
+    if callbacks_enabled():
+        start_callback_server()
+    collect_finished_jobs()
     
     # Compact header
     st.markdown("""
@@ -1224,6 +1599,35 @@ def main():
         else:
             st.warning("⚠️ Please enter your API key")
         
+        # Local request queue and adaptive concurrency per endpoint
+        queue_status = get_rate_limit_status(st.session_state.api_key) if st.session_state.api_key else {}
+        concurrency_status = get_concurrency_status()
+        breaker_states = get_breaker_states()
+        if queue_status or concurrency_status or breaker_states:
+            with st.expander("📡 Bria Status", expanded=False):
+                state_icons = {OPEN: "🔴", HALF_OPEN: "🟡"}
+                for endpoint in sorted(set(queue_status) | set(concurrency_status) | set(breaker_states)):
+                    queue = queue_status.get(endpoint, {"queued": 0, "wait": 0.0})
+                    slots = concurrency_status.get(endpoint, {"in_flight": 0, "limit": "-"})
+                    breaker = breaker_states.get(endpoint, {"state": "closed"})
+                    st.caption(
+                        f"{state_icons.get(breaker['state'], '🟢')} {endpoint}: "
+                        f"{slots['in_flight']}/{slots['limit']} in flight, "
+                        f"{queue['queued']} queued, ~{queue['wait']:.0f}s wait"
+                    )
+                uploads = get_upload_stats()
+                if uploads["bytes_saved"]:
+                    st.caption(
+                        f"🗜️ Upload optimizer saved {uploads['bytes_saved'] / (1024 * 1024):.1f} MB "
+                        f"across {uploads['optimized']} image{'s' if uploads['optimized'] != 1 else ''}"
+                    )
+                for endpoint, hedges in sorted(get_hedge_stats().items()):
+                    if hedges["hedged"]:
+                        st.caption(
+                            f"🏁 {endpoint}: hedged {hedges['hedged']}/{hedges['calls']} calls, "
+                            f"hedge won {hedges['hedge_wins']}, p95 {hedges['p95'] or 0:.1f}s"
+                        )
+        
         st.markdown("---")
         
         # Image History - simplified
@@ -1270,6 +1674,8 @@ def main():
         </div>
         """, unsafe_allow_html=True)
         
+        show_endpoint_health("/text-to-image/hd", "/prompt_enhancer")
+        
         col1, col2 = st.columns([2, 1])
         with col1:
             
@@ -1303,9 +1709,10 @@ def main():
                     elif not st.session_state.api_key:
                         st.error("⚠️ Please enter your API key in the sidebar.")
                     else:
+                        show_queue_estimate("/prompt_enhancer")
                         with st.spinner("✨ Enhancing your prompt with AI..."):
                             try:
-                                result = enhance_prompt(st.session_state.api_key, prompt)
+                                result = enhance_prompt(st.session_state.api_key, prompt, cancel_token=bria_call_token())
                                 if result and result != prompt:
                                     st.session_state.enhanced_prompt = result
                                     st.success("✅ Prompt enhanced successfully!")
@@ -1366,6 +1773,7 @@ def main():
                     st.error("⚠️ Please enter a prompt first.")
                     return
                     
+                show_queue_estimate("/text-to-image/hd")
                 with st.spinner("🎨 Creating your masterpiece..."):
                     try:
                         # Add style to prompt
@@ -1373,6 +1781,8 @@ def main():
                         if style and style != "Realistic":
                             final_prompt = f"{final_prompt}, in {style.lower()} style"
                         
+                        # Variations appear one by one as their requests finish
+                        grid = ResultGrid(num_images)
                         result = generate_hd_image(
                             prompt=final_prompt,
                             api_key=st.session_state.api_key,
@@ -1385,30 +1795,20 @@ def main():
                             content_moderation=True,
                             seed=seed if seed > 0 else None,
                             steps_num=steps,
-                            text_guidance_scale=guidance
+                            text_guidance_scale=guidance,
+                            cache=True,
+                            cancel_token=bria_call_token(),
+                            results_per_request=1,
+                            on_result=grid.add_response
                         )
                         
                         if result:
-                            image_url = None
-                            if isinstance(result, dict):
-                                if "result_url" in result:
-                                    image_url = result["result_url"]
-                                elif "result_urls" in result:
-                                    image_url = result["result_urls"][0]
-                                elif "urls" in result:
-                                    image_url = result["urls"][0]
-                                elif "result" in result and isinstance(result["result"], list):
-                                    for item in result["result"]:
-                                        if isinstance(item, dict) and "urls" in item:
-                                            image_url = item["urls"][0]
-                                            break
-                                        elif isinstance(item, list) and len(item) > 0:
-                                            image_url = item[0]
-                                            break
-                            
-                            if image_url:
-                                st.session_state.edited_image = image_url
-                                save_to_history(image_url, "Generate Image", final_prompt)
+                            urls = grid.ready_urls()
+                            if urls:
+                                st.session_state.edited_image = grid.focus_url
+                                st.session_state.generated_images = urls if len(urls) > 1 else []
+                                for url in urls:
+                                    save_to_history(url, "Generate Image", final_prompt)
                                 st.success("✅ Image generated successfully!")
                                 st.balloons()
                                 st.rerun()
@@ -1419,10 +1819,7 @@ def main():
                                 
                     except Exception as e:
                         st.error(f"❌ Error generating images: {str(e)}")
-                        if "401" in str(e):
-                            st.error("🔑 Invalid API key. Please check your credentials.")
-                        elif "422" in str(e):
-                            st.error("⚠️ Content moderation blocked this request.")
+                        show_api_error_hint(e)
         
         # Display generated image
         if st.session_state.edited_image:
@@ -1441,6 +1838,131 @@ def main():
                     )
                     # Save to gallery button
                     render_save_to_db_button(st.session_state.edited_image, "generate")
+                    render_renditions_panel(st.session_state.edited_image, "generate")
+            render_result_gallery(st.session_state.generated_images, "generate")
+    
+        # Batch mode: one image per prompt from an uploaded file
+        st.markdown("---")
+        with st.expander("📚 Batch Generation from a Prompt File"):
+            st.caption("Upload a CSV with a `prompt` column, or a JSONL file of `{\"prompt\": ...}` objects. "
+                       "Each prompt may also set `style`, `aspect_ratio`, `seed` and `negative_prompt`; "
+                       "the settings above apply to anything a prompt leaves out.")
+            prompt_file = st.file_uploader("Prompt file", type=["csv", "jsonl", "json", "txt"], key="prompt_batch_file")
+            batch_specs = []
+            if prompt_file is not None:
+                try:
+                    batch_specs = parse_prompts(
+                        prompt_file.getvalue().decode("utf-8"),
+                        "csv" if prompt_file.name.lower().endswith(".csv") else None
+                    )
+                    st.info(f"📄 {len(batch_specs)} prompts loaded")
+                except (UnicodeDecodeError, ValueError) as e:
+                    st.error(f"❌ Could not read the prompt file: {e}")
+            
+            col_b1, col_b2 = st.columns(2)
+            with col_b1:
+                batch_workers = st.slider("⚡ Prompts in parallel", 1, 8, 4,
+                                          help="Requests are still paced by the Bria rate limits")
+            with col_b2:
+                save_batch_to_gallery = st.checkbox("💾 Save results to my gallery", False,
+                                                    disabled=not st.session_state.get("user"),
+                                                    help="Requires login")
+            
+            if st.button("🚀 Generate Batch", disabled=not batch_specs):
+                if not st.session_state.api_key:
+                    st.error("⚠️ Please enter your API key in the sidebar.")
+                    return
+                
+                show_queue_estimate("/text-to-image/hd")
+                progress = st.progress(0.0, text=f"0 / {len(batch_specs)} prompts")
+                batch_grid = ResultGrid(len(batch_specs), label="Prompt")
+                finished = {"count": 0}
+                
+                def show_batch_result(idx, spec, outcome):
+                    finished["count"] += 1
+                    progress.progress(finished["count"] / len(batch_specs),
+                                      text=f"{finished['count']} / {len(batch_specs)} prompts")
+                    if outcome["error"]:
+                        batch_grid.fail(idx, outcome["error"])
+                        return
+                    batch_grid.add(idx, outcome["url"])
+                    save_to_history(outcome["url"], "Batch Generate", spec.prompt)
+                    if save_batch_to_gallery:
+                        save_image_to_database(outcome["url"], f"batch_{int(time.time())}_{idx + 1:04d}.png",
+                                               show_success=False)
+                
+                outcomes = run_prompt_batch(
+                    batch_specs,
+                    st.session_state.api_key,
+                    workers=batch_workers,
+                    aspect_ratio=aspect_ratio,
+                    on_result=show_batch_result,
+                    cancel_token=bria_call_token(),
+                    enhance_image=enhance_img,
+                    steps_num=steps,
+                    text_guidance_scale=guidance,
+                    content_moderation=True
+                )
+                urls = batch_grid.ready_urls()
+                st.session_state.generated_images = urls if len(urls) > 1 else []
+                failed = sum(1 for outcome in outcomes if outcome["error"])
+                if failed:
+                    st.warning(f"⚠️ {len(urls)} images generated, {failed} prompts failed.")
+                else:
+                    st.success(f"✅ {len(urls)} images generated!")
+        
+        # Sweep mode: the prompt above across several seeds and settings at once
+        with st.expander("🧪 Parameter Sweep"):
+            st.caption("Generate the prompt above once per combination of the values below, "
+                       "side by side, to compare settings without clicking through them one by one.")
+            col_s1, col_s2 = st.columns(2)
+            with col_s1:
+                sweep_seeds = st.text_input("🎲 Seeds", "1, 2, 3", help="Comma-separated whole numbers")
+                sweep_steps = st.multiselect("🔄 Refinement steps", [20, 30, 40, 50], [30])
+            with col_s2:
+                sweep_guidance = st.multiselect("🎯 Prompt guidance", [1.0, 3.0, 5.0, 7.5, 10.0], [7.5])
+                sweep_medium = st.multiselect("🖌️ Medium", ["photography", "art"],
+                                              ["art" if style != "Realistic" else "photography"])
+            try:
+                seed_values = [int(value) for value in sweep_seeds.replace(" ", "").split(",") if value]
+            except ValueError:
+                seed_values = None
+                st.error("❌ Seeds must be whole numbers separated by commas.")
+            sweep_axes = {
+                "seed": seed_values,
+                "steps_num": sweep_steps,
+                "text_guidance_scale": sweep_guidance,
+                "medium": sweep_medium
+            }
+            sweep_calls = len(sweep_combinations(sweep_axes))
+            if sweep_calls > SWEEP_MAX_CALLS:
+                st.warning(f"⚠️ {sweep_calls} generations is more than the limit of {SWEEP_MAX_CALLS}.")
+            else:
+                st.info(f"🧮 {sweep_calls} generations")
+            
+            if st.button("🧪 Run Sweep", disabled=seed_values is None or sweep_calls > SWEEP_MAX_CALLS):
+                if not st.session_state.api_key:
+                    st.error("⚠️ Please enter your API key in the sidebar.")
+                    return
+                if not prompt:
+                    st.error("⚠️ Please enter a prompt first.")
+                    return
+                
+                final_prompt = st.session_state.enhanced_prompt or prompt
+                if style and style != "Realistic":
+                    final_prompt = f"{final_prompt}, in {style.lower()} style"
+                show_queue_estimate("/text-to-image/hd")
+                run_sweep_ui(
+                    generate_hd_image, sweep_axes, "generate",
+                    prompt=final_prompt,
+                    api_key=st.session_state.api_key,
+                    num_results=1,
+                    aspect_ratio=aspect_ratio,
+                    sync=True,
+                    enhance_image=enhance_img,
+                    content_moderation=True
+                )
+            render_sweep_sheet("generate")
     
     # Product Photography Tab
     with tabs[1]:
@@ -1452,19 +1974,28 @@ def main():
         """, unsafe_allow_html=True)
         
         uploaded_file = st.file_uploader("Upload Product Image", type=["png", "jpg", "jpeg"], key="product_upload")
-        if uploaded_file:
+        source_data, source_url = select_input_image(uploaded_file, "product")
+        if source_data or source_url:
             col1, col2 = st.columns(2)
             
             with col1:
-                st.image(uploaded_file, caption="Original Image", use_column_width=True)
+                st.image(source_url or source_data, caption="Original Image", use_column_width=True)
                 
                 # Product editing options
                 edit_option = st.selectbox("Select Edit Option", [
                     "Create Packshot",
                     "Add Shadow",
-                    "Lifestyle Shot"
+                    "Lifestyle Shot",
+                    "Multi-Step Pipeline"
                 ])
                 
+                show_endpoint_health(*{
+                    "Create Packshot": ["/product/packshot"],
+                    "Add Shadow": ["/product/shadow"],
+                    "Lifestyle Shot": ["/product/lifestyle_shot_by_text", "/product/lifestyle_shot_by_image"],
+                    "Multi-Step Pipeline": ["/product/packshot", "/product/shadow", "/product/lifestyle_shot_by_text"]
+                }[edit_option])
+                
                 if edit_option == "Create Packshot":
                     col_a, col_b = st.columns(2)
                     with col_a:
@@ -1479,15 +2010,19 @@ def main():
                             st.error("⚠️ Please enter your API key in the sidebar.")
                             return
                         
+                        show_queue_estimate("/product/packshot")
                         with st.spinner("📸 Creating professional packshot..."):
                             try:
                                 result = create_packshot(
                                     st.session_state.api_key,
-                                    uploaded_file.getvalue(),
+                                    source_data,
                                     background_color=bg_color,
                                     sku=sku if sku else None,
                                     force_rmbg=force_rmbg,
-                                    content_moderation=content_moderation
+                                    content_moderation=content_moderation,
+                                    cache=True,
+                                    image_url=source_url,
+                                    cancel_token=bria_call_token()
                                 )
                                 
                                 if result and "result_url" in result:
@@ -1502,10 +2037,7 @@ def main():
                                         st.json(result)
                             except Exception as e:
                                 st.error(f"❌ Error creating packshot: {str(e)}")
-                                if "422" in str(e):
-                                    st.warning("⚠️ Content moderation blocked this image.")
-                                elif "401" in str(e):
-                                    st.error("🔑 Invalid API key.")
+                                show_api_error_hint(e)
                 
                 elif edit_option == "Add Shadow":
                     col_a, col_b = st.columns(2)
@@ -1535,11 +2067,13 @@ def main():
                         content_moderation = st.checkbox("Enable Content Moderation", False)
                     
                     if st.button("Add Shadow"):
+                        show_queue_estimate("/product/shadow")
                         with st.spinner("Adding shadow effect..."):
                             try:
                                 result = add_shadow(
                                     api_key=st.session_state.api_key,
-                                    image_data=uploaded_file.getvalue(),
+                                    image_data=source_data,
+                                    image_url=source_url,
                                     shadow_type=shadow_type.lower(),
                                     background_color=None if use_transparent_bg else bg_color,
                                     shadow_color=shadow_color,
@@ -1550,7 +2084,9 @@ def main():
                                     shadow_height=shadow_height if shadow_type == "Float" else 70,
                                     sku=sku if sku else None,
                                     force_rmbg=force_rmbg,
-                                    content_moderation=content_moderation
+                                    content_moderation=content_moderation,
+                                    cache=True,
+                                    cancel_token=bria_call_token()
                                 )
                                 
                                 if result and "result_url" in result:
@@ -1560,8 +2096,59 @@ def main():
                                     st.error("No result URL in the API response. Please try again.")
                             except Exception as e:
                                 st.error(f"Error adding shadow: {str(e)}")
-                                if "422" in str(e):
-                                    st.warning("Content moderation failed. Please ensure the image is appropriate.")
+                                show_api_error_hint(e)
+                
+                elif edit_option == "Multi-Step Pipeline":
+                    preset = st.selectbox("Pipeline", list(PIPELINE_PRESETS),
+                        help="Each step works on the previous step's result directly on Bria's side")
+                    col_a, col_b = st.columns(2)
+                    with col_a:
+                        bg_color = st.color_picker("🎨 Packshot Background", "#FFFFFF")
+                    with col_b:
+                        sku = st.text_input("📦 SKU (optional)", "", key="pipeline_sku")
+                    scene = ""
+                    if "lifestyle" in preset.lower():
+                        scene = st.text_area("Describe the lifestyle scene", key="pipeline_scene")
+                    
+                    if st.button("🔗 Run Pipeline"):
+                        if not st.session_state.api_key:
+                            st.error("⚠️ Please enter your API key in the sidebar.")
+                            return
+                        if "lifestyle" in preset.lower() and not scene:
+                            st.error("⚠️ Please describe the lifestyle scene first.")
+                            return
+                        
+                        steps = parse_pipeline(PIPELINE_PRESETS[preset](bg_color, sku or None, scene))
+                        # Steps fill in as they finish; branches run side by side
+                        slots = {}
+                        for step, col in zip(steps, st.columns(len(steps))):
+                            with col:
+                                slots[step.name] = st.empty()
+                                slots[step.name].info(f"⏳ {step.name}")
+                        
+                        def show_step(step, step_result):
+                            slots[step.name].image(step_result["url"], use_column_width=True,
+                                                   caption=f"{step.name} ({step_result['seconds']:.1f}s)")
+                        
+                        with st.spinner("🔗 Running pipeline..."):
+                            try:
+                                results = run_pipeline(
+                                    steps,
+                                    st.session_state.api_key,
+                                    image_data=source_data,
+                                    image_url=source_url,
+                                    cancel_token=bria_call_token(),
+                                    on_step=show_step
+                                )
+                                outputs = [results[leaf.name]["url"] for leaf in pipeline_leaves(steps)]
+                                st.session_state.edited_image = outputs[-1]
+                                st.session_state.generated_images = outputs if len(outputs) > 1 else []
+                                for url in outputs:
+                                    save_to_history(url, f"Pipeline: {preset}", scene)
+                                st.success(f"✅ Pipeline finished in {len(steps)} steps!")
+                            except Exception as e:
+                                st.error(f"❌ Pipeline failed: {str(e)}")
+                                show_api_error_hint(e)
                 
                 elif edit_option == "Lifestyle Shot":
                     shot_type = st.radio("Shot Type", ["Text Prompt", "Reference Image"])
@@ -1622,10 +2209,13 @@ def main():
                                 help="Improve lighting, shadows, and texture")
                             ref_influence = st.slider("Reference Influence", 0.0, 1.0, 1.0,
                                 help="Control similarity to reference image")
+                            influence_sweep = st.multiselect("🧪 Sweep influence values", [0.2, 0.4, 0.6, 0.8, 1.0],
+                                help="Pick two or more to generate one shot per value side by side, instead of the slider value")
                     
                     if shot_type == "Text Prompt":
                         prompt = st.text_area("Describe the environment")
                         if st.button("Generate Lifestyle Shot") and prompt:
+                            show_queue_estimate("/product/lifestyle_shot_by_text")
                             with st.spinner("Generating lifestyle shot..."):
                                 try:
                                     # Convert placement selections to API format
@@ -1634,9 +2224,11 @@ def main():
                                     else:
                                         manual_placements = ["upper_left"]
                                     
+                                    grid = ResultGrid(num_results) if sync_mode else None
                                     result = lifestyle_shot_by_text(
                                         api_key=st.session_state.api_key,
-                                        image_data=uploaded_file.getvalue(),
+                                        image_data=source_data,
+                                        image_url=source_url,
                                         scene_description=prompt,
                                         placement_type=placement_type.lower().replace(" ", "_"),
                                         num_results=num_results,
@@ -1652,7 +2244,10 @@ def main():
                                         foreground_image_location=[fg_x, fg_y] if placement_type == "Custom Coordinates" else None,
                                         force_rmbg=force_rmbg,
                                         content_moderation=content_moderation,
-                                        sku=sku if sku else None
+                                        sku=sku if sku else None,
+                                        cancel_token=bria_call_token(),
+                                        results_per_request=1 if sync_mode else None,
+                                        on_result=grid.add_response if sync_mode else None
                                     )
                                     
                                     if result:
@@ -1660,26 +2255,11 @@ def main():
 
                                         
                                         if sync_mode:
-                                            if isinstance(result, dict):
-                                                if "result_url" in result:
-                                                    st.session_state.edited_image = result["result_url"]
-                                                    st.success("✨ Image generated successfully!")
-                                                elif "result_urls" in result:
-                                                    st.session_state.edited_image = result["result_urls"][0]
-                                                    st.success("✨ Image generated successfully!")
-                                                elif "result" in result and isinstance(result["result"], list):
-                                                    for item in result["result"]:
-                                                        if isinstance(item, dict) and "urls" in item:
-                                                            st.session_state.edited_image = item["urls"][0]
-                                                            st.success("✨ Image generated successfully!")
-                                                            break
-                                                        elif isinstance(item, list) and len(item) > 0:
-                                                            st.session_state.edited_image = item[0]
-                                                            st.success("✨ Image generated successfully!")
-                                                            break
-                                                elif "urls" in result:
-                                                    st.session_state.edited_image = result["urls"][0]
-                                                    st.success("✨ Image generated successfully!")
+                                            urls = grid.ready_urls()
+                                            if urls:
+                                                st.session_state.edited_image = grid.focus_url
+                                                st.session_state.generated_images = urls if len(urls) > 1 else []
+                                                st.success("✨ Image generated successfully!")
                                         else:
                                             urls = []
                                             if isinstance(result, dict):
@@ -1700,34 +2280,15 @@ def main():
                                                     urls = urls[:num_results]
                                             
                                             if urls:
-                                                st.session_state.pending_urls = urls
-                                                
-                                                # Create a container for status messages
-                                                status_container = st.empty()
-                                                refresh_container = st.empty()
-                                                
-                                                # Show initial status
-                                                status_container.info(f"🎨 Generation started! Waiting for {len(urls)} image{'s' if len(urls) > 1 else ''}...")
-                                                
-                                                # Try automatic checking first
-                                                if auto_check_images(status_container):
-                                                    st.experimental_rerun()
-                                                
-                                                # Add refresh button for manual checking
-                                                if refresh_container.button("🔄 Check for Generated Images"):
-                                                    with st.spinner("Checking for completed images..."):
-                                                        if check_generated_images():
-                                                            status_container.success("✨ Image ready!")
-                                                            st.experimental_rerun()
-                                                        else:
-                                                            status_container.warning(f"⏳ Still generating your image{'s' if len(urls) > 1 else ''}... Please check again in a moment.")
+                                                track_bria_job(urls, "Lifestyle Shot")
+                                                st.info(f"🎨 Generation started! Your image{'s' if len(urls) > 1 else ''} will appear here as soon as {'they are' if len(urls) > 1 else 'it is'} ready.")
                                 except Exception as e:
                                     st.error(f"Error: {str(e)}")
-                                    if "422" in str(e):
-                                        st.warning("Content moderation failed. Please ensure the content is appropriate.")
+                                    show_api_error_hint(e)
                     else:
                         ref_image = st.file_uploader("Upload Reference Image", type=["png", "jpg", "jpeg"], key="ref_upload")
                         if st.button("Generate Lifestyle Shot") and ref_image:
+                            show_queue_estimate("/product/lifestyle_shot_by_image")
                             with st.spinner("Generating lifestyle shot..."):
                                 try:
                                     # Convert placement selections to API format
@@ -1736,96 +2297,90 @@ def main():
                                     else:
                                         manual_placements = ["upper_left"]
                                     
-                                    result = lifestyle_shot_by_image(
-                                        api_key=st.session_state.api_key,
-                                        image_data=uploaded_file.getvalue(),
-                                        reference_image=ref_image.getvalue(),
-                                        placement_type=placement_type.lower().replace(" ", "_"),
-                                        num_results=num_results,
-                                        sync=sync_mode,
-                                        shot_size=[shot_width, shot_height] if placement_type != "Original" else [1000, 1000],
-                                        original_quality=original_quality,
-                                        manual_placement_selection=manual_placements,
-                                        padding_values=[pad_left, pad_right, pad_top, pad_bottom] if placement_type == "Manual Padding" else [0, 0, 0, 0],
-                                        foreground_image_size=[fg_width, fg_height] if placement_type == "Custom Coordinates" else None,
-                                        foreground_image_location=[fg_x, fg_y] if placement_type == "Custom Coordinates" else None,
-                                        force_rmbg=force_rmbg,
-                                        content_moderation=content_moderation,
-                                        sku=sku if sku else None,
-                                        enhance_ref_image=enhance_ref,
-                                        ref_image_influence=ref_influence
-                                    )
+                                    if len(influence_sweep) > 1:
+                                        # One sync shot per influence value, compared side by side
+                                        run_sweep_ui(
+                                            lifestyle_shot_by_image, {"ref_image_influence": sorted(influence_sweep)}, "lifestyle",
+                                            api_key=st.session_state.api_key,
+                                            image_data=source_data,
+                                            image_url=source_url,
+                                            reference_image=ref_image.getvalue(),
+                                            placement_type=placement_type.lower().replace(" ", "_"),
+                                            num_results=1,
+                                            sync=True,
+                                            shot_size=[shot_width, shot_height] if placement_type != "Original" else [1000, 1000],
+                                            original_quality=original_quality,
+                                            manual_placement_selection=manual_placements,
+                                            padding_values=[pad_left, pad_right, pad_top, pad_bottom] if placement_type == "Manual Padding" else [0, 0, 0, 0],
+                                            foreground_image_size=[fg_width, fg_height] if placement_type == "Custom Coordinates" else None,
+                                            foreground_image_location=[fg_x, fg_y] if placement_type == "Custom Coordinates" else None,
+                                            force_rmbg=force_rmbg,
+                                            content_moderation=content_moderation,
+                                            sku=sku if sku else None,
+                                            enhance_ref_image=enhance_ref
+                                        )
+                                    else:
+                                        grid = ResultGrid(num_results) if sync_mode else None
+                                        result = lifestyle_shot_by_image(
+                                            api_key=st.session_state.api_key,
+                                            image_data=source_data,
+                                            image_url=source_url,
+                                            reference_image=ref_image.getvalue(),
+                                            placement_type=placement_type.lower().replace(" ", "_"),
+                                            num_results=num_results,
+                                            sync=sync_mode,
+                                            shot_size=[shot_width, shot_height] if placement_type != "Original" else [1000, 1000],
+                                            original_quality=original_quality,
+                                            manual_placement_selection=manual_placements,
+                                            padding_values=[pad_left, pad_right, pad_top, pad_bottom] if placement_type == "Manual Padding" else [0, 0, 0, 0],
+                                            foreground_image_size=[fg_width, fg_height] if placement_type == "Custom Coordinates" else None,
+                                            foreground_image_location=[fg_x, fg_y] if placement_type == "Custom Coordinates" else None,
+                                            force_rmbg=force_rmbg,
+                                            content_moderation=content_moderation,
+                                            sku=sku if sku else None,
+                                            enhance_ref_image=enhance_ref,
+                                            ref_image_influence=ref_influence,
+                                            cancel_token=bria_call_token(),
+                                            results_per_request=1 if sync_mode else None,
+                                            on_result=grid.add_response if sync_mode else None
+                                        )
                                     
-                                    if result:
-                                        # Debug logging
+                                        if result:
+                                            # Debug logging
 
                                         
-                                        if sync_mode:
-                                            if isinstance(result, dict):
-                                                if "result_url" in result:
-                                                    st.session_state.edited_image = result["result_url"]
-                                                    st.success("✨ Image generated successfully!")
-                                                elif "result_urls" in result:
-                                                    st.session_state.edited_image = result["result_urls"][0]
+                                            if sync_mode:
+                                                urls = grid.ready_urls()
+                                                if urls:
+                                                    st.session_state.edited_image = grid.focus_url
+                                                    st.session_state.generated_images = urls if len(urls) > 1 else []
                                                     st.success("✨ Image generated successfully!")
-                                                elif "result" in result and isinstance(result["result"], list):
-                                                    for item in result["result"]:
-                                                        if isinstance(item, dict) and "urls" in item:
-                                                            st.session_state.edited_image = item["urls"][0]
-                                                            st.success("✨ Image generated successfully!")
-                                                            break
-                                                        elif isinstance(item, list) and len(item) > 0:
-                                                            st.session_state.edited_image = item[0]
-                                                            st.success("✨ Image generated successfully!")
-                                                            break
-                                                elif "urls" in result:
-                                                    st.session_state.edited_image = result["urls"][0]
-                                                    st.success("✨ Image generated successfully!")
-                                        else:
-                                            urls = []
-                                            if isinstance(result, dict):
-                                                if "urls" in result:
-                                                    urls.extend(result["urls"][:num_results])  # Limit to requested number
-                                                elif "result" in result and isinstance(result["result"], list):
-                                                    # Process each result item
-                                                    for item in result["result"]:
-                                                        if isinstance(item, dict) and "urls" in item:
-                                                            urls.extend(item["urls"])
-                                                        elif isinstance(item, list):
-                                                            urls.extend(item)
-                                                        # Break if we have enough URLs
-                                                        if len(urls) >= num_results:
-                                                            break
+                                            else:
+                                                urls = []
+                                                if isinstance(result, dict):
+                                                    if "urls" in result:
+                                                        urls.extend(result["urls"][:num_results])  # Limit to requested number
+                                                    elif "result" in result and isinstance(result["result"], list):
+                                                        # Process each result item
+                                                        for item in result["result"]:
+                                                            if isinstance(item, dict) and "urls" in item:
+                                                                urls.extend(item["urls"])
+                                                            elif isinstance(item, list):
+                                                                urls.extend(item)
+                                                            # Break if we have enough URLs
+                                                            if len(urls) >= num_results:
+                                                                break
                                                     
-                                                    # Trim to requested number
-                                                    urls = urls[:num_results]
+                                                        # Trim to requested number
+                                                        urls = urls[:num_results]
                                             
-                                            if urls:
-                                                st.session_state.pending_urls = urls
-                                                
-                                                # Create a container for status messages
-                                                status_container = st.empty()
-                                                refresh_container = st.empty()
-                                                
-                                                # Show initial status
-                                                status_container.info(f"🎨 Generation started! Waiting for {len(urls)} image{'s' if len(urls) > 1 else ''}...")
-                                                
-                                                # Try automatic checking first
-                                                if auto_check_images(status_container):
-                                                    st.experimental_rerun()
-                                                
-                                                # Add refresh button for manual checking
-                                                if refresh_container.button("🔄 Check for Generated Images"):
-                                                    with st.spinner("Checking for completed images..."):
-                                                        if check_generated_images():
-                                                            status_container.success("✨ Image ready!")
-                                                            st.experimental_rerun()
-                                                        else:
-                                                            status_container.warning(f"⏳ Still generating your image{'s' if len(urls) > 1 else ''}... Please check again in a moment.")
+                                                if urls:
+                                                    track_bria_job(urls, "Lifestyle Shot")
+                                                    st.info(f"🎨 Generation started! Your image{'s' if len(urls) > 1 else ''} will appear here as soon as {'they are' if len(urls) > 1 else 'it is'} ready.")
                                 except Exception as e:
                                     st.error(f"Error: {str(e)}")
-                                    if "422" in str(e):
-                                        st.warning("Content moderation failed. Please ensure the content is appropriate.")
+                                    show_api_error_hint(e)
+                        render_sweep_sheet("lifestyle")
             
             with col2:
                 if st.session_state.edited_image:
@@ -1840,8 +2395,10 @@ def main():
                         )
                         # Save to gallery button
                         render_save_to_db_button(st.session_state.edited_image, "lifestyle")
+                        render_renditions_panel(st.session_state.edited_image, "lifestyle")
+                    render_result_gallery(st.session_state.generated_images, "lifestyle")
                 elif st.session_state.pending_urls:
-                    st.info("🔄 Images are being generated. Click the refresh button above to check if they're ready.")
+                    st.info("🔄 Images are being generated and will appear here automatically.")
                 else:
                     st.info("👆 Upload an image above and select an editing option to get started!")
 
@@ -1854,17 +2411,23 @@ def main():
         </div>
         """, unsafe_allow_html=True)
         
+        show_endpoint_health("/gen_fill")
+        
         uploaded_file = st.file_uploader("Upload Image", type=["png", "jpg", "jpeg"], key="fill_upload")
-        if uploaded_file:
+        source_data, source_url = select_input_image(uploaded_file, "fill")
+        # The mask canvas needs the pixels even when Bria fetches the URL itself
+        canvas_bytes = mask_canvas_image(source_data, source_url, "fill")
+        if canvas_bytes:
             # Create columns for original image and canvas
             col1, col2 = st.columns(2)
             
             with col1:
                 # Display original image
-                st.image(uploaded_file, caption="Original Image", use_column_width=True)
+                st.image(source_url or source_data, caption="Original Image", use_column_width=True)
                 
                 # Get image dimensions for canvas
-                img = Image.open(uploaded_file)
+                # Upright, the way the image is sent to Bria, so the mask lines up
+                img = ImageOps.exif_transpose(Image.open(io.BytesIO(canvas_bytes)))
                 img_width, img_height = img.size
                 
                 # Calculate aspect ratio and set canvas height
@@ -1934,9 +2497,10 @@ def main():
                     mask_img.save(mask_bytes, format='PNG')
                     mask_bytes = mask_bytes.getvalue()
                     
-                    # Convert uploaded image to bytes
-                    image_bytes = uploaded_file.getvalue()
+                    # Uploaded bytes, or None when Bria fetches the hosted URL
+                    image_bytes = source_data
                     
+                    show_queue_estimate("/gen_fill")
                     with st.spinner("🎨 Generating..."):
                         try:
                             result = generative_fill(
@@ -1944,11 +2508,13 @@ def main():
                                 image_bytes,
                                 mask_bytes,
                                 prompt,
+                                image_url=source_url,
                                 negative_prompt=negative_prompt if negative_prompt else None,
                                 num_results=num_results,
                                 sync=sync_mode,
                                 seed=seed if seed != 0 else None,
-                                content_moderation=content_moderation
+                                content_moderation=content_moderation,
+                                cancel_token=bria_call_token()
                             )
                             
                             if result:
@@ -1965,29 +2531,12 @@ def main():
                                         st.success("✨ Generation complete!")
                                 else:
                                     if "urls" in result:
-                                        st.session_state.pending_urls = result["urls"][:num_results]
-                                        
-                                        # Create containers for status
-                                        status_container = st.empty()
-                                        refresh_container = st.empty()
-                                        
-                                        # Show initial status
-                                        status_container.info(f"🎨 Generation started! Waiting for {len(st.session_state.pending_urls)} image{'s' if len(st.session_state.pending_urls) > 1 else ''}...")
-                                        
-                                        # Try automatic checking
-                                        if auto_check_images(status_container):
-                                            st.rerun()
-                                        
-                                        # Add refresh button
-                                        if refresh_container.button("🔄 Check for Generated Images"):
-                                            if check_generated_images():
-                                                status_container.success("✨ Images ready!")
-                                                st.rerun()
-                                            else:
-                                                status_container.warning("⏳ Still generating... Please check again in a moment.")
+                                        urls = result["urls"][:num_results]
+                                        track_bria_job(urls, "Generative Fill")
+                                        st.info(f"🎨 Generation started! Your image{'s' if len(urls) > 1 else ''} will appear here as soon as {'they are' if len(urls) > 1 else 'it is'} ready.")
                         except Exception as e:
                             st.error(f"Error: {str(e)}")
-                            st.write("Full error details:", str(e))
+                            show_api_error_hint(e)
             
             with col2:
                 if st.session_state.edited_image:
@@ -2002,8 +2551,9 @@ def main():
                         )
                         # Save to gallery button
                         render_save_to_db_button(st.session_state.edited_image, "genfill")
+                    render_result_gallery(st.session_state.generated_images, "genfill")
                 elif st.session_state.pending_urls:
-                    st.info("Generation in progress. Click the refresh button above to check status.")
+                    st.info("🔄 Generation in progress; results will appear here automatically.")
 
     # Erase Elements Tab
     with tabs[3]:
@@ -2014,16 +2564,22 @@ def main():
         </div>
         """, unsafe_allow_html=True)
         
+        show_endpoint_health("/erase_foreground")
+        
         uploaded_file = st.file_uploader("Upload Image", type=["png", "jpg", "jpeg"], key="erase_upload")
-        if uploaded_file:
+        source_data, source_url = select_input_image(uploaded_file, "erase")
+        # The mask canvas needs the pixels even when Bria fetches the URL itself
+        canvas_bytes = mask_canvas_image(source_data, source_url, "erase")
+        if canvas_bytes:
             col1, col2 = st.columns(2)
             
             with col1:
                 # Display original image
-                st.image(uploaded_file, caption="Original Image", use_column_width=True)
+                st.image(source_url or source_data, caption="Original Image", use_column_width=True)
                 
                 # Get image dimensions for canvas
-                img = Image.open(uploaded_file)
+                # Upright, the way the image is sent to Bria, so the mask lines up
+                img = ImageOps.exif_transpose(Image.open(io.BytesIO(canvas_bytes)))
                 img_width, img_height = img.size
                 
                 # Calculate aspect ratio and set canvas height
@@ -2061,19 +2617,22 @@ def main():
                 
                 if st.button("🎨 Erase Selected Area", key="erase_btn"):
                     if not canvas_result.image_data is None:
+                        show_queue_estimate("/erase_foreground")
                         with st.spinner("Erasing selected area..."):
                             try:
                                 # Convert canvas result to mask
                                 mask_img = Image.fromarray(canvas_result.image_data.astype('uint8'), mode='RGBA')
                                 mask_img = mask_img.convert('L')
                                 
-                                # Convert uploaded image to bytes
-                                image_bytes = uploaded_file.getvalue()
+                                # Uploaded bytes, or None when Bria fetches the hosted URL
+                                image_bytes = source_data
                                 
                                 result = erase_foreground(
                                     st.session_state.api_key,
                                     image_data=image_bytes,
-                                    content_moderation=content_moderation
+                                    image_url=source_url,
+                                    content_moderation=content_moderation,
+                                    cancel_token=bria_call_token()
                                 )
                                 
                                 if result:
@@ -2084,8 +2643,7 @@ def main():
                                         st.error("No result URL in the API response. Please try again.")
                             except Exception as e:
                                 st.error(f"Error: {str(e)}")
-                                if "422" in str(e):
-                                    st.warning("Content moderation failed. Please ensure the image is appropriate.")
+                                show_api_error_hint(e)
                     else:
                         st.warning("⚠️ Please draw on the image to select the area to erase.")
             
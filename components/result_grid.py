@@ -0,0 +1,75 @@
+import streamlit as st
+
+from services.pipeline import result_urls
+
+class ResultGrid:
+    """
+    Placeholder grid that shows each variation the moment it is ready.
+
+    The first result to arrive is put in focus straight away, both on screen
+    and in st.session_state.edited_image, so the user does not wait for the
+    slowest variation. Pass add_response as a service's on_result callback.
+    Captions read "<label> <n>" unless labels gives one caption per slot.
+    """
+
+    def __init__(self, num_results, columns=4, label="Variation", labels=None):
+        self.label = label
+        self.labels = labels
+        self.urls = [None] * num_results
+        self.focus_url = None
+        self.focus = st.empty()
+        cols = st.columns(min(columns, num_results)) if num_results > 1 else []
+        self.slots = []
+        for idx in range(num_results if cols else 0):
+            with cols[idx % len(cols)]:
+                slot = st.empty()
+                slot.info(f"⏳ {self.caption(idx)}")
+            self.slots.append(slot)
+
+    def caption(self, idx):
+        """Caption of the result at position idx."""
+        if self.labels:
+            return self.labels[idx]
+        return f"{self.label} {idx + 1}"
+
+    def add(self, idx, url):
+        """Show the result at position idx."""
+        if idx >= len(self.urls) or self.urls[idx] is not None:
+            return
+        self.urls[idx] = url
+        if self.slots:
+            self.slots[idx].image(url, caption=self.caption(idx), use_column_width=True)
+        if self.focus_url is None:
+            self.focus_url = url
+            st.session_state.edited_image = url
+            self.focus.image(url, caption=f"{self.caption(idx)} (first ready)", use_column_width=True)
+
+    def fail(self, idx, message):
+        """Show that the result at position idx could not be generated."""
+        if idx < len(self.slots):
+            self.slots[idx].error(f"❌ {self.caption(idx)}: {message}")
+
+    def add_response(self, first_index, response):
+        """Show the results of one (sub-)request, starting at first_index."""
+        for offset, url in enumerate(result_urls(response)):
+            self.add(first_index + offset, url)
+
+    def ready_urls(self):
+        """The URLs shown so far, in variation order."""
+        return [url for url in self.urls if url]
+
+def render_result_gallery(urls, key):
+    """Thumbnails of all variations; picking one puts it in focus."""
+    # Only while one of them is in focus, not after an unrelated edit
+    if not urls or len(urls) < 2 or st.session_state.get("edited_image") not in urls:
+        return
+    st.markdown("**🖼️ All Variations**")
+    cols = st.columns(min(4, len(urls)))
+    for idx, url in enumerate(urls):
+        with cols[idx % len(cols)]:
+            st.image(url, caption=f"Variation {idx + 1}", use_column_width=True)
+            if url == st.session_state.get("edited_image"):
+                st.caption("🔍 In focus")
+            elif st.button("🔍 Focus", key=f"focus_{key}_{idx}"):
+                st.session_state.edited_image = url
+                st.rerun()
@@ -1,10 +1,34 @@
-from .lifestyle_shot import lifestyle_shot_by_text, lifestyle_shot_by_image
-from .shadow import add_shadow
-from .packshot import create_packshot
-from .prompt_enhancement import enhance_prompt
-from .generative_fill import generative_fill
-from .hd_image_generation import generate_hd_image
-from .erase_foreground import erase_foreground
+from .lifestyle_shot import (
+    lifestyle_shot_by_text, lifestyle_shot_by_image,
+    lifestyle_shot_by_text_async, lifestyle_shot_by_image_async
+)
+from .shadow import add_shadow, add_shadow_async
+from .packshot import create_packshot, create_packshot_async
+from .prompt_enhancement import enhance_prompt, enhance_prompt_async
+from .generative_fill import generative_fill, generative_fill_async
+from .hd_image_generation import generate_hd_image, generate_hd_image_async
+from .erase_foreground import erase_foreground, erase_foreground_async
+from .bria_client import configure_bria_session, get_bria_session
+from .bria_async import get_bria_loop, submit_bria, run_bria
+from .errors import (
+    BriaError, BriaAuthError, BriaContentModerationError, BriaBadRequestError,
+    BriaRateLimitError, BriaServerError, BriaConnectionError, BriaCircuitOpenError,
+    BriaTimeoutError, BriaCancelledError
+)
+from .retry import RetryPolicy, get_retry_policy, set_retry_policy
+from .rate_limiter import configure_rate_limit, get_rate_limit_status
+from .concurrency import get_concurrency_status
+from .circuit_breaker import get_breaker_states
+from .response_cache import get_response_cache
+from .single_flight import get_single_flight_stats
+from .upload_optimizer import get_upload_stats
+from .hedging import get_hedge_stats
+from .job_manager import get_job_manager
+from .callback_server import start_callback_server
+from .pipeline import parse_pipeline, run_pipeline
+from .prompt_batch import parse_prompts, load_prompts, run_prompt_batch
+from .sweep import sweep_combinations, run_sweep
+from .deadline import CancellationToken
 
 # Auth and project management
 from .auth_service import (
@@ -32,6 +56,24 @@ __all__ = [
     'generative_fill',
     'generate_hd_image',
     'erase_foreground',
+    # Async Bria services
+    'lifestyle_shot_by_text_async', 'lifestyle_shot_by_image_async',
+    'add_shadow_async', 'create_packshot_async', 'enhance_prompt_async',
+    'generative_fill_async', 'generate_hd_image_async', 'erase_foreground_async',
+    # Bria HTTP client
+    'configure_bria_session', 'get_bria_session',
+    'get_bria_loop', 'submit_bria', 'run_bria',
+    # Bria errors and retry policy
+    'BriaError', 'BriaAuthError', 'BriaContentModerationError', 'BriaBadRequestError',
+    'BriaRateLimitError', 'BriaServerError', 'BriaConnectionError', 'BriaCircuitOpenError',
+    'BriaTimeoutError', 'BriaCancelledError', 'CancellationToken',
+    'RetryPolicy', 'get_retry_policy', 'set_retry_policy',
+    'configure_rate_limit', 'get_rate_limit_status',
+    'get_concurrency_status', 'get_breaker_states', 'get_response_cache',
+    'get_single_flight_stats', 'get_upload_stats', 'get_hedge_stats', 'get_job_manager',
+    'start_callback_server', 'parse_pipeline', 'run_pipeline',
+    'parse_prompts', 'load_prompts', 'run_prompt_batch',
+    'sweep_combinations', 'run_sweep',
     # Auth services
     'sign_up', 'sign_in', 'sign_out',
     'get_current_user', 'is_authenticated',
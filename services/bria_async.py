@@ -0,0 +1,393 @@
+"""
+Asyncio client for the Bria AI API.
+Provides a non-blocking counterpart to bria_client.bria_post and a
+process-wide event loop running on a background thread, so Streamlit script
+threads can submit Bria coroutines instead of blocking on them.
+"""
+import asyncio
+import concurrent.futures
+import json
+import logging
+import threading
+import time
+import weakref
+from typing import Dict, Any, Optional, Awaitable, Tuple
+
+from .bria_client import (
+    bria_url, bria_headers, endpoint_key, get_pool_config,
+    record_breaker_outcome, THROTTLE_STATUSES
+)
+from .circuit_breaker import get_breaker
+from .response_cache import request_key, get_response_cache
+from .single_flight import run_once_async
+from .payload import JSONBody, encode_json_body
+from .bria_logging import log_event, redact, sample_request
+from .deadline import Deadline, CancellationToken, cancelled_error
+from .hedging import get_hedge_tracker
+from .errors import BriaError, BriaConnectionError, error_for_status
+from .retry import RetryPolicy, get_retry_policy, parse_retry_after
+from . import rate_limiter, concurrency
+
+# Try to import aiohttp - async calls are unavailable without it
+AIOHTTP_AVAILABLE = False
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError as e:
+    log_event(logging.WARNING, "bria.aiohttp_unavailable", error=e)
+    aiohttp = None
+
+# Keep-alive for idle pooled connections, in seconds
+KEEPALIVE_TIMEOUT = 30
+
+_loop = None
+_loop_thread = None
+_loop_lock = threading.Lock()
+
+# One aiohttp session per event loop; sessions cannot be shared across loops
+_sessions = weakref.WeakKeyDictionary()
+
+
+def _run_loop(loop: asyncio.AbstractEventLoop) -> None:
+    asyncio.set_event_loop(loop)
+    loop.run_forever()
+
+
+def get_bria_loop() -> asyncio.AbstractEventLoop:
+    """Get or start the process-wide event loop used for Bria calls."""
+    global _loop, _loop_thread
+
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=_run_loop, args=(loop,),
+                    name="bria-event-loop", daemon=True
+                )
+                thread.start()
+                _loop, _loop_thread = loop, thread
+    return _loop
+
+
+def submit_bria(coro: Awaitable) -> concurrent.futures.Future:
+    """
+    Schedule a coroutine on the Bria event loop from any thread.
+
+    Args:
+        coro: Coroutine, e.g. create_packshot_async(...)
+
+    Returns:
+        A concurrent.futures.Future resolving to the coroutine's result
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_bria_loop())
+
+
+def run_bria(coro: Awaitable, timeout: Optional[float] = None) -> Any:
+    """Submit a coroutine to the Bria event loop and wait for its result."""
+    return submit_bria(coro).result(timeout)
+
+
+def get_async_bria_session() -> "aiohttp.ClientSession":
+    """
+    Get or create the pooled aiohttp session for the running event loop.
+
+    Must be called from inside a coroutine.
+    """
+    if not AIOHTTP_AVAILABLE:
+        raise RuntimeError("aiohttp is required for async Bria calls. Install it with 'pip install aiohttp'.")
+
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        config = get_pool_config()
+        connector = aiohttp.TCPConnector(
+            limit=config["pool_connections"] * config["pool_maxsize"],
+            limit_per_host=config["pool_maxsize"],
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+        )
+        session = aiohttp.ClientSession(connector=connector)
+        _sessions[loop] = session
+    return session
+
+
+async def _send_once_async(
+    url: str,
+    headers: Dict[str, str],
+    data: Dict[str, Any],
+    operation: str,
+    endpoint: str,
+    deadline: Deadline,
+    sampled: bool = False
+) -> Tuple[Optional[Dict[str, Any]], Optional[BriaError]]:
+    """Awaitable version of bria_client._send_once."""
+    breaker = get_breaker(endpoint)
+    breaker.before_call()
+    try:
+        limiter = await concurrency.acquire_slot_async(endpoint, deadline=deadline, operation=operation)
+    except BaseException:
+        breaker.record_neutral()
+        raise
+    started = time.monotonic()
+    latency, throttled, healthy = None, False, False
+    try:
+        if deadline.expired():
+            # Queueing for the slot used up the budget; that says nothing
+            # about the endpoint, and a zero timeout is not a valid one
+            healthy = True
+            deadline.check(operation)
+        try:
+            session = get_async_bria_session()
+            request_body = encode_json_body(data)
+            if isinstance(request_body, JSONBody):
+                # Streamed bodies have a known size; avoid chunked encoding
+                headers = {**headers, 'Content-Length': str(len(request_body))}
+            connect_timeout, total_timeout = deadline.timeouts()
+            timeout = aiohttp.ClientTimeout(total=total_timeout, sock_connect=connect_timeout)
+            async with session.post(url, headers=headers, data=request_body, timeout=timeout) as response:
+                body = await response.text()
+                status, reason = response.status, response.reason
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        except aiohttp.ClientConnectionError as e:
+            # Includes connect timeouts, which are worth another attempt
+            return None, BriaConnectionError(f"{operation} failed: {str(e)}", operation=operation)
+        except asyncio.TimeoutError:
+            raise deadline.timeout_error(operation) from None
+        except aiohttp.ClientError as e:
+            # e.g. a response cut off mid-body (ClientPayloadError)
+            return None, BriaConnectionError(f"{operation} failed: {str(e)}", operation=operation)
+        except asyncio.CancelledError:
+            # The caller gave up; that says nothing about the endpoint
+            healthy = True
+            raise
+        latency = time.monotonic() - started
+        healthy = status < 500
+
+        if sampled:
+            log_event(logging.DEBUG, "bria.response", operation=operation,
+                      status=status, latency=latency, body=body)
+
+        if status < 400:
+            get_hedge_tracker(endpoint).record_latency(latency)
+            try:
+                return json.loads(body), None
+            except ValueError as e:
+                raise BriaError(
+                    f"{operation} failed: invalid JSON response: {str(e)}",
+                    status_code=status,
+                    operation=operation,
+                    response_body=body
+                )
+
+        throttled = status in THROTTLE_STATUSES
+        return None, error_for_status(status, reason, body, operation, retry_after=retry_after)
+    finally:
+        limiter.release(latency, throttled)
+        record_breaker_outcome(breaker, healthy, latency is not None and not throttled)
+
+
+async def _send_hedged_async(
+    url: str,
+    headers: Dict[str, str],
+    data: Dict[str, Any],
+    operation: str,
+    endpoint: str,
+    api_key: str,
+    deadline: Deadline,
+    sampled: bool = False
+) -> Tuple[Optional[Dict[str, Any]], Optional[BriaError]]:
+    """
+    Send one attempt, racing a second identical request against it if the
+    first has not answered within the endpoint's p95 latency.
+
+    The first successful response wins and the other request is cancelled.
+    A hedge is only sent while the hedge rate cap allows it and a rate limit
+    token is free right away, so hedging never queues behind other callers.
+    """
+    tracker = get_hedge_tracker(endpoint)
+    hedge_delay = tracker.hedge_delay()
+    primary = asyncio.ensure_future(_send_once_async(url, headers, data, operation, endpoint, deadline, sampled))
+    if hedge_delay is None:
+        return await primary
+
+    tasks = {primary}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=min(hedge_delay, deadline.remaining()))
+        if done or not tracker.can_hedge() or not rate_limiter.try_acquire(api_key, endpoint):
+            return await primary
+
+        tracker.record_hedge()
+        secondary = asyncio.ensure_future(
+            _send_once_async(url, headers, data, operation, endpoint, deadline, sampled)
+        )
+        tasks.add(secondary)
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None and task.result()[1] is None:
+                    if task is secondary:
+                        tracker.record_hedge_win()
+                        log_event(logging.INFO, "bria.hedge_won", operation=operation, endpoint=endpoint)
+                    return task.result()
+        # Neither request succeeded; report the first request's outcome
+        return primary.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def async_bria_post(
+    path: str,
+    api_key: str,
+    data: Dict[str, Any],
+    operation: str = "Bria request",
+    retry_policy: Optional[RetryPolicy] = None,
+    cache: bool = False,
+    timeout: Optional[float] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    hedge: bool = False,
+    variant: int = 0
+) -> Dict[str, Any]:
+    """
+    Awaitable version of bria_client.bria_post.
+
+    Args:
+        path: Endpoint path, e.g. '/product/packshot'
+        api_key: Bria AI API key
+        data: JSON request body
+        operation: Human readable name used in error messages
+        retry_policy: Overrides the process-wide default retry policy
+        cache: Serve and store the response in the response cache; only
+            pass True for requests whose result is deterministic
+        timeout: Total seconds the call may take; defaults to the
+            endpoint's budget (see deadline.ENDPOINT_TIMEOUTS)
+        cancel_token: Cancelling it, from any thread, cancels the call with
+            BriaCancelledError; cancelling the awaiting task works too
+        hedge: Send a second, identical request if the first is slower than
+            the endpoint's p95 and use whichever answers first; only pass
+            True for requests that are safe to repeat
+        variant: Tells apart identical requests that must each be sent
+            (e.g. unseeded fan-out parts) so they are not coalesced or cached
+            as one
+
+    Identical requests already in flight, sync or async, are joined rather
+    than sent again.
+
+    Returns:
+        Dict containing the API response
+    """
+    url = bria_url(path)
+    headers = bria_headers(api_key)
+    policy = retry_policy or get_retry_policy()
+    endpoint = endpoint_key(path)
+    deadline = Deadline.for_endpoint(endpoint, timeout)
+
+    key = request_key(path, data, api_key)
+    if variant:
+        key = f"{key}:{variant}"
+    if cache:
+        cached = get_response_cache().get(key)
+        if cached is not None:
+            log_event(logging.DEBUG, "bria.cache_hit", operation=operation, endpoint=endpoint)
+            return cached
+
+    call = run_once_async(
+        key,
+        lambda: _post_with_retries_async(url, headers, data, operation, endpoint, api_key, policy,
+                                         key if cache else None, sample_request(), deadline, hedge),
+        operation,
+        deadline
+    )
+    if cancel_token is None:
+        return await call
+    return await _with_cancel_token(call, cancel_token, operation)
+
+
+async def _with_cancel_token(call: Awaitable, cancel_token: CancellationToken, operation: str) -> Any:
+    """Await call, cancelling the current task when the token is cancelled."""
+    cancel_token.raise_if_cancelled(operation)
+    loop = asyncio.get_running_loop()
+    task = asyncio.current_task()
+    finished = False
+
+    def cancel_task() -> None:
+        if not finished:
+            task.cancel()
+
+    def on_cancel() -> None:
+        loop.call_soon_threadsafe(cancel_task)
+
+    cancel_token.add_callback(on_cancel)
+    try:
+        return await call
+    except asyncio.CancelledError:
+        if not cancel_token.cancelled:
+            raise
+        # Our own cancellation; report it as a Bria error, not a task cancel
+        if hasattr(task, 'uncancel'):
+            task.uncancel()
+        raise cancelled_error(operation) from None
+    finally:
+        finished = True
+        cancel_token.remove_callback(on_cancel)
+
+
+async def _post_with_retries_async(
+    url: str,
+    headers: Dict[str, str],
+    data: Dict[str, Any],
+    operation: str,
+    endpoint: str,
+    api_key: str,
+    policy: RetryPolicy,
+    cache_key: Optional[str],
+    sampled: bool,
+    deadline: Deadline,
+    hedge: bool = False
+) -> Dict[str, Any]:
+    """Send a request, retrying transient failures according to policy."""
+    if sampled:
+        log_event(logging.DEBUG, "bria.request", operation=operation, url=url,
+                  headers=redact(headers), data=data, transport="aiohttp")
+
+    attempt = 0
+    slept = 0.0
+    while True:
+        attempt += 1
+        deadline.check(operation)
+        # Fail fast before queueing if the endpoint is known to be down
+        get_breaker(endpoint).check()
+        await rate_limiter.acquire_async(api_key, endpoint, max_wait=deadline.remaining())
+        if hedge:
+            result, error = await _send_hedged_async(url, headers, data, operation, endpoint,
+                                                     api_key, deadline, sampled)
+        else:
+            result, error = await _send_once_async(url, headers, data, operation, endpoint, deadline, sampled)
+        if error is None:
+            if cache_key is not None:
+                get_response_cache().put(cache_key, result)
+            return result
+
+        if error.status_code == 429:
+            rate_limiter.report_throttled(api_key, endpoint, error.retry_after)
+
+        delay = policy.next_delay(error, attempt, slept)
+        if delay is None or delay >= deadline.remaining():
+            raise error
+
+        log_event(logging.WARNING, "bria.retry", operation=operation, attempt=attempt,
+                  status=error.status_code or "connection_error", delay=delay)
+        # The rate limiter queue already holds us back after a 429, so only
+        # sleep for whatever part of the backoff it does not cover
+        await asyncio.sleep(max(0.0, delay - rate_limiter.estimate_wait(api_key, endpoint)))
+        slept += delay
+
+__all__ = [
+    'AIOHTTP_AVAILABLE',
+    'get_bria_loop',
+    'submit_bria',
+    'run_bria',
+    'get_async_bria_session',
+    'async_bria_post',
+]
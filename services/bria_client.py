@@ -0,0 +1,386 @@
+"""
+Shared HTTP client for the Bria AI API.
+Keeps one pooled, keep-alive requests.Session per process so calls reuse
+connections to the Bria engine instead of paying a fresh DNS lookup and TLS
+handshake each time.
+
+A blocking requests call cannot be interrupted, so POSTs made with a
+cancellation token or hedging go through the pooled aiohttp session in
+bria_async whenever aiohttp is installed. The Streamlit app passes a token
+on every call, which leaves this session to headless callers (CLI, catalog
+and batch runs), result downloads and readiness probes.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+from .errors import BriaError, BriaConnectionError, BriaTimeoutError, error_for_status
+from .retry import RetryPolicy, get_retry_policy, parse_retry_after
+from . import rate_limiter, concurrency
+from .circuit_breaker import get_breaker
+from .response_cache import request_key, get_response_cache
+from .single_flight import run_once
+from .payload import encode_json_body
+from .bria_logging import log_event, redact, sample_request
+from .deadline import Deadline, CancellationToken
+from .hedging import get_hedge_tracker
+
+load_dotenv()
+
+# Base URL for all Bria v1 endpoints
+BRIA_BASE_URL = os.getenv("BRIA_BASE_URL", "https://engine.prod.bria-api.com/v1")
+
+# Pool sizing. pool_connections is the number of distinct hosts kept in the
+# pool cache; pool_maxsize is the number of keep-alive connections per host.
+DEFAULT_POOL_CONNECTIONS = int(os.getenv("BRIA_POOL_CONNECTIONS", "4"))
+DEFAULT_POOL_MAXSIZE = int(os.getenv("BRIA_POOL_MAXSIZE", "32"))
+DEFAULT_POOL_BLOCK = os.getenv("BRIA_POOL_BLOCK", "false").lower() in ("1", "true", "yes")
+
+_session = None
+_session_lock = threading.Lock()
+_pool_config = {
+    "pool_connections": DEFAULT_POOL_CONNECTIONS,
+    "pool_maxsize": DEFAULT_POOL_MAXSIZE,
+    "pool_block": DEFAULT_POOL_BLOCK,
+}
+
+
+def _create_session() -> requests.Session:
+    """Build a session with a sized connection pool mounted for http and https."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=_pool_config["pool_connections"],
+        pool_maxsize=_pool_config["pool_maxsize"],
+        pool_block=_pool_config["pool_block"],
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+    return session
+
+
+def configure_bria_session(
+    pool_connections: Optional[int] = None,
+    pool_maxsize: Optional[int] = None,
+    pool_block: Optional[bool] = None
+) -> None:
+    """
+    Change the connection pool settings used for Bria calls.
+
+    The current session is closed and a new one is created lazily on the
+    next call with the updated settings.
+
+    Args:
+        pool_connections: Number of host pools to keep
+        pool_maxsize: Maximum keep-alive connections per host
+        pool_block: Whether callers wait for a free connection instead of
+            opening an extra, non-pooled one when the pool is exhausted
+    """
+    global _session
+
+    with _session_lock:
+        if pool_connections is not None:
+            _pool_config["pool_connections"] = pool_connections
+        if pool_maxsize is not None:
+            _pool_config["pool_maxsize"] = pool_maxsize
+        if pool_block is not None:
+            _pool_config["pool_block"] = pool_block
+
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def get_bria_session() -> requests.Session:
+    """
+    Get or create the process-wide pooled session for Bria calls.
+
+    bria_post only uses it for calls without a cancellation token or
+    hedging, or when aiohttp is missing; see the module docstring.
+    """
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _create_session()
+    return _session
+
+
+def get_pool_config() -> Dict[str, object]:
+    """Return a copy of the active connection pool settings."""
+    return dict(_pool_config)
+
+
+def bria_url(path: str) -> str:
+    """Build the full Bria endpoint URL for a path such as '/product/packshot'."""
+    return f"{BRIA_BASE_URL}{path}"
+
+
+def endpoint_key(path: str) -> str:
+    """
+    Normalize a request path to the endpoint it targets.
+
+    Version suffixes are dropped so '/text-to-image/hd/2.2' and
+    '/text-to-image/hd/2.3' share limits, e.g. -> '/text-to-image/hd'.
+    """
+    return re.sub(r"(/[0-9][0-9.]*)+$", "", path.split("?", 1)[0])
+
+
+def bria_headers(api_key: str) -> Dict[str, str]:
+    """Standard JSON headers for Bria requests."""
+    return {
+        'api_token': api_key,
+        'Accept': 'application/json',
+        'Content-Type': 'application/json'
+    }
+
+
+# Responses that tell the concurrency limiter Bria is overloaded
+THROTTLE_STATUSES = (429, 503)
+
+
+def record_breaker_outcome(breaker, healthy: bool, success: bool) -> None:
+    """
+    Report an attempt to the endpoint's breaker.
+
+    Connection failures and 5xx count against the endpoint; any other
+    response proves it is up, though only non-throttled ones close it.
+    """
+    if not healthy:
+        breaker.record_failure()
+    elif success:
+        breaker.record_success()
+    else:
+        breaker.record_neutral()
+
+
+def _send_once(
+    url: str,
+    headers: Dict[str, str],
+    data: Dict[str, Any],
+    operation: str,
+    endpoint: str,
+    deadline: Deadline,
+    sampled: bool = False
+) -> Tuple[Optional[Dict[str, Any]], Optional[BriaError]]:
+    """
+    Send one attempt through the endpoint's circuit breaker, inside an
+    adaptive concurrency slot. Connect and read timeouts come from the
+    call's deadline; running out of time is raised, not retried.
+
+    Returns:
+        (result, None) on success, or (None, error) for an HTTP error status
+        or connection failure that the retry policy should look at
+    """
+    breaker = get_breaker(endpoint)
+    breaker.before_call()
+    try:
+        limiter = concurrency.acquire_slot(endpoint, deadline=deadline, operation=operation)
+    except BaseException:
+        breaker.record_neutral()
+        raise
+    started = time.monotonic()
+    latency, throttled, healthy = None, False, False
+    try:
+        if deadline.expired():
+            # Queueing for the slot used up the budget; that says nothing
+            # about the endpoint, and a zero timeout is not a valid one
+            healthy = True
+            deadline.check(operation)
+        try:
+            response = get_bria_session().post(
+                url, headers=headers, data=encode_json_body(data), timeout=deadline.timeouts()
+            )
+        except requests.ReadTimeout:
+            raise deadline.timeout_error(operation) from None
+        except requests.ConnectionError as e:
+            # Includes connect timeouts, which are worth another attempt
+            return None, BriaConnectionError(f"{operation} failed: {str(e)}", operation=operation)
+        latency = time.monotonic() - started
+        healthy = response.status_code < 500
+
+        if sampled:
+            log_event(logging.DEBUG, "bria.response", operation=operation,
+                      status=response.status_code, latency=latency, body=response.text)
+
+        if response.ok:
+            get_hedge_tracker(endpoint).record_latency(latency)
+            try:
+                return response.json(), None
+            except ValueError as e:
+                raise BriaError(
+                    f"{operation} failed: invalid JSON response: {str(e)}",
+                    status_code=response.status_code,
+                    operation=operation,
+                    response_body=response.text
+                )
+
+        throttled = response.status_code in THROTTLE_STATUSES
+        return None, error_for_status(
+            response.status_code, response.reason, response.text, operation,
+            retry_after=parse_retry_after(response.headers.get("Retry-After"))
+        )
+    finally:
+        limiter.release(latency, throttled)
+        record_breaker_outcome(breaker, healthy, latency is not None and not throttled)
+
+
+def bria_post(
+    path: str,
+    api_key: str,
+    data: Dict[str, Any],
+    operation: str = "Bria request",
+    retry_policy: Optional[RetryPolicy] = None,
+    cache: bool = False,
+    timeout: Optional[float] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    hedge: bool = False,
+    variant: int = 0
+) -> Dict[str, Any]:
+    """
+    POST a JSON payload to a Bria endpoint over the shared session.
+
+    Transient failures are retried according to the retry policy; anything
+    else is raised as a typed BriaError. The whole call, including queueing,
+    retries and backoff, must finish within its deadline or it raises
+    BriaTimeoutError.
+
+    Args:
+        path: Endpoint path, e.g. '/product/packshot'
+        api_key: Bria AI API key
+        data: JSON request body
+        operation: Human readable name used in error messages
+        retry_policy: Overrides the process-wide default retry policy
+        cache: Serve and store the response in the response cache; only
+            pass True for requests whose result is deterministic
+        timeout: Total seconds the call may take; defaults to the
+            endpoint's budget (see deadline.ENDPOINT_TIMEOUTS)
+        cancel_token: Cancelling it abandons the call with BriaCancelledError.
+            With aiohttp installed the call is then made over aiohttp, so it
+            can be interrupted; without it, cancellation only takes effect
+            between attempts
+        hedge: Send a second, identical request if the first is slower than
+            the endpoint's p95 and use whichever answers first; only pass
+            True for requests that are safe to repeat. Needs aiohttp.
+        variant: Tells apart identical requests that must each be sent
+            (e.g. unseeded fan-out parts) so they are not coalesced or cached
+            as one
+
+    Identical requests already in flight from another caller are joined
+    rather than sent again.
+
+    Returns:
+        Dict containing the API response
+    """
+    url = bria_url(path)
+    headers = bria_headers(api_key)
+    policy = retry_policy or get_retry_policy()
+    endpoint = endpoint_key(path)
+    deadline = Deadline.for_endpoint(endpoint, timeout)
+
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled(operation)
+    if cancel_token is not None or hedge:
+        from .bria_async import AIOHTTP_AVAILABLE, submit_bria, async_bria_post
+        if AIOHTTP_AVAILABLE:
+            # A blocking requests call cannot be interrupted or raced, an aiohttp one can
+            return submit_bria(async_bria_post(
+                path, api_key, data, operation, retry_policy, cache,
+                timeout=deadline.remaining(), cancel_token=cancel_token, hedge=hedge, variant=variant
+            )).result()
+
+    key = request_key(path, data, api_key)
+    if variant:
+        key = f"{key}:{variant}"
+    if cache:
+        cached = get_response_cache().get(key)
+        if cached is not None:
+            log_event(logging.DEBUG, "bria.cache_hit", operation=operation, endpoint=endpoint)
+            return cached
+
+    return run_once(
+        key,
+        lambda: _post_with_retries(url, headers, data, operation, endpoint, api_key, policy,
+                                   key if cache else None, sample_request(), deadline, cancel_token),
+        operation,
+        deadline,
+        cancel_token
+    )
+
+
+def _post_with_retries(
+    url: str,
+    headers: Dict[str, str],
+    data: Dict[str, Any],
+    operation: str,
+    endpoint: str,
+    api_key: str,
+    policy: RetryPolicy,
+    cache_key: Optional[str],
+    sampled: bool,
+    deadline: Deadline,
+    cancel_token: Optional[CancellationToken] = None
+) -> Dict[str, Any]:
+    """
+    Send a request, retrying transient failures according to policy.
+    Without aiohttp a cancellation takes effect between attempts.
+    """
+    if sampled:
+        log_event(logging.DEBUG, "bria.request", operation=operation, url=url,
+                  headers=redact(headers), data=data)
+
+    attempt = 0
+    slept = 0.0
+    while True:
+        attempt += 1
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled(operation)
+        deadline.check(operation)
+        # Fail fast before queueing if the endpoint is known to be down
+        get_breaker(endpoint).check()
+        rate_limiter.acquire(api_key, endpoint, max_wait=deadline.remaining(), cancel_token=cancel_token)
+        result, error = _send_once(url, headers, data, operation, endpoint, deadline, sampled)
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled(operation)
+        if error is None:
+            if cache_key is not None:
+                get_response_cache().put(cache_key, result)
+            return result
+
+        if error.status_code == 429:
+            rate_limiter.report_throttled(api_key, endpoint, error.retry_after)
+
+        delay = policy.next_delay(error, attempt, slept)
+        if delay is None or delay >= deadline.remaining():
+            raise error
+
+        log_event(logging.WARNING, "bria.retry", operation=operation, attempt=attempt,
+                  status=error.status_code or "connection_error", delay=delay)
+        # The rate limiter queue already holds us back after a 429, so only
+        # sleep for whatever part of the backoff it does not cover
+        backoff = max(0.0, delay - rate_limiter.estimate_wait(api_key, endpoint))
+        if cancel_token is None:
+            time.sleep(backoff)
+        elif cancel_token.wait(backoff):
+            cancel_token.raise_if_cancelled(operation)
+        slept += delay
+
+__all__ = [
+    'BRIA_BASE_URL',
+    'configure_bria_session',
+    'get_bria_session',
+    'get_pool_config',
+    'bria_url',
+    'endpoint_key',
+    'bria_headers',
+    'bria_post',
+    'record_breaker_outcome',
+]
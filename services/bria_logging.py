@@ -0,0 +1,138 @@
+"""
+Structured, lazy logging for Bria requests.
+Request and response details are logged as `event key=value ...` lines on
+the "stencil.bria" logger. Nothing is formatted unless a handler actually
+emits the record, image payloads are summarized by field name and size,
+secrets are redacted, and per-request detail can be sampled so busy
+deployments do not flood their log pipeline.
+"""
+import logging
+import os
+import random
+import sys
+from typing import Any, Dict, Mapping
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LOG_LEVEL = os.getenv("BRIA_LOG_LEVEL", "INFO").upper()
+# Fraction of requests whose request/response details are logged at DEBUG
+LOG_SAMPLE_RATE = float(os.getenv("BRIA_LOG_SAMPLE_RATE", "1.0"))
+# Longer string values are truncated in log lines
+MAX_LOGGED_STRING = int(os.getenv("BRIA_LOG_MAX_STRING", "200"))
+
+SECRET_FIELDS = {'api_token', 'api_key', 'authorization', 'x-api-key'}
+# Fields whose string values are base64 image payloads
+BLOB_FIELDS = {'file', 'mask_file', 'ref_image_file'}
+# Fields holding URLs whose query string carries a credential
+SIGNED_URL_FIELDS = {'callback_url'}
+
+logger = logging.getLogger("stencil.bria")
+logger.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+if not logger.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    logger.addHandler(_handler)
+    logger.propagate = False
+
+
+def redact(mapping: Mapping[str, Any]) -> Dict[str, Any]:
+    """Copy of a header or parameter mapping with secret values masked."""
+    return {
+        key: "***" if key.lower() in SECRET_FIELDS else value
+        for key, value in mapping.items()
+    }
+
+
+def summarize_value(field: str, value: Any) -> Any:
+    """Loggable stand-in for one request or response value."""
+    # payload.ImageBlob; checked by attribute to keep this module import-free
+    if hasattr(value, 'iter_encoded'):
+        return f"<base64 {len(value)} bytes>"
+    if isinstance(value, (bytes, bytearray)):
+        return f"<{len(value)} bytes>"
+    if isinstance(value, str):
+        if field in BLOB_FIELDS:
+            return f"<base64 {len(value)} bytes>"
+        if field in SIGNED_URL_FIELDS:
+            return value.split("?", 1)[0] + ("?***" if "?" in value else "")
+        if len(value) > MAX_LOGGED_STRING:
+            return f"{value[:MAX_LOGGED_STRING]}...<{len(value)} chars>"
+        return value
+    if isinstance(value, Mapping):
+        return summarize_payload(value)
+    return value
+
+
+def summarize_payload(data: Mapping[str, Any]) -> Dict[str, Any]:
+    """Summarize a payload by field: blobs become sizes, secrets are masked."""
+    return {
+        field: summarize_value(field, value)
+        for field, value in redact(data).items()
+    }
+
+
+class LogEvent:
+    """
+    A structured log event, rendered only when a handler formats it.
+
+    Handlers that want structure can read `record.bria_event.as_dict()`.
+    """
+    __slots__ = ('event', 'fields')
+
+    def __init__(self, event: str, fields: Dict[str, Any]):
+        self.event = event
+        self.fields = fields
+
+    def as_dict(self) -> Dict[str, Any]:
+        summary = {"event": self.event}
+        for field, value in self.fields.items():
+            summary[field] = summarize_value(field, value)
+        return summary
+
+    def __str__(self) -> str:
+        parts = [self.event]
+        for field, value in self.fields.items():
+            if value is None:
+                continue
+            value = summarize_value(field, value)
+            if isinstance(value, float):
+                value = f"{value:.3f}"
+            parts.append(f"{field}={value}")
+        return " ".join(parts)
+
+
+def log_event(level: int, event: str, **fields: Any) -> None:
+    """
+    Log a structured event if the level is enabled.
+
+    Args:
+        level: logging level, e.g. logging.DEBUG
+        event: Dotted event name, e.g. 'bria.request'
+        **fields: Event fields; summarized lazily when the record is emitted
+    """
+    if logger.isEnabledFor(level):
+        record_event = LogEvent(event, fields)
+        logger.log(level, "%s", record_event, extra={"bria_event": record_event})
+
+
+def sample_request() -> bool:
+    """
+    Decide once per request whether its DEBUG details are logged, so a
+    sampled request is logged from start to finish.
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return False
+    return LOG_SAMPLE_RATE >= 1.0 or random.random() < LOG_SAMPLE_RATE
+
+
+__all__ = [
+    'logger',
+    'redact',
+    'summarize_value',
+    'summarize_payload',
+    'LogEvent',
+    'log_event',
+    'sample_request',
+]
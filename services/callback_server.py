@@ -0,0 +1,278 @@
+"""
+HTTP endpoint Bria calls back when an asynchronous job completes.
+A sync=False request normally leaves the job manager probing its result URLs
+until they appear. With BRIA_CALLBACK_URL set, sync=False requests carry a
+callback URL, a small threaded HTTP server next to the Streamlit app
+receives Bria's completion notice, and the waiting session's job finishes
+at once. Probing stays as a slow fallback in case a callback is lost.
+
+Every callback URL carries its own nonce. Once the request answers, the
+nonce is bound to the result URLs (see bind_callback) and so to the job that
+tracks them; callbacks for an unknown nonce, or for one whose job has
+finished, are refused.
+
+Run this module directly to exercise the endpoint against a local stand-in
+that posts callbacks the way Bria would:
+
+    python -m services.callback_server
+"""
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlsplit, parse_qs
+
+import requests
+from dotenv import load_dotenv
+
+from .bria_logging import log_event
+from .job_manager import JobManager, get_job_manager
+
+load_dotenv()
+
+# Public base URL Bria can reach this server at, e.g. https://stencil.example.com:8765
+# (empty disables callbacks; every replica needs its own reachable URL)
+CALLBACK_URL = os.getenv("BRIA_CALLBACK_URL", "").rstrip("/")
+# Interface and port the callback server listens on
+CALLBACK_HOST = os.getenv("BRIA_CALLBACK_HOST", "0.0.0.0")
+CALLBACK_PORT = int(os.getenv("BRIA_CALLBACK_PORT", "8765"))
+# Key callback tokens are signed with; a random one is used when unset.
+# It never leaves the process: each callback URL carries its own nonce and
+# an HMAC of it instead
+CALLBACK_SECRET = os.getenv("BRIA_CALLBACK_SECRET") or secrets.token_urlsafe(24)
+# Request body field carrying the callback URL
+CALLBACK_FIELD = "callback_url"
+CALLBACK_PATH = "/bria/callback"
+# Largest callback body accepted
+MAX_CALLBACK_BYTES = 1024 * 1024
+
+FAILED_STATUSES = ("failed", "failure", "error")
+
+
+def callbacks_enabled() -> bool:
+    """Whether sync=False requests should ask Bria to call back."""
+    return bool(CALLBACK_URL)
+
+
+def callback_token(nonce: str, secret: str = CALLBACK_SECRET) -> str:
+    """HMAC proving a callback URL's nonce was issued by this process."""
+    return hmac.new(secret.encode(), nonce.encode(), hashlib.sha256).hexdigest()
+
+
+def signed_callback_path(secret: str = CALLBACK_SECRET) -> str:
+    """Callback path with a fresh nonce and its token."""
+    nonce = secrets.token_urlsafe(12)
+    return f"{CALLBACK_PATH}?nonce={nonce}&token={callback_token(nonce, secret)}"
+
+
+def callback_url() -> Optional[str]:
+    """URL Bria should call on completion, or None when callbacks are off."""
+    if not callbacks_enabled():
+        return None
+    return f"{CALLBACK_URL}{signed_callback_path()}"
+
+
+def add_callback(data: Dict[str, Any]) -> None:
+    """Ask for a completion callback in a sync=False request body."""
+    url = callback_url()
+    if url and not data.get('sync', True):
+        data[CALLBACK_FIELD] = url
+
+
+def bind_callback(data: Dict[str, Any], response: Any, job_manager: Optional[JobManager] = None) -> None:
+    """
+    Bind the callback nonce of a sync=False request to its result URLs.
+
+    The job later submitted for those URLs accepts callbacks on that nonce
+    until it finishes. Requests without a callback URL are left alone.
+
+    Args:
+        data: Request body, as passed to add_callback
+        response: The request's response
+        job_manager: Manager the job will be submitted to; defaults to the
+            process-wide one
+    """
+    url = data.get(CALLBACK_FIELD)
+    if not url:
+        return
+    nonce = parse_qs(urlsplit(url).query).get("nonce", [""])[0]
+    urls = extract_result_urls(response)
+    if nonce and urls:
+        (job_manager or get_job_manager()).expect_callback_for(nonce, urls)
+
+
+def extract_result_urls(payload: Any) -> List[str]:
+    """
+    Collect the result URLs in a callback payload.
+
+    The payload is walked rather than parsed against a fixed schema, so
+    'urls', 'result_url' and nested 'result' lists are all found.
+    """
+    urls = []
+    if isinstance(payload, str):
+        if payload.startswith(("http://", "https://")):
+            urls.append(payload)
+    elif isinstance(payload, dict):
+        for key, value in payload.items():
+            if key != CALLBACK_FIELD:
+                urls.extend(extract_result_urls(value))
+    elif isinstance(payload, list):
+        for value in payload:
+            urls.extend(extract_result_urls(value))
+    return list(dict.fromkeys(urls))
+
+
+def _callback_failed(payload: Any) -> bool:
+    return isinstance(payload, dict) and str(payload.get('status', '')).lower() in FAILED_STATUSES
+
+
+class CallbackHandler(BaseHTTPRequestHandler):
+    """Handles completion callbacks; the server's job_manager receives them."""
+
+    server_version = "StencilCallback/1.0"
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        if url.path.rstrip("/") != CALLBACK_PATH:
+            self._reply(404, {"error": "not found"})
+            return
+        query = parse_qs(url.query)
+        nonce = query.get("nonce", [""])[0]
+        token = query.get("token", [""])[0]
+        if not nonce or not hmac.compare_digest(token, callback_token(nonce, self.server.secret)):
+            self._reply(403, {"error": "invalid token"})
+            return
+        if not self.server.job_manager.accepts_callback(nonce):
+            # Never bound to a job, or its job already finished
+            self._reply(410, {"error": "callback expired"})
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_CALLBACK_BYTES:
+            self._reply(413, {"error": "payload too large"})
+            return
+        try:
+            payload = json.loads(self.rfile.read(length) or b"null")
+        except ValueError:
+            self._reply(400, {"error": "invalid JSON"})
+            return
+
+        urls = extract_result_urls(payload)
+        failed = _callback_failed(payload)
+        updated = self.server.job_manager.report(urls, failed=failed, nonce=nonce)
+        log_event(logging.INFO, "bria.callback", urls=len(urls), failed=failed, jobs=len(updated))
+        self._reply(200, {"received": len(urls), "jobs_updated": len(updated)})
+
+    def do_GET(self) -> None:
+        # Health check for load balancers
+        if urlsplit(self.path).path.rstrip("/") == CALLBACK_PATH:
+            self._reply(200, {"status": "ok"})
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def _reply(self, status: int, body: Dict[str, Any]) -> None:
+        encoded = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # Requests are logged through log_event; keep stderr quiet
+        pass
+
+
+class CallbackServer(ThreadingHTTPServer):
+    """Threaded HTTP server feeding callbacks to a job manager."""
+
+    daemon_threads = True
+
+    def __init__(self, host: str, port: int, job_manager: JobManager, secret: str = CALLBACK_SECRET):
+        super().__init__((host, port), CallbackHandler)
+        self.job_manager = job_manager
+        self.secret = secret
+
+
+_server: Optional[CallbackServer] = None
+_server_lock = threading.Lock()
+
+
+def start_callback_server(
+    host: str = CALLBACK_HOST,
+    port: int = CALLBACK_PORT,
+    job_manager: Optional[JobManager] = None
+) -> Optional[CallbackServer]:
+    """
+    Start the process-wide callback server on a daemon thread.
+
+    Streamlit reruns the script on every interaction, so this is a no-op once
+    the server is running.
+
+    Args:
+        host: Interface to listen on
+        port: Port to listen on (0 picks a free one)
+        job_manager: Receives the callbacks; defaults to the process-wide one
+
+    Returns:
+        The running server, or None if it could not bind
+    """
+    global _server
+
+    if _server is None:
+        with _server_lock:
+            if _server is None:
+                try:
+                    server = CallbackServer(host, port, job_manager or get_job_manager())
+                except OSError as e:
+                    log_event(logging.ERROR, "bria.callback_server_failed", host=host, port=port, error=e)
+                    return None
+                threading.Thread(target=server.serve_forever, name="bria-callback-server", daemon=True).start()
+                log_event(logging.INFO, "bria.callback_server_started", host=host, port=server.server_address[1])
+                _server = server
+    return _server
+
+
+def post_callback(url: str, urls: List[str], status: str = "completed", timeout: float = 5) -> requests.Response:
+    """
+    Post a completion callback the way Bria does.
+
+    Used by the local stand-in below to exercise the endpoint without Bria.
+    """
+    return requests.post(url, json={"status": status, "result": [[result] for result in urls]}, timeout=timeout)
+
+
+if __name__ == "__main__":
+    # Local stand-in: submit a job whose URLs never become reachable, then
+    # deliver its completion by callback and check the job finishes at once
+    import time
+
+    manager = JobManager(job_timeout=30)
+    server = start_callback_server("127.0.0.1", 0, job_manager=manager)
+    url = f"http://127.0.0.1:{server.server_address[1]}{signed_callback_path()}"
+    other_url = f"http://127.0.0.1:{server.server_address[1]}{signed_callback_path()}"
+
+    done = threading.Event()
+    result_urls = [f"http://127.0.0.1:9/results/{index}.png" for index in range(2)]
+    bind_callback({CALLBACK_FIELD: url}, {"result": [[result] for result in result_urls]}, job_manager=manager)
+    job = manager.submit("stand-in", result_urls, "Stand-in job", on_update=lambda _: done.set())
+
+    rejected = requests.post(url.replace("token=", "token=wrong"), json={}, timeout=5)
+    print(f"Callback with a wrong token: {rejected.status_code}")
+    rejected = post_callback(other_url, result_urls)
+    print(f"Callback on a nonce issued for no job: {rejected.status_code}")
+
+    started = time.monotonic()
+    response = post_callback(url, result_urls)
+    print(f"Callback: {response.status_code} {response.json()}")
+    finished = done.wait(5)
+    print(f"Job {job.status} after {time.monotonic() - started:.2f}s with {len(job.ready_urls())} results"
+          if finished else "Job did not finish")
+    replayed = post_callback(url, result_urls)
+    print(f"Callback replayed after the job finished: {replayed.status_code}")
+    server.shutdown()
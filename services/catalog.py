@@ -0,0 +1,324 @@
+"""
+Headless catalog pipeline: packshots and shadows for a whole product directory.
+Catalog refreshes run to thousands of SKUs, which is not something to click
+through in the UI one file at a time. Products come from a directory or a
+CSV manifest, run through create_packshot and add_shadow (or any pipeline,
+see pipeline) with bounded concurrency, and their results stream into a
+local folder or Supabase storage while progress and per-item errors are
+reported.
+"""
+import concurrent.futures
+import csv
+from collections import Counter
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Any, Iterable, List, Optional
+
+from .bria_client import get_bria_session
+from .bria_logging import log_event
+from .deadline import CancellationToken
+from .pipeline import SOURCE, PipelineStep, parse_pipeline, pipeline_leaves, run_pipeline
+from .storage_service import list_file_names, upload_file
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+STEPS = ("packshot", "shadow")
+# Timeout for downloading a finished result
+DOWNLOAD_TIMEOUT = 60
+# Columns of the error report, which is also a valid manifest
+ERROR_FIELDS = ["path", "sku", "background_color", "error"]
+
+
+class CatalogItem:
+    """
+    One product to process.
+
+    Attributes:
+        path: Product image file
+        sku: SKU, used to name the output and sent to Bria
+        background_color: Packshot background in hex format or 'transparent'
+    """
+
+    def __init__(self, path: str, sku: Optional[str] = None, background_color: Optional[str] = None):
+        self.path = str(path)
+        self.sku = sku or Path(path).stem
+        self.background_color = background_color or "#FFFFFF"
+
+
+def scan_directory(directory: str, background_color: str = "#FFFFFF") -> List[CatalogItem]:
+    """
+    Every product image below a directory, in path order.
+
+    Products are named by file stem, by their path within the directory
+    where stems repeat across subfolders, and by that path plus extension
+    where one folder holds e.g. both foo.png and foo.jpg.
+    """
+    root = Path(directory)
+    paths = sorted(
+        path for path in root.rglob("*")
+        if path.is_file() and path.suffix.lower() in IMAGE_EXTENSIONS
+    )
+    stems = Counter(path.stem for path in paths)
+    relative = {path: "_".join(path.relative_to(root).with_suffix("").parts) for path in paths}
+    relative_counts = Counter(relative.values())
+
+    def sku(path: Path) -> str:
+        if stems[path.stem] == 1:
+            return path.stem
+        if relative_counts[relative[path]] == 1:
+            return relative[path]
+        return f"{relative[path]}_{path.suffix.lstrip('.').lower()}"
+
+    return [CatalogItem(str(path), sku(path), background_color) for path in paths]
+
+
+def load_manifest(manifest: str, background_color: str = "#FFFFFF") -> List[CatalogItem]:
+    """
+    Products listed in a CSV manifest.
+
+    The manifest has a header row with a 'path' (or 'file') column and
+    optional 'sku' and 'background_color' columns. Relative paths are
+    resolved against the manifest's folder.
+    """
+    base = Path(manifest).parent
+    items = []
+    with open(manifest, newline="", encoding="utf-8-sig") as handle:
+        for row in csv.DictReader(handle):
+            row = {key.strip().lower(): (value or "").strip() for key, value in row.items() if key}
+            path = row.get("path") or row.get("file")
+            if not path:
+                continue
+            if not os.path.isabs(path):
+                path = str(base / path)
+            items.append(CatalogItem(path, row.get("sku"), row.get("background_color") or background_color))
+    return items
+
+
+def load_catalog(source: str, background_color: str = "#FFFFFF") -> List[CatalogItem]:
+    """Products from a directory or a CSV manifest."""
+    if os.path.isdir(source):
+        return scan_directory(source, background_color)
+    return load_manifest(source, background_color)
+
+
+class LocalSink:
+    """Writes results into a local folder."""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def exists(self, name: str) -> bool:
+        return (self.directory / name).exists()
+
+    def write(self, name: str, data: bytes) -> str:
+        path = self.directory / name
+        # Write then rename, so an interrupted run never leaves a partial file to skip
+        partial = path.with_name(path.name + ".part")
+        partial.write_bytes(data)
+        os.replace(partial, path)
+        return str(path)
+
+
+class StorageSink:
+    """
+    Uploads results to Supabase storage under a prefix.
+
+    The prefix is listed once, on the first existence check, so a resumed
+    run skips what an interrupted one already uploaded.
+    """
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix.strip("/")
+        self._names: Optional[set] = None
+        self._lock = threading.Lock()
+
+    def exists(self, name: str) -> bool:
+        with self._lock:
+            if self._names is None:
+                listing = list_file_names(self.prefix)
+                if not listing["success"]:
+                    log_event(logging.WARNING, "bria.catalog_listing_failed", prefix=self.prefix,
+                              error=listing["message"])
+                self._names = listing["names"]
+            return name in self._names
+
+    def write(self, name: str, data: bytes) -> str:
+        result = upload_file(f"{self.prefix}/{name}", data)
+        if not result["success"]:
+            raise RuntimeError(result["message"])
+        with self._lock:
+            if self._names is not None:
+                self._names.add(name)
+        return result["url"]
+
+
+def catalog_pipeline(steps: Iterable[str] = STEPS) -> List[PipelineStep]:
+    """The linear pipeline for a list of catalog steps, e.g. packshot then shadow."""
+    steps = [step for step in STEPS if step in steps]
+    if not steps:
+        raise ValueError("No pipeline steps selected")
+    return parse_pipeline([{"name": step, "operation": step} for step in steps])
+
+
+def item_pipeline(pipeline: List[PipelineStep], item: CatalogItem) -> List[PipelineStep]:
+    """
+    A copy of the pipeline with the item's SKU and background colour filled in.
+
+    Params set in the pipeline itself win over the manifest.
+    """
+    steps = []
+    for step in pipeline:
+        params = dict(step.params)
+        if step.operation != "erase_foreground":
+            params.setdefault("sku", item.sku)
+        if step.operation == "packshot" or (step.operation == "shadow" and step.input == SOURCE):
+            params.setdefault("background_color", item.background_color)
+        steps.append(PipelineStep(step.name, step.operation, params, step.input))
+    return steps
+
+
+def output_names(item: CatalogItem, pipeline: List[PipelineStep]) -> Dict[str, str]:
+    """
+    File name of each of an item's results, by pipeline output step.
+
+    A single output is named after the SKU, several after the SKU and step.
+    SKUs are made safe for paths.
+    """
+    safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in item.sku) or "item"
+    leaves = pipeline_leaves(pipeline)
+    if len(leaves) == 1:
+        return {leaves[0].name: f"{safe}.png"}
+    return {leaf.name: f"{safe}_{leaf.name}.png" for leaf in leaves}
+
+
+def process_item(
+    item: CatalogItem,
+    api_key: str,
+    pipeline: List[PipelineStep],
+    cancel_token: Optional[CancellationToken] = None
+) -> Dict[str, bytes]:
+    """
+    Run one product through the pipeline.
+
+    Each step hands its result URL to the next, so intermediate images are
+    never downloaded; only the pipeline's outputs are.
+
+    Returns:
+        The output images by step name
+    """
+    with open(item.path, "rb") as handle:
+        image_data = handle.read()
+
+    results = run_pipeline(item_pipeline(pipeline, item), api_key, image_data=image_data, cancel_token=cancel_token)
+    images = {}
+    for leaf in pipeline_leaves(pipeline):
+        response = get_bria_session().get(results[leaf.name]["url"], timeout=DOWNLOAD_TIMEOUT)
+        response.raise_for_status()
+        images[leaf.name] = response.content
+    return images
+
+
+def run_catalog(
+    items: List[CatalogItem],
+    api_key: str,
+    sink: Any,
+    steps: Iterable[str] = STEPS,
+    pipeline: Optional[List[PipelineStep]] = None,
+    workers: int = 4,
+    skip_existing: bool = True,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    cancel_token: Optional[CancellationToken] = None
+) -> Dict[str, Any]:
+    """
+    Process a catalog with at most `workers` products in flight.
+
+    Args:
+        items: Products to process
+        api_key: Bria AI API key
+        sink: LocalSink or StorageSink receiving the results
+        steps: Pipeline steps, in order ('packshot', 'shadow')
+        pipeline: Custom pipeline run instead of steps (see pipeline.parse_pipeline)
+        workers: Products processed concurrently
+        skip_existing: Skip products whose result is already in the sink,
+            so an interrupted refresh can be resumed
+        on_progress: Called after each product with its outcome and the
+            running totals
+        cancel_token: Cancel it to stop submitting and abandon calls in flight
+
+    Returns:
+        Totals and the per-item errors
+    """
+    pipeline = pipeline or catalog_pipeline(steps)
+    totals = {"total": len(items), "done": 0, "ok": 0, "skipped": 0, "failed": 0, "cancelled": 0}
+    errors: List[Dict[str, str]] = []
+    lock = threading.Lock()
+    started = time.monotonic()
+
+    def run(item: CatalogItem) -> Dict[str, Any]:
+        names = output_names(item, pipeline)
+        item_started = time.monotonic()
+        outcome = {"path": item.path, "sku": item.sku, "background_color": item.background_color,
+                   "output": None, "error": None}
+        if cancel_token is not None and cancel_token.cancelled:
+            outcome["status"] = "cancelled"
+        elif skip_existing and all(sink.exists(name) for name in names.values()):
+            outcome["status"] = "skipped"
+        else:
+            try:
+                images = process_item(item, api_key, pipeline, cancel_token)
+                outcome["output"] = "; ".join(sink.write(names[step], image) for step, image in images.items())
+                outcome["status"] = "ok"
+            except Exception as e:
+                outcome["status"] = "failed"
+                outcome["error"] = f"{type(e).__name__}: {e}"
+        outcome["seconds"] = time.monotonic() - item_started
+
+        with lock:
+            totals["done"] += 1
+            totals[outcome["status"]] += 1
+            if outcome["status"] == "failed":
+                errors.append({key: outcome[key] for key in ERROR_FIELDS})
+            progress = dict(totals, item=outcome, elapsed=time.monotonic() - started)
+        if on_progress is not None:
+            on_progress(progress)
+        return outcome
+
+    log_event(logging.INFO, "bria.catalog_started", items=len(items),
+              steps=",".join(step.name for step in pipeline), workers=workers)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bria-catalog") as executor:
+        # Submitting lazily keeps thousands of items from queueing up front
+        pending = set()
+        for item in items:
+            if len(pending) >= workers * 2:
+                _, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            pending.add(executor.submit(run, item))
+        concurrent.futures.wait(pending)
+
+    totals["elapsed"] = time.monotonic() - started
+    log_event(logging.INFO, "bria.catalog_finished", **{k: v for k, v in totals.items() if k != "elapsed"})
+    return dict(totals, errors=errors)
+
+
+def write_error_report(errors: List[Dict[str, str]], path: str) -> None:
+    """Write per-item errors as CSV; the file doubles as a manifest for a retry run."""
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, fieldnames=ERROR_FIELDS)
+        writer.writeheader()
+        writer.writerows(errors)
+
+
+__all__ = [
+    'CatalogItem',
+    'scan_directory',
+    'load_manifest',
+    'load_catalog',
+    'LocalSink',
+    'StorageSink',
+    'catalog_pipeline',
+    'process_item',
+    'run_catalog',
+    'write_error_report',
+]
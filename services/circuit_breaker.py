@@ -0,0 +1,157 @@
+"""
+Circuit breakers for Bria endpoints.
+When an endpoint keeps timing out or failing with 5xx, its breaker opens and
+further calls fail immediately instead of tying up a thread for the full
+request time. After a cool-down a limited number of trial calls are let
+through (half-open); success closes the breaker, failure re-opens it.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Dict, Any
+
+from dotenv import load_dotenv
+
+from .errors import BriaCircuitOpenError
+from .bria_logging import log_event
+
+load_dotenv()
+
+# Consecutive failures that open a breaker
+FAILURE_THRESHOLD = int(os.getenv("BRIA_BREAKER_FAILURE_THRESHOLD", "5"))
+# Seconds an open breaker waits before allowing trial calls
+RECOVERY_TIMEOUT = float(os.getenv("BRIA_BREAKER_RECOVERY_TIMEOUT", "30"))
+# Concurrent trial calls allowed while half-open
+HALF_OPEN_MAX_CALLS = int(os.getenv("BRIA_BREAKER_HALF_OPEN_CALLS", "1"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with closed, open and half-open states."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        recovery_timeout: float = RECOVERY_TIMEOUT,
+        half_open_max_calls: int = HALF_OPEN_MAX_CALLS
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_calls = 0
+        self._lock = threading.Lock()
+
+    def retry_in(self) -> float:
+        """Seconds until an open breaker allows trial calls."""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.recovery_timeout - time.monotonic())
+
+    def check(self) -> None:
+        """Fail fast if the breaker is open, without taking a trial slot."""
+        with self._lock:
+            if self.state == OPEN and self.retry_in() > 0:
+                raise self._open_error()
+
+    def before_call(self) -> None:
+        """
+        Check whether a call may proceed.
+
+        Raises:
+            BriaCircuitOpenError: if the breaker is open, or half-open with
+                all trial slots taken
+        """
+        with self._lock:
+            if self.state == OPEN:
+                if self.retry_in() > 0:
+                    raise self._open_error()
+                self.state = HALF_OPEN
+                self._trial_calls = 0
+
+            if self.state == HALF_OPEN:
+                if self._trial_calls >= self.half_open_max_calls:
+                    raise self._open_error()
+                self._trial_calls += 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != CLOSED:
+                log_event(logging.INFO, "bria.breaker_closed", endpoint=self.name)
+            self.state = CLOSED
+            self.failures = 0
+            self._trial_calls = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    log_event(logging.WARNING, "bria.breaker_opened", endpoint=self.name,
+                              failures=self.failures)
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self._trial_calls = 0
+
+    def record_neutral(self) -> None:
+        """Release a half-open trial slot without judging the endpoint (e.g. a 4xx)."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._trial_calls = max(0, self._trial_calls - 1)
+
+    def _open_error(self) -> BriaCircuitOpenError:
+        retry_in = self.retry_in()
+        return BriaCircuitOpenError(
+            f"{self.name} is temporarily unavailable after repeated failures; "
+            f"retry in {retry_in:.0f}s.",
+            operation=self.name,
+            retry_after=retry_in
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current state, for display in the UI."""
+        with self._lock:
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "retry_in": self.retry_in(),
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(endpoint: str) -> CircuitBreaker:
+    """Get or create the circuit breaker for an endpoint."""
+    breaker = _breakers.get(endpoint)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(endpoint)
+            if breaker is None:
+                breaker = CircuitBreaker(endpoint)
+                _breakers[endpoint] = breaker
+    return breaker
+
+
+def get_breaker_states() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of every endpoint's breaker, for display in the UI."""
+    return {endpoint: breaker.snapshot() for endpoint, breaker in list(_breakers.items())}
+
+
+__all__ = [
+    'CLOSED',
+    'OPEN',
+    'HALF_OPEN',
+    'CircuitBreaker',
+    'get_breaker',
+    'get_breaker_states',
+]
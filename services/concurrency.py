@@ -0,0 +1,220 @@
+"""
+Adaptive (AIMD) concurrency limiting per Bria endpoint.
+Each endpoint gets its own limit on in-flight requests. The limit grows by
+roughly one per round trip while latency stays near the endpoint's baseline
+and is cut multiplicatively when latency rises or Bria answers 429, so slow
+endpoints (lifestyle shots) and fast ones (packshots) settle independently.
+"""
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Any, Optional
+
+from dotenv import load_dotenv
+
+from .errors import BriaError
+from .deadline import Deadline
+
+load_dotenv()
+
+INITIAL_LIMIT = float(os.getenv("BRIA_CONCURRENCY_INITIAL", "4"))
+MIN_LIMIT = float(os.getenv("BRIA_CONCURRENCY_MIN", "1"))
+MAX_LIMIT = float(os.getenv("BRIA_CONCURRENCY_MAX", "32"))
+
+# Latency above baseline * LATENCY_TOLERANCE counts as congestion
+LATENCY_TOLERANCE = float(os.getenv("BRIA_CONCURRENCY_LATENCY_TOLERANCE", "2.0"))
+# Multiplicative decrease factor applied on congestion
+BACKOFF_RATIO = float(os.getenv("BRIA_CONCURRENCY_BACKOFF_RATIO", "0.7"))
+# Longest a caller waits for a free slot before giving up
+ACQUIRE_TIMEOUT = float(os.getenv("BRIA_CONCURRENCY_ACQUIRE_TIMEOUT", "120"))
+
+# Smoothing for the latency averages
+_SHORT_ALPHA = 0.3
+_BASELINE_ALPHA = 0.05
+
+
+class AIMDLimiter:
+    """
+    Additive-increase / multiplicative-decrease limit on in-flight requests.
+
+    The baseline latency tracks the fastest typical response (it drops
+    immediately to faster samples and rises only slowly), so a sustained
+    rise in the short-term average signals queueing on Bria's side.
+    """
+
+    def __init__(
+        self,
+        initial_limit: float = INITIAL_LIMIT,
+        min_limit: float = MIN_LIMIT,
+        max_limit: float = MAX_LIMIT
+    ):
+        self.limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.in_flight = 0
+        self.baseline_latency: Optional[float] = None
+        self.recent_latency: Optional[float] = None
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def try_acquire(self) -> bool:
+        """Take a slot if one is free, without waiting."""
+        with self._cond:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self, timeout: Optional[float] = ACQUIRE_TIMEOUT) -> bool:
+        """Wait for a free slot. Returns False if the timeout expired."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            self.in_flight += 1
+            return True
+
+    def release(self, latency: Optional[float] = None, throttled: bool = False) -> None:
+        """
+        Free a slot and adjust the limit from the outcome of the request.
+
+        Args:
+            latency: Seconds the request took, or None if it failed without
+                a meaningful timing (e.g. connection error)
+            throttled: Whether Bria answered 429
+        """
+        with self._cond:
+            self.in_flight = max(0, self.in_flight - 1)
+
+            if throttled:
+                self._decrease()
+            elif latency is not None:
+                self._observe(latency)
+
+            self._cond.notify_all()
+
+    def _observe(self, latency: float) -> None:
+        if self.baseline_latency is None:
+            self.baseline_latency = self.recent_latency = latency
+            return
+
+        self.recent_latency += _SHORT_ALPHA * (latency - self.recent_latency)
+        if latency < self.baseline_latency:
+            self.baseline_latency = latency
+        else:
+            self.baseline_latency += _BASELINE_ALPHA * (latency - self.baseline_latency)
+
+        if self.recent_latency > self.baseline_latency * LATENCY_TOLERANCE:
+            self._decrease()
+        else:
+            # Roughly +1 per limit's worth of completed requests
+            self.limit = min(self.max_limit, self.limit + 1.0 / max(1.0, self.limit))
+
+    def _decrease(self) -> None:
+        # Cut at most once per baseline round trip so one burst of slow
+        # responses does not collapse the limit to the floor
+        now = time.monotonic()
+        if now - self._last_decrease < (self.baseline_latency or 0.0):
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * BACKOFF_RATIO)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current state, for display and debugging."""
+        with self._cond:
+            return {
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "baseline_latency": self.baseline_latency,
+                "recent_latency": self.recent_latency,
+            }
+
+
+_limiters: Dict[str, AIMDLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(endpoint: str) -> AIMDLimiter:
+    """Get or create the concurrency limiter for an endpoint."""
+    limiter = _limiters.get(endpoint)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(endpoint)
+            if limiter is None:
+                limiter = AIMDLimiter()
+                _limiters[endpoint] = limiter
+    return limiter
+
+
+def _wait_limit(timeout: Optional[float], deadline: Optional[Deadline]) -> float:
+    if timeout is None and deadline is not None:
+        timeout = deadline.remaining()
+    return ACQUIRE_TIMEOUT if timeout is None else min(ACQUIRE_TIMEOUT, timeout)
+
+
+def _timeout_error(endpoint: str, deadline: Optional[Deadline], operation: Optional[str]) -> BriaError:
+    if deadline is not None and deadline.expired():
+        # The wait used up the call's budget, not just the slot wait
+        return deadline.timeout_error(operation or endpoint)
+    return BriaError(
+        f"Timed out waiting for a free request slot for {endpoint}.",
+        operation=endpoint
+    )
+
+
+def acquire_slot(
+    endpoint: str,
+    timeout: Optional[float] = None,
+    deadline: Optional[Deadline] = None,
+    operation: Optional[str] = None
+) -> AIMDLimiter:
+    """
+    Block until a request slot for `endpoint` is free and take it.
+
+    Gives up after `timeout` seconds, or what is left of `deadline` (at most
+    ACQUIRE_TIMEOUT).
+
+    Raises:
+        BriaTimeoutError: If the wait used up the deadline
+        BriaError: If no slot came free within ACQUIRE_TIMEOUT
+    """
+    limiter = get_limiter(endpoint)
+    if not limiter.acquire(_wait_limit(timeout, deadline)):
+        raise _timeout_error(endpoint, deadline, operation)
+    return limiter
+
+
+async def acquire_slot_async(
+    endpoint: str,
+    timeout: Optional[float] = None,
+    deadline: Optional[Deadline] = None,
+    operation: Optional[str] = None
+) -> AIMDLimiter:
+    """Awaitable version of acquire_slot; polls without blocking the loop."""
+    limiter = get_limiter(endpoint)
+    give_up_at = time.monotonic() + _wait_limit(timeout, deadline)
+    delay = 0.01
+    while not limiter.try_acquire():
+        if time.monotonic() >= give_up_at:
+            raise _timeout_error(endpoint, deadline, operation)
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 0.25)
+    return limiter
+
+
+def get_concurrency_status() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of every endpoint's limiter, for display in the UI."""
+    return {endpoint: limiter.snapshot() for endpoint, limiter in list(_limiters.items())}
+
+
+__all__ = [
+    'AIMDLimiter',
+    'get_limiter',
+    'acquire_slot',
+    'acquire_slot_async',
+    'get_concurrency_status',
+]
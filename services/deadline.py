@@ -0,0 +1,142 @@
+"""
+Per-call deadlines and cooperative cancellation for Bria calls.
+Every call gets a total time budget (with per-endpoint defaults) from which
+the connect and read timeouts of each attempt are derived, so a stuck
+connection can no longer pin a Streamlit script thread. A CancellationToken
+lets the caller abandon an outstanding call, e.g. when the user clicks again
+or leaves the page.
+"""
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .errors import BriaTimeoutError, BriaCancelledError
+
+load_dotenv()
+
+# Total budget for endpoints without their own default
+DEFAULT_TIMEOUT = float(os.getenv("BRIA_TIMEOUT", "60"))
+# Longest a single attempt may spend establishing the connection
+CONNECT_TIMEOUT = float(os.getenv("BRIA_CONNECT_TIMEOUT", "5"))
+
+# Default total budget per endpoint, covering queueing, retries and backoff
+ENDPOINT_TIMEOUTS: Dict[str, float] = {
+    # Synchronous generation of up to four images
+    '/text-to-image/hd': 120.0,
+    '/product/lifestyle_shot_by_text': 120.0,
+    '/product/lifestyle_shot_by_image': 120.0,
+    '/gen_fill': 90.0,
+    '/product/packshot': 60.0,
+    '/product/shadow': 60.0,
+    '/erase_foreground': 60.0,
+    '/prompt_enhancer': 20.0,
+}
+
+
+def default_timeout(endpoint: str) -> float:
+    """Default total budget in seconds for an endpoint key."""
+    return ENDPOINT_TIMEOUTS.get(endpoint, DEFAULT_TIMEOUT)
+
+
+class Deadline:
+    """A point in time by which a call must finish."""
+
+    def __init__(self, budget: float):
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget
+
+    @classmethod
+    def for_endpoint(cls, endpoint: str, timeout: Optional[float] = None) -> "Deadline":
+        """Deadline from an explicit timeout, or the endpoint's default."""
+        return cls(timeout if timeout is not None else default_timeout(endpoint))
+
+    def remaining(self) -> float:
+        """Seconds left, never negative."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeouts(self) -> Tuple[float, float]:
+        """(connect, read) timeouts for the next attempt."""
+        remaining = self.remaining()
+        return min(CONNECT_TIMEOUT, remaining), remaining
+
+    def check(self, operation: str) -> None:
+        """Raise BriaTimeoutError if the deadline has passed."""
+        if self.expired():
+            raise self.timeout_error(operation)
+
+    def timeout_error(self, operation: str) -> BriaTimeoutError:
+        return BriaTimeoutError(
+            f"{operation} timed out after {self.budget:.0f}s.",
+            operation=operation
+        )
+
+
+class CancellationToken:
+    """
+    Thread-safe flag a caller sets to abandon a call.
+
+    Anything that can be interrupted registers a callback, which runs once
+    when the token is cancelled (immediately if it already was).
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def add_callback(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        """Sleep up to timeout seconds; returns True early if cancelled."""
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self, operation: str) -> None:
+        if self.cancelled:
+            raise cancelled_error(operation)
+
+
+def cancelled_error(operation: str) -> BriaCancelledError:
+    return BriaCancelledError(f"{operation} was cancelled.", operation=operation)
+
+
+__all__ = [
+    'DEFAULT_TIMEOUT',
+    'CONNECT_TIMEOUT',
+    'ENDPOINT_TIMEOUTS',
+    'default_timeout',
+    'Deadline',
+    'CancellationToken',
+    'cancelled_error',
+]
@@ -1,57 +1,60 @@
-from typing import Dict, Any, Optional
-import requests
-import base64
+from typing import Dict, Any, Optional, Tuple
+
+from .bria_client import bria_post
+from .bria_async import async_bria_post
+from .deadline import CancellationToken
+from .payload import add_image
+
+def _erase_foreground_request(
+    image_data: Optional[bytes],
+    image_url: Optional[str],
+    content_moderation: bool
+) -> Tuple[str, Dict[str, Any]]:
+    """Build the endpoint path and request body for an erase foreground call."""
+    # Prepare request data
+    data = {
+        'content_moderation': content_moderation
+    }
+
+    # Add image data
+    add_image(data, image_data, image_url, endpoint="/erase_foreground")
+
+    return "/erase_foreground", data
 
 def erase_foreground(
     api_key: str,
     image_data: bytes = None,
     image_url: str = None,
-    content_moderation: bool = False
+    content_moderation: bool = False,
+    timeout: Optional[float] = None,
+    cancel_token: Optional[CancellationToken] = None
 ) -> Dict[str, Any]:
     """
     Erase the foreground from an image and generate the area behind it.
-    
+
     Args:
         api_key: Bria AI API key
         image_data: Image data in bytes (optional if image_url provided)
         image_url: URL of the image (optional if image_data provided)
         content_moderation: Whether to enable content moderation
+        timeout: Total seconds the call may take, including retries
+            (defaults to the endpoint's budget)
+        cancel_token: Cancel it to abandon the call with BriaCancelledError
     """
-    url = "https://engine.prod.bria-api.com/v1/erase_foreground"
-    
-    headers = {
-        'api_token': api_key,
-        'Accept': 'application/json',
-        'Content-Type': 'application/json'
-    }
-    
-    # Prepare request data
-    data = {
-        'content_moderation': content_moderation
-    }
-    
-    # Add image data
-    if image_url:
-        data['image_url'] = image_url
-    elif image_data:
-        data['file'] = base64.b64encode(image_data).decode('utf-8')
-    else:
-        raise ValueError("Either image_data or image_url must be provided")
-    
-    try:
-        print(f"Making request to: {url}")
-        print(f"Headers: {headers}")
-        print(f"Data: {data}")
-        
-        response = requests.post(url, headers=headers, json=data)
-        response.raise_for_status()
-        
-        print(f"Response status: {response.status_code}")
-        print(f"Response body: {response.text}")
-        
-        return response.json()
-    except Exception as e:
-        raise Exception(f"Erase foreground failed: {str(e)}")
-
-# Export the function
-__all__ = ['erase_foreground'] 
\ No newline at end of file
+    path, data = _erase_foreground_request(image_data, image_url, content_moderation)
+    return bria_post(path, api_key, data, operation="Erase foreground", timeout=timeout, cancel_token=cancel_token)
+
+async def erase_foreground_async(
+    api_key: str,
+    image_data: bytes = None,
+    image_url: str = None,
+    content_moderation: bool = False,
+    timeout: Optional[float] = None,
+    cancel_token: Optional[CancellationToken] = None
+) -> Dict[str, Any]:
+    """Awaitable version of erase_foreground; takes the same arguments."""
+    path, data = _erase_foreground_request(image_data, image_url, content_moderation)
+    return await async_bria_post(path, api_key, data, operation="Erase foreground", timeout=timeout, cancel_token=cancel_token)
+
+# Export the functions
+__all__ = ['erase_foreground', 'erase_foreground_async']
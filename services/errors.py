@@ -0,0 +1,118 @@
+"""
+Typed exceptions raised by the Bria service layer.
+Lets callers react to specific failures (bad API key, content moderation,
+throttling) without string-matching on status codes in error messages.
+"""
+from typing import Optional
+
+
+class BriaError(Exception):
+    """Base class for all Bria API failures."""
+
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        operation: Optional[str] = None,
+        response_body: Optional[str] = None,
+        retry_after: Optional[float] = None
+    ):
+        super().__init__(message)
+        self.status_code = status_code
+        self.operation = operation
+        self.response_body = response_body
+        self.retry_after = retry_after
+
+
+class BriaAuthError(BriaError):
+    """The API key was rejected (401/403)."""
+
+
+class BriaContentModerationError(BriaError):
+    """Content moderation blocked the request (422)."""
+
+
+class BriaBadRequestError(BriaError):
+    """Any other non-retryable 4xx response."""
+
+
+class BriaRateLimitError(BriaError):
+    """Bria kept answering 429 until the retry policy gave up."""
+
+
+class BriaServerError(BriaError):
+    """Bria kept answering 5xx until the retry policy gave up."""
+
+
+class BriaConnectionError(BriaError):
+    """The connection failed or was reset until the retry policy gave up."""
+
+
+class BriaCircuitOpenError(BriaError):
+    """The endpoint's circuit breaker is open; the call was not attempted."""
+
+
+class BriaTimeoutError(BriaError):
+    """The call's deadline passed before Bria answered."""
+
+
+class BriaCancelledError(BriaError):
+    """The caller abandoned the call through its cancellation token."""
+
+
+def error_for_status(
+    status_code: int,
+    reason: str,
+    body: str,
+    operation: str,
+    retry_after: Optional[float] = None
+) -> BriaError:
+    """
+    Map an HTTP error response to the matching BriaError subclass.
+
+    Args:
+        status_code: HTTP status code
+        reason: HTTP reason phrase
+        body: Response body text (truncated in the message)
+        operation: Human readable name of the failed call
+        retry_after: Parsed Retry-After header, if any
+
+    Returns:
+        A BriaError instance (not raised)
+    """
+    snippet = (body or "")[:300]
+    message = f"{operation} failed: {status_code} {reason}: {snippet}"
+
+    if status_code in (401, 403):
+        error_cls = BriaAuthError
+    elif status_code == 422:
+        error_cls = BriaContentModerationError
+    elif status_code == 429:
+        error_cls = BriaRateLimitError
+    elif status_code >= 500:
+        error_cls = BriaServerError
+    else:
+        error_cls = BriaBadRequestError
+
+    return error_cls(
+        message,
+        status_code=status_code,
+        operation=operation,
+        response_body=body,
+        retry_after=retry_after
+    )
+
+
+__all__ = [
+    'BriaError',
+    'BriaAuthError',
+    'BriaContentModerationError',
+    'BriaBadRequestError',
+    'BriaRateLimitError',
+    'BriaServerError',
+    'BriaConnectionError',
+    'BriaCircuitOpenError',
+    'BriaTimeoutError',
+    'BriaCancelledError',
+    'error_for_status',
+]
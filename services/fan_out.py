@@ -0,0 +1,211 @@
+"""
+Fan-out of multi-result Bria requests.
+Endpoints cap how many results one request may ask for, and one request for
+several results takes about as long as its slowest result. Requests for more
+results than the endpoint allows are split into concurrent sub-requests,
+optionally below the limit too, and their results are merged back in
+sub-request order. Callers that show results progressively are handed each
+sub-request's response as soon as it arrives.
+"""
+import asyncio
+import concurrent.futures
+import copy
+import os
+from typing import Callable, Dict, Any, List, Optional
+
+from dotenv import load_dotenv
+
+from .bria_client import bria_post, endpoint_key
+from .bria_async import async_bria_post
+from .deadline import CancellationToken
+
+load_dotenv()
+
+# Most results one request may ask for, per endpoint key
+ENDPOINT_MAX_RESULTS: Dict[str, int] = {
+    '/text-to-image/hd': 4,
+    '/product/lifestyle_shot_by_text': 4,
+    '/product/lifestyle_shot_by_image': 4,
+}
+# Split requests into sub-requests of at most this many results even below
+# the endpoint limit (0 only splits above the limit)
+DEFAULT_RESULTS_PER_REQUEST = int(os.getenv("BRIA_FAN_OUT_RESULTS_PER_REQUEST", "0"))
+# Threads running the sub-requests of synchronous calls
+FAN_OUT_MAX_WORKERS = int(os.getenv("BRIA_FAN_OUT_MAX_WORKERS", "8"))
+
+_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=FAN_OUT_MAX_WORKERS, thread_name_prefix="bria-fan-out"
+)
+
+
+def plan_fan_out(path: str, num_results: int, results_per_request: Optional[int] = None) -> List[int]:
+    """
+    Split num_results into per-request result counts.
+
+    Results are spread evenly, so 5 results with a limit of 4 become [3, 2]
+    rather than [4, 1], and the sub-requests finish at about the same time.
+
+    Args:
+        path: Endpoint path
+        num_results: Total results wanted
+        results_per_request: Largest sub-request; defaults to
+            BRIA_FAN_OUT_RESULTS_PER_REQUEST, then the endpoint limit
+
+    Returns:
+        Result count for each sub-request
+    """
+    num_results = max(1, num_results)
+    limit = ENDPOINT_MAX_RESULTS.get(endpoint_key(path))
+    per_request = results_per_request or DEFAULT_RESULTS_PER_REQUEST or limit or num_results
+    if limit:
+        per_request = min(per_request, limit)
+    parts = -(-num_results // max(1, per_request))
+    base, extra = divmod(num_results, parts)
+    return [base + (1 if index < extra else 0) for index in range(parts)]
+
+
+def split_request(data: Dict[str, Any], counts: List[int]) -> List[Dict[str, Any]]:
+    """
+    Request bodies for each sub-request.
+
+    A seeded request gets seed + index per sub-request, so the parts are
+    different images yet the whole fan-out stays reproducible.
+    """
+    parts = []
+    for index, count in enumerate(counts):
+        part = dict(data, num_results=count)
+        if index and data.get('seed') is not None:
+            part['seed'] = data['seed'] + index
+        parts.append(part)
+    return parts
+
+
+def result_offsets(parts: List[Dict[str, Any]]) -> List[int]:
+    """Index of each sub-request's first result within the whole request."""
+    offsets, total = [], 0
+    for part in parts:
+        offsets.append(total)
+        total += part.get('num_results', 1)
+    return offsets
+
+
+def merge_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge sub-request responses in order.
+
+    List fields (e.g. 'result', 'urls') are concatenated; anything else is
+    taken from the first response.
+    """
+    merged = copy.copy(results[0])
+    for result in results[1:]:
+        for field, value in result.items():
+            if isinstance(value, list) and isinstance(merged.get(field), list):
+                merged[field] = merged[field] + value
+    return merged
+
+
+def fan_out_post(
+    path: str,
+    api_key: str,
+    data: Dict[str, Any],
+    operation: str = "Bria request",
+    results_per_request: Optional[int] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    on_part: Optional[Callable[[int, Dict[str, Any]], None]] = None,
+    **post_kwargs: Any
+) -> Dict[str, Any]:
+    """
+    POST a multi-result request, split into concurrent sub-requests.
+
+    Args:
+        path: Endpoint path
+        api_key: Bria AI API key
+        data: JSON request body including 'num_results'
+        operation: Human readable name used in error messages
+        results_per_request: Largest sub-request (see plan_fan_out)
+        cancel_token: Cancels every sub-request
+        on_part: Called in the calling thread with the index of a sub-request's
+            first result and its response, as each sub-request finishes
+        **post_kwargs: Passed on to bria_post for each sub-request
+
+    If a sub-request fails the rest are cancelled and its error is raised.
+
+    Returns:
+        Dict containing the merged API response
+    """
+    parts = split_request(data, plan_fan_out(path, data.get('num_results', 1), results_per_request))
+    if len(parts) == 1:
+        result = bria_post(path, api_key, parts[0], operation, cancel_token=cancel_token, **post_kwargs)
+        if on_part is not None:
+            on_part(0, result)
+        return result
+
+    # One token for all parts, so a failed part abandons the others
+    parts_token = CancellationToken()
+    if cancel_token is not None:
+        cancel_token.add_callback(parts_token.cancel)
+    futures = [
+        _executor.submit(bria_post, path, api_key, part, operation,
+                         cancel_token=parts_token, variant=index, **post_kwargs)
+        for index, part in enumerate(parts)
+    ]
+    offsets = dict(zip(futures, result_offsets(parts)))
+    try:
+        for future in concurrent.futures.as_completed(futures):
+            if future.exception() is not None:
+                parts_token.cancel()
+                raise future.exception()
+            if on_part is not None:
+                on_part(offsets[future], future.result())
+        return merge_results([future.result() for future in futures])
+    finally:
+        if cancel_token is not None:
+            cancel_token.remove_callback(parts_token.cancel)
+
+
+async def fan_out_post_async(
+    path: str,
+    api_key: str,
+    data: Dict[str, Any],
+    operation: str = "Bria request",
+    results_per_request: Optional[int] = None,
+    on_part: Optional[Callable[[int, Dict[str, Any]], None]] = None,
+    **post_kwargs: Any
+) -> Dict[str, Any]:
+    """Awaitable version of fan_out_post; takes the same arguments."""
+    parts = split_request(data, plan_fan_out(path, data.get('num_results', 1), results_per_request))
+    if len(parts) == 1:
+        result = await async_bria_post(path, api_key, parts[0], operation, **post_kwargs)
+        if on_part is not None:
+            on_part(0, result)
+        return result
+
+    tasks = [
+        asyncio.ensure_future(async_bria_post(path, api_key, part, operation, variant=index, **post_kwargs))
+        for index, part in enumerate(parts)
+    ]
+    offsets = dict(zip(tasks, result_offsets(parts)))
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    raise task.exception()
+                if on_part is not None:
+                    on_part(offsets[task], task.result())
+        return merge_results([task.result() for task in tasks])
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+__all__ = [
+    'ENDPOINT_MAX_RESULTS',
+    'plan_fan_out',
+    'split_request',
+    'result_offsets',
+    'merge_results',
+    'fan_out_post',
+    'fan_out_post_async',
+]
@@ -1,26 +1,75 @@
-from typing import Dict, Any, Optional
-import requests
-import base64
+from typing import Dict, Any, Optional, Tuple
+
+from .bria_client import bria_post
+from .bria_async import async_bria_post
+from .deadline import CancellationToken
+from .payload import add_image
+from .upload_optimizer import get_upload_profile, optimize_mask_pair
+from .callback_server import add_callback, bind_callback
+
+def _generative_fill_request(
+    image_data: Optional[bytes],
+    mask_data: Optional[bytes],
+    prompt: str,
+    negative_prompt: Optional[str],
+    num_results: int,
+    sync: bool,
+    seed: Optional[int],
+    content_moderation: bool,
+    mask_type: str,
+    image_url: Optional[str],
+    mask_url: Optional[str]
+) -> Tuple[str, Dict[str, Any]]:
+    """Build the endpoint path and request body for a generative fill call."""
+    # Prepare request data
+    data = {
+        'mask_type': mask_type,
+        'prompt': prompt,
+        'num_results': num_results,
+        'sync': sync,
+        'content_moderation': content_moderation
+    }
+
+    # Add image and mask; they must stay aligned, so uploads are only
+    # reoriented and downscaled as a pair
+    if image_data and mask_data and not image_url and not mask_url:
+        image_data, mask_data = optimize_mask_pair(image_data, mask_data, get_upload_profile("/gen_fill"),
+                                                   "/gen_fill file")
+    add_image(data, image_data, image_url, optimize=False)
+    add_image(data, mask_data, mask_url, field='mask_file', url_field='mask_url', optimize=False)
+
+    # Add optional parameters
+    if negative_prompt:
+        data['negative_prompt'] = negative_prompt
+    if seed is not None:
+        data['seed'] = seed
+    add_callback(data)
+
+    return "/gen_fill", data
 
 def generative_fill(
     api_key: str,
-    image_data: bytes,
-    mask_data: bytes,
+    image_data: Optional[bytes],
+    mask_data: Optional[bytes],
     prompt: str,
     negative_prompt: Optional[str] = None,
     num_results: int = 4,
     sync: bool = False,
     seed: Optional[int] = None,
     content_moderation: bool = False,
-    mask_type: str = "manual"
+    mask_type: str = "manual",
+    image_url: Optional[str] = None,
+    mask_url: Optional[str] = None,
+    timeout: Optional[float] = None,
+    cancel_token: Optional[CancellationToken] = None
 ) -> Dict[str, Any]:
     """
     Generate content in a masked area of an image using a text prompt.
-    
+
     Args:
         api_key: Bria AI API key
-        image_data: Image data in bytes
-        mask_data: Mask image data in bytes
+        image_data: Image data in bytes (may be None if image_url provided)
+        mask_data: Mask image data in bytes (may be None if mask_url provided)
         prompt: Description of what to generate in the masked area
         negative_prompt: Description of what to avoid (optional)
         num_results: Number of variations to generate (1-4)
@@ -28,47 +77,41 @@ def generative_fill(
         seed: Optional seed for reproducible results
         content_moderation: Whether to enable content moderation
         mask_type: Type of mask ('manual' or 'automatic')
+        image_url: URL of an already hosted image, sent instead of image_data
+        mask_url: URL of an already hosted mask, sent instead of mask_data
+        timeout: Total seconds the call may take, including retries
+            (defaults to the endpoint's budget)
+        cancel_token: Cancel it to abandon the call with BriaCancelledError
     """
-    url = "https://engine.prod.bria-api.com/v1/gen_fill"
-    
-    headers = {
-        'api_token': api_key,
-        'Accept': 'application/json',
-        'Content-Type': 'application/json'
-    }
-    
-    # Convert image and mask to base64
-    image_base64 = base64.b64encode(image_data).decode('utf-8')
-    mask_base64 = base64.b64encode(mask_data).decode('utf-8')
-    
-    # Prepare request data
-    data = {
-        'file': image_base64,
-        'mask_file': mask_base64,
-        'mask_type': mask_type,
-        'prompt': prompt,
-        'num_results': num_results,
-        'sync': sync,
-        'content_moderation': content_moderation
-    }
-    
-    # Add optional parameters
-    if negative_prompt:
-        data['negative_prompt'] = negative_prompt
-    if seed is not None:
-        data['seed'] = seed
-    
-    try:
-        print(f"Making request to: {url}")
-        print(f"Headers: {headers}")
-        print(f"Data: {data}")
-        
-        response = requests.post(url, headers=headers, json=data)
-        response.raise_for_status()
-        
-        print(f"Response status: {response.status_code}")
-        print(f"Response body: {response.text}")
-        
-        return response.json()
-    except Exception as e:
-        raise Exception(f"Generative fill failed: {str(e)}") 
\ No newline at end of file
+    path, data = _generative_fill_request(
+        image_data, mask_data, prompt, negative_prompt, num_results,
+        sync, seed, content_moderation, mask_type, image_url, mask_url
+    )
+    response = bria_post(path, api_key, data, operation="Generative fill", timeout=timeout, cancel_token=cancel_token)
+    bind_callback(data, response)
+    return response
+
+async def generative_fill_async(
+    api_key: str,
+    image_data: Optional[bytes],
+    mask_data: Optional[bytes],
+    prompt: str,
+    negative_prompt: Optional[str] = None,
+    num_results: int = 4,
+    sync: bool = False,
+    seed: Optional[int] = None,
+    content_moderation: bool = False,
+    mask_type: str = "manual",
+    image_url: Optional[str] = None,
+    mask_url: Optional[str] = None,
+    timeout: Optional[float] = None,
+    cancel_token: Optional[CancellationToken] = None
+) -> Dict[str, Any]:
+    """Awaitable version of generative_fill; takes the same arguments."""
+    path, data = _generative_fill_request(
+        image_data, mask_data, prompt, negative_prompt, num_results,
+        sync, seed, content_moderation, mask_type, image_url, mask_url
+    )
+    response = await async_bria_post(path, api_key, data, operation="Generative fill", timeout=timeout, cancel_token=cancel_token)
+    bind_callback(data, response)
+    return response
@@ -1,6 +1,59 @@
-from typing import Dict, Any, Optional, Union
-import requests
-import json
+from typing import Callable, Dict, Any, Optional, Tuple
+
+from .fan_out import fan_out_post, fan_out_post_async
+from .deadline import CancellationToken
+from .response_cache import use_cache
+from .hedging import use_hedging
+
+def _hd_image_request(
+    prompt: str,
+    model_version: str,
+    num_results: int,
+    aspect_ratio: str,
+    sync: bool,
+    seed: Optional[int],
+    negative_prompt: str,
+    steps_num: Optional[int],
+    text_guidance_scale: Optional[float],
+    medium: Optional[str],
+    prompt_enhancement: bool,
+    enhance_image: bool,
+    content_moderation: bool,
+    ip_signal: bool
+) -> Tuple[str, Dict[str, Any]]:
+    """Build the endpoint path and request body for a text-to-image call."""
+    if not prompt:
+        raise ValueError("Prompt is required for image generation")
+
+    # Build request data with only provided parameters
+    data = {
+        "prompt": prompt,
+        "num_results": max(1, num_results),
+        "sync": sync,
+        "negative_prompt": negative_prompt
+    }
+
+    # Add optional parameters only if they have valid values
+    if aspect_ratio:
+        data["aspect_ratio"] = aspect_ratio
+    if seed is not None:
+        data["seed"] = seed
+    if steps_num is not None:
+        data["steps_num"] = max(20, min(steps_num, 50))
+    if text_guidance_scale is not None:
+        data["text_guidance_scale"] = max(1.0, min(text_guidance_scale, 10.0))
+    if medium:
+        data["medium"] = medium
+    if prompt_enhancement:
+        data["prompt_enhancement"] = prompt_enhancement
+    if enhance_image:
+        data["enhance_image"] = enhance_image
+    if content_moderation:
+        data["content_moderation"] = content_moderation
+    if ip_signal:
+        data["ip_signal"] = ip_signal
+
+    return f"/text-to-image/hd/{model_version}", data
 
 def generate_hd_image(
     prompt: str,
@@ -17,15 +70,22 @@ def generate_hd_image(
     prompt_enhancement: bool = False,
     enhance_image: bool = False,
     content_moderation: bool = False,
-    ip_signal: bool = False
+    ip_signal: bool = False,
+    cache: Optional[bool] = None,
+    timeout: Optional[float] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    hedge: Optional[bool] = None,
+    results_per_request: Optional[int] = None,
+    on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None
 ) -> Dict[str, Any]:
     """Generate HD image from prompt using Bria's text-to-image API.
-    
+
     Args:
         prompt: The prompt to generate images from
         api_key: API key for authentication
         model_version: Model version to use (default: "2.2")
-        num_results: Number of images to generate (1-4)
+        num_results: Number of images to generate; more than 4 are requested
+            as concurrent sub-requests
         aspect_ratio: Image aspect ratio ("1:1", "2:3", "3:2", etc.)
         sync: Whether to wait for results or get URLs immediately
         seed: Optional seed for reproducible results
@@ -37,57 +97,63 @@ def generate_hd_image(
         enhance_image: Whether to enhance image quality
         content_moderation: Whether to enable content moderation
         ip_signal: Whether to flag potential IP content
+        cache: Reuse the response for an identical seeded request; ignored
+            without a seed (defaults to the BRIA_RESPONSE_CACHE setting)
+        timeout: Total seconds the call may take, including retries
+            (defaults to the endpoint's budget)
+        cancel_token: Cancel it to abandon the call with BriaCancelledError
+        hedge: Race a second identical request against a slow first one;
+            ignored without a seed (defaults to the BRIA_HEDGE_REQUESTS setting)
+        results_per_request: Split into concurrent sub-requests of at most this
+            many results even below the endpoint limit of 4; requests above
+            the limit are always split (defaults to
+            BRIA_FAN_OUT_RESULTS_PER_REQUEST)
+        on_result: Called with the index of a sub-request's first result and
+            its response as soon as each sub-request finishes, so results can
+            be shown before the slowest one arrives
     """
-    
-    if not prompt:
-        raise ValueError("Prompt is required for image generation")
-    
-    # Build request data with only provided parameters
-    data = {
-        "prompt": prompt,
-        "num_results": max(1, min(num_results, 4)),
-        "sync": sync,
-        "negative_prompt": negative_prompt
-    }
-    
-    # Add optional parameters only if they have valid values
-    if aspect_ratio:
-        data["aspect_ratio"] = aspect_ratio
-    if seed is not None:
-        data["seed"] = seed
-    if steps_num is not None:
-        data["steps_num"] = max(20, min(steps_num, 50))
-    if text_guidance_scale is not None:
-        data["text_guidance_scale"] = max(1.0, min(text_guidance_scale, 10.0))
-    if medium:
-        data["medium"] = medium
-    if prompt_enhancement:
-        data["prompt_enhancement"] = prompt_enhancement
-    if enhance_image:
-        data["enhance_image"] = enhance_image
-    if content_moderation:
-        data["content_moderation"] = content_moderation
-    if ip_signal:
-        data["ip_signal"] = ip_signal
-    
-    url = f"https://engine.prod.bria-api.com/v1/text-to-image/hd/{model_version}"
-    headers = {
-        'api_token': api_key,
-        'Accept': 'application/json',
-        'Content-Type': 'application/json'
-    }
-    
-    try:
-        print(f"Making request to: {url}")
-        print(f"Headers: {headers}")
-        
-        response = requests.post(url, headers=headers, json=data)
-        response.raise_for_status()
-        
-        print(f"Response status: {response.status_code}")
-        print(f"Response body: {response.text}")
-        
-        return response.json()
-        
-    except Exception as e:
-        raise Exception(f"HD image generation failed: {str(e)}") 
\ No newline at end of file
+    path, data = _hd_image_request(
+        prompt, model_version, num_results, aspect_ratio, sync, seed,
+        negative_prompt, steps_num, text_guidance_scale, medium,
+        prompt_enhancement, enhance_image, content_moderation, ip_signal
+    )
+    return fan_out_post(path, api_key, data, operation="HD image generation",
+                        cache=use_cache(cache) and seed is not None and sync,
+                        timeout=timeout, cancel_token=cancel_token,
+                        hedge=use_hedging(hedge) and seed is not None and sync,
+                        results_per_request=results_per_request, on_part=on_result)
+
+async def generate_hd_image_async(
+    prompt: str,
+    api_key: str,
+    model_version: str = "2.2",
+    num_results: int = 1,
+    aspect_ratio: str = "1:1",
+    sync: bool = True,
+    seed: Optional[int] = None,
+    negative_prompt: str = "",
+    steps_num: Optional[int] = None,
+    text_guidance_scale: Optional[float] = None,
+    medium: Optional[str] = None,
+    prompt_enhancement: bool = False,
+    enhance_image: bool = False,
+    content_moderation: bool = False,
+    ip_signal: bool = False,
+    cache: Optional[bool] = None,
+    timeout: Optional[float] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    hedge: Optional[bool] = None,
+    results_per_request: Optional[int] = None,
+    on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """Awaitable version of generate_hd_image; takes the same arguments."""
+    path, data = _hd_image_request(
+        prompt, model_version, num_results, aspect_ratio, sync, seed,
+        negative_prompt, steps_num, text_guidance_scale, medium,
+        prompt_enhancement, enhance_image, content_moderation, ip_signal
+    )
+    return await fan_out_post_async(path, api_key, data, operation="HD image generation",
+                                    cache=use_cache(cache) and seed is not None and sync,
+                                    timeout=timeout, cancel_token=cancel_token,
+                                    hedge=use_hedging(hedge) and seed is not None and sync,
+                                    results_per_request=results_per_request, on_part=on_result)
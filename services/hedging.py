@@ -0,0 +1,135 @@
+"""
+Hedged requests for idempotent Bria calls.
+Seeded generations, packshots and shadows give the same result when repeated,
+so when the first request has not answered within the endpoint's observed
+p95 latency a second, identical request is sent and whichever finishes first
+wins. This trims the latency tail at the cost of a few extra requests, which
+are capped at a fraction of hedgeable calls.
+"""
+import logging
+import os
+import threading
+from collections import deque
+from typing import Dict, Any, Optional
+
+from dotenv import load_dotenv
+
+from .bria_logging import log_event
+
+load_dotenv()
+
+# Hedge idempotent calls unless the caller says otherwise
+HEDGE_ENABLED_BY_DEFAULT = os.getenv("BRIA_HEDGE_REQUESTS", "false").lower() in ("1", "true", "yes")
+# Most hedges sent, as a fraction of hedgeable calls per endpoint
+HEDGE_MAX_RATE = float(os.getenv("BRIA_HEDGE_MAX_RATE", "0.1"))
+# Latency samples needed before the p95 is trusted enough to hedge on
+HEDGE_MIN_SAMPLES = int(os.getenv("BRIA_HEDGE_MIN_SAMPLES", "20"))
+# Latency samples kept per endpoint
+LATENCY_WINDOW = 200
+# Never hedge sooner than this, in seconds
+MIN_HEDGE_DELAY = 0.05
+
+
+class HedgeTracker:
+    """Per-endpoint latency window and hedge budget."""
+
+    def __init__(self, endpoint: str, max_rate: float = HEDGE_MAX_RATE):
+        self.endpoint = endpoint
+        self.max_rate = max_rate
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+
+    def record_latency(self, latency: float) -> None:
+        """Record the latency of a successful response."""
+        with self._lock:
+            self._latencies.append(latency)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Latency at the given fraction of the window, or None without enough samples."""
+        with self._lock:
+            if len(self._latencies) < HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def hedge_delay(self) -> Optional[float]:
+        """
+        Count a hedgeable call and return how long to wait before hedging it.
+
+        Returns:
+            Seconds to wait for the first request, or None if the endpoint has
+            too few samples to hedge on yet
+        """
+        with self._lock:
+            self.calls += 1
+        p95 = self.percentile(0.95)
+        if p95 is None:
+            return None
+        return max(MIN_HEDGE_DELAY, p95)
+
+    def can_hedge(self) -> bool:
+        """Whether another hedge stays within the hedge rate cap."""
+        with self._lock:
+            # One hedge of slack so the cap does not block the first slow call
+            return self.hedged < self.max_rate * self.calls + 1
+
+    def record_hedge(self) -> None:
+        with self._lock:
+            self.hedged += 1
+        log_event(logging.INFO, "bria.hedge", endpoint=self.endpoint)
+
+    def record_hedge_win(self) -> None:
+        with self._lock:
+            self.hedge_wins += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Hedge counts and latency percentiles, for display in the UI."""
+        p50, p95, p99 = self.percentile(0.5), self.percentile(0.95), self.percentile(0.99)
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "hedge_rate": self.hedged / self.calls if self.calls else 0.0,
+                "samples": len(self._latencies),
+                "p50": p50,
+                "p95": p95,
+                "p99": p99,
+            }
+
+
+_trackers: Dict[str, HedgeTracker] = {}
+_trackers_lock = threading.Lock()
+
+
+def get_hedge_tracker(endpoint: str) -> HedgeTracker:
+    """Get or create the hedge tracker for an endpoint."""
+    tracker = _trackers.get(endpoint)
+    if tracker is None:
+        with _trackers_lock:
+            tracker = _trackers.get(endpoint)
+            if tracker is None:
+                tracker = HedgeTracker(endpoint)
+                _trackers[endpoint] = tracker
+    return tracker
+
+
+def use_hedging(hedge: Optional[bool]) -> bool:
+    """Resolve a service function's `hedge` argument against the default."""
+    return HEDGE_ENABLED_BY_DEFAULT if hedge is None else hedge
+
+
+def get_hedge_stats() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of every endpoint's hedge tracker."""
+    return {endpoint: tracker.snapshot() for endpoint, tracker in list(_trackers.items())}
+
+
+__all__ = [
+    'HedgeTracker',
+    'get_hedge_tracker',
+    'use_hedging',
+    'get_hedge_stats',
+]
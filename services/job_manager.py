@@ -0,0 +1,334 @@
+"""
+Background manager for asynchronous Bria jobs.
+Requests made with sync=False answer straight away with the URLs their
+results will appear at. Instead of a Streamlit script thread sleeping and
+polling, pending jobs are registered here: one background thread probes
+their URLs (see readiness), keeps each session's job state, and notifies the
+session when a job finishes so it can pick up the results. When Bria calls
+back on completion (see callback_server) the job finishes straight away and
+probing only serves as a slow fallback for lost callbacks. Each callback URL
+carries a nonce that is bound to the job it was issued for and stops being
+accepted once that job finishes.
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .bria_logging import log_event
+from .readiness import ReadinessProber, get_readiness_prober
+
+load_dotenv()
+
+# Seconds after which a job stops being polled; results ready by then are kept
+JOB_TIMEOUT = float(os.getenv("BRIA_JOB_TIMEOUT", "300"))
+# Seconds a finished job is kept for a session that never collects it
+JOB_RETENTION = 3600
+# Longest the polling thread sleeps while jobs are pending, so expiry is noticed
+MAX_POLL_SLEEP = 5.0
+# Seconds before the URLs of a job expecting a callback are first probed
+CALLBACK_FALLBACK_DELAY = float(os.getenv("BRIA_CALLBACK_FALLBACK_DELAY", "60"))
+
+PENDING = "pending"
+READY = "ready"
+EXPIRED = "expired"
+CANCELLED = "cancelled"
+FAILED = "failed"
+
+
+class BriaJob:
+    """
+    An asynchronous Bria request whose results are still being rendered.
+
+    Attributes:
+        job_id: Unique id of the job
+        session_id: Session the job belongs to
+        label: What was requested, e.g. 'Lifestyle shot'
+        urls: Result URLs in the order Bria returned them
+        ready: The URLs that are available so far
+        status: PENDING, READY, EXPIRED, CANCELLED or FAILED
+    """
+
+    def __init__(self, session_id: str, urls: List[str], label: str = ""):
+        self.job_id = uuid.uuid4().hex
+        self.session_id = session_id
+        self.label = label
+        self.urls = list(urls)
+        self.ready: List[str] = []
+        self.status = PENDING
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.callback_nonce: Optional[str] = None
+        self.on_update: Optional[Callable[["BriaJob"], None]] = None
+
+    @property
+    def pending_urls(self) -> List[str]:
+        return [url for url in self.urls if url not in self.ready]
+
+    @property
+    def finished(self) -> bool:
+        return self.status != PENDING
+
+    def ready_urls(self) -> List[str]:
+        """Ready URLs in the order Bria returned them."""
+        return [url for url in self.urls if url in self.ready]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "label": self.label,
+            "status": self.status,
+            "urls": list(self.urls),
+            "ready": self.ready_urls(),
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    """Tracks pending Bria jobs per session and polls them off the script thread."""
+
+    def __init__(self, job_timeout: float = JOB_TIMEOUT, prober: Optional[ReadinessProber] = None):
+        self.job_timeout = job_timeout
+        self.prober = prober or get_readiness_prober()
+        self._jobs: Dict[str, Dict[str, BriaJob]] = {}
+        # Callback nonces by result URL, until their job is submitted
+        self._expected: Dict[str, Tuple[str, float]] = {}
+        # Jobs by the nonce of their callback URL, until they finish
+        self._callbacks: Dict[str, BriaJob] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(
+        self,
+        session_id: str,
+        urls: List[str],
+        label: str = "",
+        on_update: Optional[Callable[[BriaJob], None]] = None,
+        expect_callback: bool = False
+    ) -> BriaJob:
+        """
+        Start tracking a job.
+
+        Args:
+            session_id: Session the results belong to
+            urls: Result URLs returned by the sync=False request
+            label: What was requested, shown to the user
+            on_update: Called from a background thread when results arrive
+                and when the job finishes
+            expect_callback: Bria will call back on completion, so the URLs are
+                only probed after BRIA_CALLBACK_FALLBACK_DELAY. Implied when
+                the request's callback nonce was registered with
+                expect_callback_for
+
+        Returns:
+            The tracked job
+        """
+        job = BriaJob(session_id, urls, label)
+        job.on_update = on_update
+        with self._lock:
+            for url in job.urls:
+                nonce, _ = self._expected.pop(url, (None, None))
+                if nonce is not None and job.callback_nonce is None:
+                    job.callback_nonce = nonce
+                    self._callbacks[nonce] = job
+        expect_callback = expect_callback or job.callback_nonce is not None
+        self.prober.track(job.urls, CALLBACK_FALLBACK_DELAY if expect_callback else None)
+        with self._lock:
+            self._jobs.setdefault(session_id, {})[job.job_id] = job
+            self._ensure_thread()
+        self._wake.set()
+        log_event(logging.INFO, "bria.job_submitted", job=job.job_id, label=label, urls=len(job.urls))
+        return job
+
+    def expect_callback_for(self, nonce: str, urls: List[str]) -> None:
+        """
+        Bind a callback nonce to the job that will track these result URLs.
+
+        Call it once the sync=False request carrying the nonce has answered;
+        the job submitted for the URLs takes the nonce over. A nonce whose job
+        is never submitted is dropped after the job timeout.
+        """
+        issued_at = time.time()
+        with self._lock:
+            self._drop_unclaimed(issued_at)
+            for url in urls:
+                self._expected[url] = (nonce, issued_at)
+
+    def accepts_callback(self, nonce: str) -> bool:
+        """Whether a callback nonce belongs to a job that has not finished."""
+        with self._lock:
+            return nonce in self._callbacks
+
+    def jobs(self, session_id: str) -> List[BriaJob]:
+        """A session's jobs, oldest first."""
+        with self._lock:
+            return sorted(self._jobs.get(session_id, {}).values(), key=lambda job: job.created_at)
+
+    def pending(self, session_id: str) -> List[BriaJob]:
+        return [job for job in self.jobs(session_id) if not job.finished]
+
+    def collect(self, session_id: str) -> List[BriaJob]:
+        """Remove and return a session's finished jobs."""
+        with self._lock:
+            jobs = self._jobs.get(session_id, {})
+            finished = [job for job in jobs.values() if job.finished]
+            for job in finished:
+                del jobs[job.job_id]
+            if not jobs:
+                self._jobs.pop(session_id, None)
+        return sorted(finished, key=lambda job: job.created_at)
+
+    def cancel(self, session_id: str, job_id: Optional[str] = None) -> None:
+        """Stop polling one of a session's jobs, or all of them."""
+        with self._lock:
+            for job in self._jobs.get(session_id, {}).values():
+                if not job.finished and job_id in (None, job.job_id):
+                    self._finish(job, CANCELLED)
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="bria-job-manager", daemon=True)
+            self._thread.start()
+
+    def _drop_unclaimed(self, now: float) -> None:
+        for url, (_, issued_at) in list(self._expected.items()):
+            if now - issued_at > self.job_timeout:
+                del self._expected[url]
+
+    def _finish(self, job: BriaJob, status: str) -> None:
+        job.status = status
+        job.finished_at = time.time()
+        self.prober.forget(job.pending_urls)
+        # A finished job's callback URL is spent
+        self._callbacks.pop(job.callback_nonce, None)
+
+    def _notify(self, job: BriaJob) -> None:
+        log_event(logging.INFO, "bria.job_finished" if job.finished else "bria.job_progress",
+                  job=job.job_id, status=job.status, ready=len(job.ready), urls=len(job.urls))
+        if job.on_update is not None:
+            try:
+                job.on_update(job)
+            except Exception as e:
+                log_event(logging.WARNING, "bria.job_notify_failed", job=job.job_id, error=e)
+
+    def report(self, urls: List[str], failed: bool = False, nonce: Optional[str] = None) -> List[BriaJob]:
+        """
+        Record a completion reported by Bria rather than found by probing.
+
+        Args:
+            urls: Result URLs the report is about
+            failed: The results will never appear, so their jobs fail
+            nonce: Nonce of the callback URL the report arrived on; only the
+                unfinished job it is bound to is updated. Without one, any
+                job waiting for the URLs is
+
+        Returns:
+            The jobs the report finished or brought new results for
+        """
+        reported = set(urls)
+        updated = []
+        with self._lock:
+            if nonce is None:
+                candidates = [job for jobs in self._jobs.values() for job in jobs.values()]
+            else:
+                candidates = [self._callbacks[nonce]] if nonce in self._callbacks else []
+            for job in candidates:
+                if job.finished or not reported.intersection(job.pending_urls):
+                    continue
+                if failed:
+                    self._finish(job, FAILED)
+                else:
+                    job.ready.extend(url for url in job.pending_urls if url in reported)
+                    self.prober.forget(reported)
+                    if not job.pending_urls:
+                        self._finish(job, READY)
+                updated.append(job)
+        for job in updated:
+            self._notify(job)
+        return updated
+
+    def _run(self) -> None:
+        sleep = None
+        while True:
+            self._wake.wait(sleep)
+            self._wake.clear()
+            try:
+                sleep = self.poll_once()
+            except Exception as e:
+                log_event(logging.ERROR, "bria.job_poll_failed", error=e)
+                sleep = MAX_POLL_SLEEP
+
+    def poll_once(self) -> Optional[float]:
+        """
+        Probe the pending URLs that are due and notify sessions of finished jobs.
+
+        Returns:
+            Seconds until the next probe is due, or None with no pending jobs
+        """
+        now = time.time()
+        with self._lock:
+            pending = []
+            for session_id, jobs in list(self._jobs.items()):
+                for job in list(jobs.values()):
+                    if not job.finished:
+                        pending.append(job)
+                    elif now - job.finished_at > JOB_RETENTION:
+                        del jobs[job.job_id]
+                if not jobs:
+                    del self._jobs[session_id]
+            self._drop_unclaimed(now)
+
+        # Probe the URLs of all jobs in one concurrent round
+        ready = set(self.prober.probe([url for job in pending for url in job.pending_urls]))
+        for job in pending:
+            with self._lock:
+                if job.finished:
+                    continue
+                newly_ready = [url for url in job.pending_urls if url in ready]
+                job.ready.extend(newly_ready)
+                if not job.pending_urls:
+                    self._finish(job, READY)
+                elif now - job.created_at > self.job_timeout:
+                    self._finish(job, EXPIRED)
+                elif not newly_ready:
+                    continue
+            # Sessions hear about each result as it arrives, not only the last
+            self._notify(job)
+
+        still_pending = [url for job in pending if not job.finished for url in job.pending_urls]
+        if not still_pending:
+            return None
+        return min(MAX_POLL_SLEEP, self.prober.next_due_in(still_pending))
+
+
+_manager: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """Get or create the process-wide job manager."""
+    global _manager
+
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = JobManager()
+    return _manager
+
+
+__all__ = [
+    'PENDING',
+    'READY',
+    'EXPIRED',
+    'CANCELLED',
+    'FAILED',
+    'BriaJob',
+    'JobManager',
+    'get_job_manager',
+]
@@ -1,10 +1,142 @@
-from typing import Dict, Any, Optional, List
-import requests
-import base64
+from typing import Callable, Dict, Any, Optional, List, Tuple
+
+from .fan_out import fan_out_post, fan_out_post_async
+from .deadline import CancellationToken
+from .payload import add_image
+from .callback_server import add_callback, bind_callback
+
+def _add_placement_options(
+    data: Dict[str, Any],
+    placement_type: str,
+    shot_size: List[int],
+    manual_placement_selection: List[str],
+    padding_values: List[int],
+    foreground_image_size: Optional[List[int]],
+    foreground_image_location: Optional[List[int]],
+    sku: Optional[str]
+) -> None:
+    """Add the placement-dependent fields shared by both lifestyle endpoints."""
+    if placement_type in ['automatic', 'manual_placement', 'custom_coordinates']:
+        data['shot_size'] = shot_size
+
+    if placement_type == 'manual_placement':
+        data['manual_placement_selection'] = manual_placement_selection
+
+    if placement_type == 'manual_padding':
+        data['padding_values'] = padding_values
+
+    if placement_type == 'custom_coordinates':
+        if foreground_image_size:
+            data['foreground_image_size'] = foreground_image_size
+        if foreground_image_location:
+            data['foreground_image_location'] = foreground_image_location
+
+    if sku:
+        data['sku'] = sku
+
+def _lifestyle_by_text_request(
+    image_data: Optional[bytes],
+    scene_description: str,
+    placement_type: str,
+    num_results: int,
+    sync: bool,
+    fast: bool,
+    optimize_description: bool,
+    original_quality: bool,
+    exclude_elements: Optional[str],
+    shot_size: List[int],
+    manual_placement_selection: List[str],
+    padding_values: List[int],
+    foreground_image_size: Optional[List[int]],
+    foreground_image_location: Optional[List[int]],
+    force_rmbg: bool,
+    content_moderation: bool,
+    sku: Optional[str],
+    image_url: Optional[str]
+) -> Tuple[str, Dict[str, Any]]:
+    """Build the endpoint path and request body for a lifestyle shot by text."""
+    # Prepare request data
+    data = {
+        'scene_description': scene_description,
+        'placement_type': placement_type,
+        'num_results': num_results,
+        'sync': sync,
+        'fast': fast,
+        'optimize_description': optimize_description,
+        'original_quality': original_quality,
+        'force_rmbg': force_rmbg,
+        'content_moderation': content_moderation
+    }
+
+    # Add image data; original_quality sends the upload untouched
+    add_image(data, image_data, image_url, endpoint="/product/lifestyle_shot_by_text",
+              optimize=not original_quality)
+
+    # Add optional parameters
+    if exclude_elements and not fast:
+        data['exclude_elements'] = exclude_elements
+
+    _add_placement_options(
+        data, placement_type, shot_size, manual_placement_selection,
+        padding_values, foreground_image_size, foreground_image_location, sku
+    )
+
+    add_callback(data)
+
+    return "/product/lifestyle_shot_by_text", data
+
+def _lifestyle_by_image_request(
+    image_data: Optional[bytes],
+    reference_image: Optional[bytes],
+    placement_type: str,
+    num_results: int,
+    sync: bool,
+    original_quality: bool,
+    shot_size: List[int],
+    manual_placement_selection: List[str],
+    padding_values: List[int],
+    foreground_image_size: Optional[List[int]],
+    foreground_image_location: Optional[List[int]],
+    force_rmbg: bool,
+    content_moderation: bool,
+    sku: Optional[str],
+    enhance_ref_image: bool,
+    ref_image_influence: float,
+    image_url: Optional[str],
+    ref_image_url: Optional[str]
+) -> Tuple[str, Dict[str, Any]]:
+    """Build the endpoint path and request body for a lifestyle shot by image."""
+    # Prepare request data
+    data = {
+        'placement_type': placement_type,
+        'num_results': num_results,
+        'sync': sync,
+        'original_quality': original_quality,
+        'force_rmbg': force_rmbg,
+        'content_moderation': content_moderation,
+        'enhance_ref_image': enhance_ref_image,
+        'ref_image_influence': ref_image_influence
+    }
+
+    # Add product and reference images; original_quality sends them untouched
+    add_image(data, image_data, image_url, endpoint="/product/lifestyle_shot_by_image",
+              optimize=not original_quality)
+    add_image(data, reference_image, ref_image_url, field='ref_image_file', url_field='ref_image_url',
+              endpoint="/product/lifestyle_shot_by_image", optimize=not original_quality)
+
+    # Add optional parameters
+    _add_placement_options(
+        data, placement_type, shot_size, manual_placement_selection,
+        padding_values, foreground_image_size, foreground_image_location, sku
+    )
+
+    add_callback(data)
+
+    return "/product/lifestyle_shot_by_image", data
 
 def lifestyle_shot_by_text(
     api_key: str,
-    image_data: bytes,
+    image_data: Optional[bytes],
     scene_description: str,
     placement_type: str = "original",
     num_results: int = 4,
@@ -20,17 +152,23 @@ def lifestyle_shot_by_text(
     foreground_image_location: Optional[List[int]] = None,
     force_rmbg: bool = False,
     content_moderation: bool = False,
-    sku: Optional[str] = None
+    sku: Optional[str] = None,
+    image_url: Optional[str] = None,
+    timeout: Optional[float] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    results_per_request: Optional[int] = None,
+    on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None
 ) -> Dict[str, Any]:
     """
     Generate a lifestyle shot using text description.
-    
+
     Args:
         api_key: Bria AI API key
-        image_data: Image data in bytes
+        image_data: Image data in bytes (may be None if image_url provided)
         scene_description: Text description of the new scene
         placement_type: How to position the product ("original", "automatic", "manual_placement", "manual_padding", "custom_coordinates")
-        num_results: Number of results to generate
+        num_results: Number of results to generate; more than 4 are requested
+            as concurrent sub-requests
         sync: Whether to wait for results
         fast: Whether to use fast mode
         optimize_description: Whether to optimize the scene description
@@ -44,73 +182,74 @@ def lifestyle_shot_by_text(
         force_rmbg: Whether to force background removal
         content_moderation: Whether to enable content moderation
         sku: Optional SKU identifier
+        image_url: URL of an already hosted image, sent instead of image_data
+        timeout: Total seconds the call may take, including retries
+            (defaults to the endpoint's budget)
+        cancel_token: Cancel it to abandon the call with BriaCancelledError
+        results_per_request: Split into concurrent sub-requests of at most this
+            many results even below the endpoint limit of 4; requests above
+            the limit are always split (defaults to
+            BRIA_FAN_OUT_RESULTS_PER_REQUEST)
+        on_result: Called with the index of a sub-request's first result and
+            its response as soon as each sub-request finishes, so results can
+            be shown before the slowest one arrives
     """
-    url = "https://engine.prod.bria-api.com/v1/product/lifestyle_shot_by_text"
-    
-    headers = {
-        'api_token': api_key,
-        'Accept': 'application/json',
-        'Content-Type': 'application/json'
-    }
-    
-    # Convert image to base64
-    image_base64 = base64.b64encode(image_data).decode('utf-8')
-    
-    # Prepare request data
-    data = {
-        'file': image_base64,
-        'scene_description': scene_description,
-        'placement_type': placement_type,
-        'num_results': num_results,
-        'sync': sync,
-        'fast': fast,
-        'optimize_description': optimize_description,
-        'original_quality': original_quality,
-        'force_rmbg': force_rmbg,
-        'content_moderation': content_moderation
-    }
-    
-    # Add optional parameters
-    if exclude_elements and not fast:
-        data['exclude_elements'] = exclude_elements
-    
-    if placement_type in ['automatic', 'manual_placement', 'custom_coordinates']:
-        data['shot_size'] = shot_size
-    
-    if placement_type == 'manual_placement':
-        data['manual_placement_selection'] = manual_placement_selection
-    
-    if placement_type == 'manual_padding':
-        data['padding_values'] = padding_values
-    
-    if placement_type == 'custom_coordinates':
-        if foreground_image_size:
-            data['foreground_image_size'] = foreground_image_size
-        if foreground_image_location:
-            data['foreground_image_location'] = foreground_image_location
-    
-    if sku:
-        data['sku'] = sku
-    
-    try:
-        print(f"Making request to: {url}")
-        print(f"Headers: {headers}")
-        print(f"Data: {data}")
-        
-        response = requests.post(url, headers=headers, json=data)
-        response.raise_for_status()
-        
-        print(f"Response status: {response.status_code}")
-        print(f"Response body: {response.text}")
-        
-        return response.json()
-    except Exception as e:
-        raise Exception(f"Lifestyle shot generation failed: {str(e)}")
+    path, data = _lifestyle_by_text_request(
+        image_data, scene_description, placement_type, num_results, sync,
+        fast, optimize_description, original_quality, exclude_elements,
+        shot_size, manual_placement_selection, padding_values,
+        foreground_image_size, foreground_image_location, force_rmbg,
+        content_moderation, sku, image_url
+    )
+    response = fan_out_post(path, api_key, data, operation="Lifestyle shot generation",
+                            results_per_request=results_per_request, timeout=timeout, cancel_token=cancel_token,
+                            on_part=on_result)
+    bind_callback(data, response)
+    return response
+
+async def lifestyle_shot_by_text_async(
+    api_key: str,
+    image_data: Optional[bytes],
+    scene_description: str,
+    placement_type: str = "original",
+    num_results: int = 4,
+    sync: bool = False,
+    fast: bool = True,
+    optimize_description: bool = True,
+    original_quality: bool = False,
+    exclude_elements: Optional[str] = None,
+    shot_size: List[int] = [1000, 1000],
+    manual_placement_selection: List[str] = ["upper_left"],
+    padding_values: List[int] = [0, 0, 0, 0],
+    foreground_image_size: Optional[List[int]] = None,
+    foreground_image_location: Optional[List[int]] = None,
+    force_rmbg: bool = False,
+    content_moderation: bool = False,
+    sku: Optional[str] = None,
+    image_url: Optional[str] = None,
+    timeout: Optional[float] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    results_per_request: Optional[int] = None,
+    on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """Awaitable version of lifestyle_shot_by_text; takes the same arguments."""
+    path, data = _lifestyle_by_text_request(
+        image_data, scene_description, placement_type, num_results, sync,
+        fast, optimize_description, original_quality, exclude_elements,
+        shot_size, manual_placement_selection, padding_values,
+        foreground_image_size, foreground_image_location, force_rmbg,
+        content_moderation, sku, image_url
+    )
+    response = await fan_out_post_async(path, api_key, data, operation="Lifestyle shot generation",
+                                        results_per_request=results_per_request, timeout=timeout,
+                                        cancel_token=cancel_token, on_part=on_result)
+    bind_callback(data, response)
+    return response
 
 def lifestyle_shot_by_image(
     api_key: str,
-    image_data: bytes,
-    reference_image: bytes,
+    image_data: Optional[bytes],
+    reference_image: Optional[bytes],
     placement_type: str = "original",
     num_results: int = 4,
     sync: bool = False,
@@ -124,67 +263,69 @@ def lifestyle_shot_by_image(
     content_moderation: bool = False,
     sku: Optional[str] = None,
     enhance_ref_image: bool = True,
-    ref_image_influence: float = 1.0
+    ref_image_influence: float = 1.0,
+    image_url: Optional[str] = None,
+    ref_image_url: Optional[str] = None,
+    timeout: Optional[float] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    results_per_request: Optional[int] = None,
+    on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None
 ) -> Dict[str, Any]:
     """
     Generate a lifestyle shot using a reference image.
+
+    Takes the same placement options as lifestyle_shot_by_text. Pass
+    image_url and/or ref_image_url instead of image_data/reference_image
+    for images that are already hosted.
     """
-    url = "https://engine.prod.bria-api.com/v1/product/lifestyle_shot_by_image"
-    
-    headers = {
-        'api_token': api_key,
-        'Accept': 'application/json',
-        'Content-Type': 'application/json'
-    }
-    
-    # Convert images to base64
-    image_base64 = base64.b64encode(image_data).decode('utf-8')
-    reference_base64 = base64.b64encode(reference_image).decode('utf-8')
-    
-    # Prepare request data
-    data = {
-        'file': image_base64,
-        'ref_image_file': reference_base64,
-        'placement_type': placement_type,
-        'num_results': num_results,
-        'sync': sync,
-        'original_quality': original_quality,
-        'force_rmbg': force_rmbg,
-        'content_moderation': content_moderation,
-        'enhance_ref_image': enhance_ref_image,
-        'ref_image_influence': ref_image_influence
-    }
-    
-    # Add optional parameters
-    if placement_type in ['automatic', 'manual_placement', 'custom_coordinates']:
-        data['shot_size'] = shot_size
-    
-    if placement_type == 'manual_placement':
-        data['manual_placement_selection'] = manual_placement_selection
-    
-    if placement_type == 'manual_padding':
-        data['padding_values'] = padding_values
-    
-    if placement_type == 'custom_coordinates':
-        if foreground_image_size:
-            data['foreground_image_size'] = foreground_image_size
-        if foreground_image_location:
-            data['foreground_image_location'] = foreground_image_location
-    
-    if sku:
-        data['sku'] = sku
-    
-    try:
-        print(f"Making request to: {url}")
-        print(f"Headers: {headers}")
-        print(f"Data: {data}")
-        
-        response = requests.post(url, headers=headers, json=data)
-        response.raise_for_status()
-        
-        print(f"Response status: {response.status_code}")
-        print(f"Response body: {response.text}")
-        
-        return response.json()
-    except Exception as e:
-        raise Exception(f"Lifestyle shot generation failed: {str(e)}") 
\ No newline at end of file
+    path, data = _lifestyle_by_image_request(
+        image_data, reference_image, placement_type, num_results, sync,
+        original_quality, shot_size, manual_placement_selection,
+        padding_values, foreground_image_size, foreground_image_location,
+        force_rmbg, content_moderation, sku, enhance_ref_image,
+        ref_image_influence, image_url, ref_image_url
+    )
+    response = fan_out_post(path, api_key, data, operation="Lifestyle shot generation",
+                            results_per_request=results_per_request, timeout=timeout, cancel_token=cancel_token,
+                            on_part=on_result)
+    bind_callback(data, response)
+    return response
+
+async def lifestyle_shot_by_image_async(
+    api_key: str,
+    image_data: Optional[bytes],
+    reference_image: Optional[bytes],
+    placement_type: str = "original",
+    num_results: int = 4,
+    sync: bool = False,
+    original_quality: bool = False,
+    shot_size: List[int] = [1000, 1000],
+    manual_placement_selection: List[str] = ["upper_left"],
+    padding_values: List[int] = [0, 0, 0, 0],
+    foreground_image_size: Optional[List[int]] = None,
+    foreground_image_location: Optional[List[int]] = None,
+    force_rmbg: bool = False,
+    content_moderation: bool = False,
+    sku: Optional[str] = None,
+    enhance_ref_image: bool = True,
+    ref_image_influence: float = 1.0,
+    image_url: Optional[str] = None,
+    ref_image_url: Optional[str] = None,
+    timeout: Optional[float] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    results_per_request: Optional[int] = None,
+    on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """Awaitable version of lifestyle_shot_by_image; takes the same arguments."""
+    path, data = _lifestyle_by_image_request(
+        image_data, reference_image, placement_type, num_results, sync,
+        original_quality, shot_size, manual_placement_selection,
+        padding_values, foreground_image_size, foreground_image_location,
+        force_rmbg, content_moderation, sku, enhance_ref_image,
+        ref_image_influence, image_url, ref_image_url
+    )
+    response = await fan_out_post_async(path, api_key, data, operation="Lifestyle shot generation",
+                                        results_per_request=results_per_request, timeout=timeout,
+                                        cancel_token=cancel_token, on_part=on_result)
+    bind_callback(data, response)
+    return response
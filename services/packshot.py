@@ -1,63 +1,90 @@
-from typing import Dict, Any
-import requests
-import base64
+from typing import Dict, Any, Optional, Tuple
+
+from .bria_client import bria_post
+from .bria_async import async_bria_post
+from .deadline import CancellationToken
+from .payload import add_image
+from .response_cache import use_cache
+from .hedging import use_hedging
+
+def _packshot_request(
+    image_data: Optional[bytes],
+    image_url: Optional[str],
+    background_color: str,
+    sku: str,
+    force_rmbg: bool,
+    content_moderation: bool
+) -> Tuple[str, Dict[str, Any]]:
+    """Build the endpoint path and request body for a packshot call."""
+    # Prepare request data
+    data = {
+        'background_color': background_color,
+        'force_rmbg': force_rmbg,
+        'content_moderation': content_moderation
+    }
+
+    # Add image data
+    add_image(data, image_data, image_url, endpoint="/product/packshot")
+
+    # Add optional SKU if provided
+    if sku:
+        data['sku'] = sku
+
+    return "/product/packshot", data
 
 def create_packshot(
     api_key: str,
-    image_data: bytes,
+    image_data: Optional[bytes] = None,
     background_color: str = "#FFFFFF",
     sku: str = None,
     force_rmbg: bool = False,
-    content_moderation: bool = False
+    content_moderation: bool = False,
+    cache: Optional[bool] = None,
+    image_url: Optional[str] = None,
+    timeout: Optional[float] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    hedge: Optional[bool] = None
 ) -> Dict[str, Any]:
     """
     Create a professional packshot from a product image.
-    
+
     Args:
         api_key: Bria AI API key
-        image_data: Image data in bytes
+        image_data: Image data in bytes (optional if image_url provided)
         background_color: Background color in hex format or 'transparent'
         sku: Optional SKU identifier for the product
         force_rmbg: Whether to force background removal even if alpha channel exists
         content_moderation: Whether to enable content moderation
-    
+        cache: Reuse the response for identical image bytes and settings
+            (defaults to the BRIA_RESPONSE_CACHE setting)
+        image_url: URL of an already hosted image, sent instead of image_data
+        timeout: Total seconds the call may take, including retries
+            (defaults to the endpoint's budget)
+        cancel_token: Cancel it to abandon the call with BriaCancelledError
+        hedge: Race a second identical request against a slow first one
+            (defaults to the BRIA_HEDGE_REQUESTS setting)
+
     Returns:
         Dict containing the API response
     """
-    url = "https://engine.prod.bria-api.com/v1/product/packshot"
-    
-    headers = {
-        'api_token': api_key,
-        'Accept': 'application/json',
-        'Content-Type': 'application/json'
-    }
-    
-    # Convert image data to base64
-    image_base64 = base64.b64encode(image_data).decode('utf-8')
-    
-    # Prepare request data
-    data = {
-        'file': image_base64,
-        'background_color': background_color,
-        'force_rmbg': force_rmbg,
-        'content_moderation': content_moderation
-    }
-    
-    # Add optional SKU if provided
-    if sku:
-        data['sku'] = sku
-    
-    try:
-        print(f"Making request to: {url}")
-        print(f"Headers: {headers}")
-        print(f"Data keys: {list(data.keys())}")
-        
-        response = requests.post(url, headers=headers, json=data)
-        response.raise_for_status()
-        
-        print(f"Response status: {response.status_code}")
-        print(f"Response body: {response.text}")
-        
-        return response.json()
-    except Exception as e:
-        raise Exception(f"Packshot creation failed: {str(e)}") 
\ No newline at end of file
+    path, data = _packshot_request(image_data, image_url, background_color, sku, force_rmbg, content_moderation)
+    return bria_post(path, api_key, data, operation="Packshot creation", cache=use_cache(cache),
+                     timeout=timeout, cancel_token=cancel_token, hedge=use_hedging(hedge))
+
+async def create_packshot_async(
+    api_key: str,
+    image_data: Optional[bytes] = None,
+    background_color: str = "#FFFFFF",
+    sku: str = None,
+    force_rmbg: bool = False,
+    content_moderation: bool = False,
+    cache: Optional[bool] = None,
+    image_url: Optional[str] = None,
+    timeout: Optional[float] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    hedge: Optional[bool] = None
+) -> Dict[str, Any]:
+    """Awaitable version of create_packshot; takes the same arguments."""
+    path, data = _packshot_request(image_data, image_url, background_color, sku, force_rmbg, content_moderation)
+    return await async_bria_post(path, api_key, data, operation="Packshot creation", cache=use_cache(cache),
+                                  timeout=timeout, cancel_token=cancel_token, hedge=use_hedging(hedge))
@@ -0,0 +1,305 @@
+"""
+Request payload helpers for Bria calls.
+Images are optimized per endpoint (see upload_optimizer) before encoding.
+Trying several options on one upload sends the same multi-MB image again and
+again, so base64 encodings are kept in a small bounded cache keyed by a
+digest of the image bytes. Encodings stay as ASCII bytes and are spliced
+straight into the JSON body, so no extra `str` copy is ever made.
+
+Images too large to be worth caching are not encoded up front at all: the
+request body streams their base64 in chunks while it is being sent, so peak
+memory per request stays close to the size of the input image.
+"""
+import base64
+import hashlib
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional, Union
+
+from dotenv import load_dotenv
+
+from .upload_optimizer import UploadProfile, get_upload_profile, optimize_upload
+
+load_dotenv()
+
+# Total size of base64 encodings kept for reuse (0 disables the cache)
+ENCODING_CACHE_BYTES = int(os.getenv("BRIA_ENCODING_CACHE_BYTES", str(64 * 1024 * 1024)))
+# Images larger than this (after optimization) are base64-encoded while the
+# request body is sent instead of up front, and are not cached
+STREAM_THRESHOLD_BYTES = int(os.getenv("BRIA_STREAM_THRESHOLD_BYTES", str(4 * 1024 * 1024)))
+# Size of the base64 chunks written to the socket; a multiple of 4
+STREAM_CHUNK_BYTES = 256 * 1024
+
+
+class ImageBlob(ABC):
+    """
+    An image payload used as a request field value; serialized as a JSON
+    string holding its base64 encoding.
+
+    Attributes:
+        digest: Identifies the image content (and optimization profile)
+    """
+    __slots__ = ('digest',)
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Length of the base64 encoding."""
+
+    @abstractmethod
+    def iter_encoded(self, chunk_size: int = STREAM_CHUNK_BYTES) -> Iterator[bytes]:
+        """Yield the base64 encoding in chunks of about chunk_size bytes."""
+
+    def __str__(self) -> str:
+        return b"".join(self.iter_encoded()).decode('ascii')
+
+    def __repr__(self) -> str:
+        return f"<base64 {len(self)} bytes sha256:{self.digest[:12]}>"
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, ImageBlob) and other.digest == self.digest
+
+    def __hash__(self) -> int:
+        return hash(self.digest)
+
+
+class EncodedBlob(ImageBlob):
+    """
+    An image payload already base64-encoded (and held by the encoding cache).
+
+    Attributes:
+        encoded: The base64 encoding as ASCII bytes
+    """
+    __slots__ = ('encoded',)
+
+    def __init__(self, encoded: bytes, digest: str):
+        self.encoded = encoded
+        self.digest = digest
+
+    def __len__(self) -> int:
+        return len(self.encoded)
+
+    def iter_encoded(self, chunk_size: int = STREAM_CHUNK_BYTES) -> Iterator[bytes]:
+        view = memoryview(self.encoded)
+        for start in range(0, len(view), chunk_size):
+            yield bytes(view[start:start + chunk_size])
+
+
+class StreamedBlob(ImageBlob):
+    """
+    An image payload that is base64-encoded chunk by chunk as it is sent.
+
+    Attributes:
+        raw: The image bytes
+    """
+    __slots__ = ('raw',)
+
+    def __init__(self, raw: bytes, digest: str):
+        self.raw = raw
+        self.digest = digest
+
+    def __len__(self) -> int:
+        return (len(self.raw) + 2) // 3 * 4
+
+    def iter_encoded(self, chunk_size: int = STREAM_CHUNK_BYTES) -> Iterator[bytes]:
+        # Whole 3-byte groups per chunk, so chunks concatenate without padding
+        step = max(3, chunk_size // 4 * 3)
+        view = memoryview(self.raw)
+        for start in range(0, len(view), step):
+            yield base64.b64encode(view[start:start + step])
+
+
+class EncodingCache:
+    """Thread-safe LRU of base64 encodings bounded by total encoded size."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def encode(
+        self,
+        image_data: bytes,
+        profile: Optional[UploadProfile] = None,
+        label: str = "Upload"
+    ) -> ImageBlob:
+        """
+        Return the base64 encoding of image_data, reusing a cached one.
+
+        With a profile the image is optimized first; the cached encoding is
+        then the optimized one, so repeat calls skip that work too. Images
+        over STREAM_THRESHOLD_BYTES come back as a StreamedBlob instead.
+        """
+        digest = hashlib.sha256(image_data).hexdigest()
+        if profile is not None:
+            digest = f"{digest}:{profile.key}"
+        with self._lock:
+            encoded = self._entries.get(digest)
+            if encoded is not None:
+                self._entries.move_to_end(digest)
+                self.hits += 1
+                return EncodedBlob(encoded, digest)
+            self.misses += 1
+
+        if profile is not None:
+            image_data = optimize_upload(image_data, profile, label)
+        if len(image_data) > STREAM_THRESHOLD_BYTES:
+            return StreamedBlob(image_data, digest)
+        encoded = base64.b64encode(image_data)
+        if len(encoded) <= self.max_bytes:
+            with self._lock:
+                if digest not in self._entries:
+                    self._entries[digest] = encoded
+                    self.size += len(encoded)
+                while self.size > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self.size -= len(evicted)
+        return EncodedBlob(encoded, digest)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self.size,
+            }
+
+
+_encoding_cache = EncodingCache(ENCODING_CACHE_BYTES)
+
+
+def encode_image(
+    image_data: bytes,
+    profile: Optional[UploadProfile] = None,
+    label: str = "Upload"
+) -> ImageBlob:
+    """
+    Base64-encode image bytes for a Bria request field.
+
+    Args:
+        image_data: Raw image bytes
+        profile: Optional upload profile to optimize the image with first
+        label: Name used in log output
+
+    Returns:
+        ImageBlob to place in the request data dict
+    """
+    return _encoding_cache.encode(image_data, profile, label)
+
+
+def add_image(
+    data: Dict[str, Any],
+    image_data: Optional[bytes],
+    image_url: Optional[str],
+    field: str = 'file',
+    url_field: str = 'image_url',
+    endpoint: Optional[str] = None,
+    optimize: bool = True
+) -> None:
+    """
+    Add an image to a request data dict, preferring a hosted URL.
+
+    Bria fetches URL inputs itself, so images that are already hosted (an
+    earlier Bria result, a Supabase public URL) never pass through us.
+
+    Args:
+        data: Request data dict to update
+        image_data: Raw image bytes, used when no URL is given
+        image_url: Publicly reachable URL of the image
+        field: Request field for the base64 payload
+        url_field: Request field for the URL
+        endpoint: Endpoint path, used to look up the field's upload profile
+        optimize: Set to False to send the bytes exactly as given
+
+    Raises:
+        ValueError: if neither image_data nor image_url is given
+    """
+    if image_url:
+        data[url_field] = image_url
+    elif image_data:
+        profile = get_upload_profile(endpoint, field) if endpoint and optimize else None
+        data[field] = encode_image(image_data, profile, f"{endpoint or 'Upload'} {field}")
+    else:
+        raise ValueError(f"Either image data or {url_field} must be provided")
+
+
+def get_encoding_cache() -> EncodingCache:
+    """Return the process-wide base64 encoding cache."""
+    return _encoding_cache
+
+
+class JSONBody:
+    """
+    A JSON request body whose image fields are streamed.
+
+    The JSON envelope is serialized up front; image fields are written by
+    iterating their blobs' base64 chunks, so the full body is never held in
+    memory. Iterable any number of times (once per retry), with a known
+    length so it is sent with Content-Length rather than chunked.
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        plain = {field: value for field, value in data.items() if not isinstance(value, ImageBlob)}
+        envelope = json.dumps(plain).encode('utf-8')
+        self._parts: List[Union[bytes, ImageBlob]] = [envelope[:-1]]
+        separator = b", " if plain else b""
+        for field, value in data.items():
+            if isinstance(value, ImageBlob):
+                self._parts.append(separator + json.dumps(field).encode('utf-8') + b': "')
+                self._parts.append(value)
+                self._parts.append(b'"')
+                separator = b", "
+        self._parts.append(b"}")
+        self._length = sum(len(part) for part in self._parts)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[bytes]:
+        for part in self._parts:
+            if isinstance(part, ImageBlob):
+                yield from part.iter_encoded()
+            else:
+                yield part
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        for chunk in self:
+            yield chunk
+
+
+def encode_json_body(data: Dict[str, Any]) -> Union[bytes, JSONBody]:
+    """
+    Serialize a request data dict to a JSON body.
+
+    Bodies without image fields are returned as bytes. Otherwise a JSONBody
+    is returned that streams the ImageBlob values as JSON strings; base64
+    needs no escaping, so the bytes sent are the same as json.dumps with
+    the encodings as `str` values.
+    """
+    if not any(isinstance(value, ImageBlob) for value in data.values()):
+        return json.dumps(data).encode('utf-8')
+    return JSONBody(data)
+
+
+__all__ = [
+    'ImageBlob',
+    'EncodedBlob',
+    'StreamedBlob',
+    'JSONBody',
+    'EncodingCache',
+    'encode_image',
+    'add_image',
+    'get_encoding_cache',
+    'encode_json_body',
+]
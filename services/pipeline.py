@@ -0,0 +1,250 @@
+"""
+Declarative multi-step pipelines of Bria operations.
+Running packshot, then shadow, then a lifestyle shot by hand means
+downloading each result and uploading it again for the next step. A
+pipeline instead hands each step's result URL straight to the steps that
+consume it through their image_url parameter, so intermediate images never
+pass through the app. Steps whose inputs are ready run concurrently, so
+branches (e.g. two shadow variants of one packshot) do not wait for each
+other.
+
+A pipeline is a list of steps such as:
+
+    [
+        {"name": "packshot", "operation": "packshot", "params": {"background_color": "#FFFFFF"}},
+        {"name": "natural", "operation": "shadow", "input": "packshot", "params": {"shadow_type": "regular"}},
+        {"name": "floating", "operation": "shadow", "input": "packshot", "params": {"shadow_type": "float"}},
+    ]
+
+A step without an "input" consumes the step listed before it; the first
+step, or one with "input": "source", consumes the pipeline's source image.
+"""
+import concurrent.futures
+import logging
+import os
+import time
+from typing import Callable, Dict, Any, List, Optional
+
+from dotenv import load_dotenv
+
+from .bria_logging import log_event
+from .deadline import CancellationToken
+from .errors import BriaError
+from .packshot import create_packshot
+from .shadow import add_shadow
+from .lifestyle_shot import lifestyle_shot_by_text, lifestyle_shot_by_image
+from .erase_foreground import erase_foreground
+
+load_dotenv()
+
+# Threads running pipeline steps, shared by all pipelines in the process
+PIPELINE_MAX_WORKERS = int(os.getenv("BRIA_PIPELINE_MAX_WORKERS", "8"))
+
+SOURCE = "source"
+
+# Operations a step may name; each takes image_data/image_url plus its params
+OPERATIONS: Dict[str, Callable[..., Dict[str, Any]]] = {
+    "packshot": create_packshot,
+    "shadow": add_shadow,
+    "lifestyle_text": lifestyle_shot_by_text,
+    "lifestyle_image": lifestyle_shot_by_image,
+    "erase_foreground": erase_foreground,
+}
+# Params every call of an operation needs; lifestyle shots must be sync so
+# their URL is ready to hand on
+OPERATION_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    "lifestyle_text": {"sync": True, "num_results": 1},
+    "lifestyle_image": {"sync": True, "num_results": 1, "reference_image": None},
+}
+
+_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=PIPELINE_MAX_WORKERS, thread_name_prefix="bria-pipeline"
+)
+
+
+class PipelineStep:
+    """
+    One operation in a pipeline.
+
+    Attributes:
+        name: Unique name other steps refer to
+        operation: Key of OPERATIONS
+        params: Keyword arguments for the operation
+        input: Name of the step whose result this step consumes, or SOURCE
+    """
+
+    def __init__(self, name: str, operation: str, params: Optional[Dict[str, Any]] = None, input: str = SOURCE):
+        self.name = name
+        self.operation = operation
+        self.params = dict(params or {})
+        self.input = input
+
+
+def parse_pipeline(spec: List[Dict[str, Any]]) -> List[PipelineStep]:
+    """
+    Build and validate pipeline steps from their declarative form.
+
+    Steps may only consume the source or a step listed before them, which
+    keeps every pipeline acyclic.
+
+    Raises:
+        ValueError: For unknown operations, duplicate names or unknown inputs
+    """
+    steps: List[PipelineStep] = []
+    names = set()
+    for index, entry in enumerate(spec):
+        operation = entry.get("operation")
+        if operation not in OPERATIONS:
+            raise ValueError(f"Step {index + 1}: unknown operation '{operation}' "
+                             f"(choose from {', '.join(OPERATIONS)})")
+        name = entry.get("name") or f"{operation}_{index + 1}"
+        if name in names or name == SOURCE:
+            raise ValueError(f"Step {index + 1}: duplicate step name '{name}'")
+        default_input = steps[-1].name if steps else SOURCE
+        step_input = entry.get("input") or default_input
+        if step_input != SOURCE and step_input not in names:
+            raise ValueError(f"Step '{name}': input '{step_input}' is not an earlier step")
+        names.add(name)
+        steps.append(PipelineStep(name, operation, entry.get("params"), step_input))
+    if not steps:
+        raise ValueError("A pipeline needs at least one step")
+    return steps
+
+
+def pipeline_leaves(steps: List[PipelineStep]) -> List[PipelineStep]:
+    """Steps no other step consumes, i.e. the pipeline's outputs."""
+    consumed = {step.input for step in steps}
+    return [step for step in steps if step.name not in consumed]
+
+
+def result_urls(response: Any) -> List[str]:
+    """
+    The result URLs of a Bria response, in order.
+
+    Handles 'result_url', 'result_urls' and 'urls' keys as well as 'result'
+    lists of {'urls': [...]} items or [url, seed, uuid] entries.
+    """
+    urls = []
+    if not isinstance(response, dict):
+        return urls
+    if response.get("result_url"):
+        urls.append(response["result_url"])
+    elif response.get("result_urls"):
+        urls.extend(response["result_urls"])
+    elif response.get("urls"):
+        urls.extend(response["urls"])
+    elif isinstance(response.get("result"), list):
+        for item in response["result"]:
+            if isinstance(item, dict) and item.get("urls"):
+                urls.extend(item["urls"])
+            elif isinstance(item, list) and item:
+                # [url, seed, uuid] entries carry one image each
+                urls.append(item[0])
+    return [url for url in urls if isinstance(url, str)]
+
+
+def result_url(response: Dict[str, Any]) -> str:
+    """The first result URL of a Bria response."""
+    urls = result_urls(response)
+    if not urls:
+        raise BriaError(f"No result URL in response: {response}")
+    return urls[0]
+
+
+def run_step(
+    step: PipelineStep,
+    api_key: str,
+    image_data: Optional[bytes] = None,
+    image_url: Optional[str] = None,
+    cancel_token: Optional[CancellationToken] = None
+) -> Dict[str, Any]:
+    """
+    Run one step on an image.
+
+    Returns:
+        Dict with the step's 'url' (handed on to consumers), all its
+        'urls', the raw 'response' and the 'seconds' it took
+    """
+    started = time.monotonic()
+    params = dict(OPERATION_DEFAULTS.get(step.operation, {}), **step.params)
+    response = OPERATIONS[step.operation](
+        api_key=api_key, image_data=image_data, image_url=image_url,
+        cancel_token=cancel_token, **params
+    )
+    urls = result_urls(response)
+    if not urls:
+        raise BriaError(f"{step.name}: no result URL in response: {response}")
+    return {"url": urls[0], "urls": urls, "response": response, "seconds": time.monotonic() - started}
+
+
+def run_pipeline(
+    steps: List[PipelineStep],
+    api_key: str,
+    image_data: Optional[bytes] = None,
+    image_url: Optional[str] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    on_step: Optional[Callable[[PipelineStep, Dict[str, Any]], None]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Run a pipeline, each step as soon as its input is ready.
+
+    Args:
+        steps: Steps from parse_pipeline
+        api_key: Bria AI API key
+        image_data: Source image bytes (sent once per step consuming the source)
+        image_url: URL of an already hosted source image, used instead
+        cancel_token: Cancels every step in flight
+        on_step: Called in the calling thread as each step finishes, with the
+            step and its result (see run_step)
+
+    If a step fails, the steps in flight are cancelled and its error is raised.
+
+    Returns:
+        Results by step name
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    waiting = list(steps)
+    running: Dict[concurrent.futures.Future, PipelineStep] = {}
+    # One token for all steps, so a failed step abandons its siblings
+    steps_token = CancellationToken()
+    if cancel_token is not None:
+        cancel_token.add_callback(steps_token.cancel)
+
+    try:
+        while waiting or running:
+            for step in [step for step in waiting if step.input == SOURCE or step.input in results]:
+                waiting.remove(step)
+                if step.input == SOURCE:
+                    source_data, source_url = image_data, image_url
+                else:
+                    source_data, source_url = None, results[step.input]["url"]
+                running[_executor.submit(run_step, step, api_key, source_data, source_url, steps_token)] = step
+
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                step = running.pop(future)
+                if future.exception() is not None:
+                    steps_token.cancel()
+                    log_event(logging.WARNING, "bria.pipeline_step_failed", step=step.name, error=future.exception())
+                    raise future.exception()
+                results[step.name] = future.result()
+                log_event(logging.INFO, "bria.pipeline_step", step=step.name, operation=step.operation,
+                          seconds=round(results[step.name]["seconds"], 2))
+                if on_step is not None:
+                    on_step(step, results[step.name])
+        return results
+    finally:
+        if cancel_token is not None:
+            cancel_token.remove_callback(steps_token.cancel)
+
+
+__all__ = [
+    'OPERATIONS',
+    'PipelineStep',
+    'parse_pipeline',
+    'pipeline_leaves',
+    'result_urls',
+    'result_url',
+    'run_step',
+    'run_pipeline',
+]
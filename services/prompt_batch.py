@@ -0,0 +1,203 @@
+"""
+Batch text-to-image generation from a file of prompts.
+A campaign can need hundreds of prompt variants, and one blocking
+generation per prompt makes that an afternoon of waiting. A CSV or JSONL
+file of prompts, each with optional style, aspect ratio, seed and negative
+prompt, runs through generate_hd_image concurrently; the shared rate and
+concurrency limiters keep the batch within Bria's limits, and results are
+handed to the caller as each prompt finishes.
+"""
+import concurrent.futures
+import csv
+import io
+import json
+import logging
+import os
+from typing import Callable, Dict, Any, List, Optional
+
+from .bria_logging import log_event
+from .deadline import CancellationToken
+from .hd_image_generation import generate_hd_image
+from .pipeline import result_urls
+
+# Fields a prompt entry may set; anything else is ignored
+PROMPT_FIELDS = ("prompt", "style", "aspect_ratio", "seed", "negative_prompt")
+DEFAULT_STYLE = "Realistic"
+
+
+class PromptSpec:
+    """
+    One prompt of a batch.
+
+    Attributes:
+        prompt: Text prompt
+        style: Style name as in the Generate Image tab, e.g. 'Watercolor'
+        aspect_ratio: Overrides the batch's aspect ratio
+        seed: Seed for a reproducible result
+        negative_prompt: Elements to exclude
+    """
+
+    def __init__(
+        self,
+        prompt: str,
+        style: Optional[str] = None,
+        aspect_ratio: Optional[str] = None,
+        seed: Optional[int] = None,
+        negative_prompt: Optional[str] = None
+    ):
+        self.prompt = prompt
+        self.style = style or DEFAULT_STYLE
+        self.aspect_ratio = aspect_ratio or None
+        self.seed = seed
+        self.negative_prompt = negative_prompt or ""
+
+    def styled_prompt(self) -> str:
+        """The prompt with its style appended, as the Generate Image tab does."""
+        if self.style and self.style != DEFAULT_STYLE:
+            return f"{self.prompt}, in {self.style.lower()} style"
+        return self.prompt
+
+    def medium(self) -> str:
+        return "photography" if self.style == DEFAULT_STYLE else "art"
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in PROMPT_FIELDS}
+
+
+def _spec_from_row(row: Dict[str, Any], line: int) -> Optional[PromptSpec]:
+    row = {str(key).strip().lower(): value for key, value in row.items() if key is not None}
+    prompt = str(row.get("prompt") or "").strip()
+    if not prompt:
+        return None
+    seed = row.get("seed")
+    if seed in ("", None):
+        seed = None
+    else:
+        try:
+            seed = int(seed)
+        except (TypeError, ValueError):
+            raise ValueError(f"Line {line}: seed must be a whole number, got {seed!r}")
+    return PromptSpec(
+        prompt,
+        style=str(row.get("style") or "").strip() or None,
+        aspect_ratio=str(row.get("aspect_ratio") or "").strip() or None,
+        seed=seed,
+        negative_prompt=str(row.get("negative_prompt") or "").strip() or None
+    )
+
+
+def parse_prompts(text: str, format: Optional[str] = None) -> List[PromptSpec]:
+    """
+    Parse a prompt file.
+
+    Args:
+        text: File content
+        format: 'csv' or 'jsonl'; guessed from the content when omitted. A
+            CSV needs a header row with a 'prompt' column; a JSONL line may
+            also be a bare JSON string
+
+    Returns:
+        The prompts in file order; rows without a prompt are skipped
+
+    Raises:
+        ValueError: For malformed lines
+    """
+    text = text.lstrip("\ufeff")
+    if format is None:
+        format = "jsonl" if text.lstrip().startswith(("{", '"')) else "csv"
+
+    specs = []
+    if format == "jsonl":
+        for line, raw in enumerate(text.splitlines(), 1):
+            if not raw.strip():
+                continue
+            try:
+                entry = json.loads(raw)
+            except ValueError as e:
+                raise ValueError(f"Line {line}: invalid JSON ({e})")
+            spec = _spec_from_row({"prompt": entry} if isinstance(entry, str) else entry, line)
+            if spec:
+                specs.append(spec)
+    else:
+        for line, row in enumerate(csv.DictReader(io.StringIO(text)), 2):
+            spec = _spec_from_row(row, line)
+            if spec:
+                specs.append(spec)
+    return specs
+
+
+def load_prompts(path: str) -> List[PromptSpec]:
+    """Parse a .csv or .jsonl prompt file."""
+    with open(path, encoding="utf-8") as handle:
+        text = handle.read()
+    extension = os.path.splitext(path)[1].lower()
+    return parse_prompts(text, "jsonl" if extension in (".jsonl", ".json", ".ndjson") else
+                         "csv" if extension == ".csv" else None)
+
+
+def run_prompt_batch(
+    specs: List[PromptSpec],
+    api_key: str,
+    workers: int = 4,
+    aspect_ratio: str = "1:1",
+    on_result: Optional[Callable[[int, PromptSpec, Dict[str, Any]], None]] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    **generate_kwargs: Any
+) -> List[Dict[str, Any]]:
+    """
+    Generate one image per prompt, at most `workers` at a time.
+
+    Args:
+        specs: Prompts from parse_prompts or load_prompts
+        api_key: Bria AI API key
+        workers: Prompts generated concurrently
+        aspect_ratio: Aspect ratio for prompts that do not set one
+        on_result: Called in the calling thread with the prompt's index, the
+            prompt and its outcome as each prompt finishes
+        cancel_token: Cancels the prompts in flight and skips the rest
+        **generate_kwargs: Passed on to generate_hd_image, e.g. steps_num
+
+    Returns:
+        One outcome per prompt, in file order: 'url' on success or 'error'
+    """
+    def generate(spec: PromptSpec) -> Dict[str, Any]:
+        if cancel_token is not None and cancel_token.cancelled:
+            return {"url": None, "error": "Cancelled"}
+        try:
+            response = generate_hd_image(
+                spec.styled_prompt(), api_key,
+                num_results=1,
+                aspect_ratio=spec.aspect_ratio or aspect_ratio,
+                seed=spec.seed,
+                negative_prompt=spec.negative_prompt,
+                medium=spec.medium(),
+                cancel_token=cancel_token,
+                **generate_kwargs
+            )
+            urls = result_urls(response)
+            if not urls:
+                return {"url": None, "error": "No image URL in the response"}
+            return {"url": urls[0], "error": None}
+        except Exception as e:
+            return {"url": None, "error": f"{type(e).__name__}: {e}"}
+
+    outcomes: List[Optional[Dict[str, Any]]] = [None] * len(specs)
+    log_event(logging.INFO, "bria.prompt_batch_started", prompts=len(specs), workers=workers)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="bria-prompts") as executor:
+        futures = {executor.submit(generate, spec): index for index, spec in enumerate(specs)}
+        for future in concurrent.futures.as_completed(futures):
+            index = futures[future]
+            outcomes[index] = future.result()
+            if on_result is not None:
+                on_result(index, specs[index], outcomes[index])
+    failed = sum(1 for outcome in outcomes if outcome["error"])
+    log_event(logging.INFO, "bria.prompt_batch_finished", prompts=len(specs), failed=failed)
+    return outcomes
+
+
+__all__ = [
+    'PromptSpec',
+    'parse_prompts',
+    'load_prompts',
+    'run_prompt_batch',
+]
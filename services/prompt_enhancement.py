@@ -1,48 +1,66 @@
 from typing import Dict, Any, Optional
-import requests
 import json
+import logging
+
+from .bria_client import bria_post
+from .bria_logging import log_event
+from .bria_async import async_bria_post
+from .deadline import CancellationToken
+from .errors import BriaCancelledError
 
 def enhance_prompt(
     api_key: str,
     prompt: str,
+    timeout: Optional[float] = None,
+    cancel_token: Optional[CancellationToken] = None,
     **kwargs
 ) -> str:
     """
     Enhance a prompt using Bria AI's prompt enhancement service.
-    
+
     Args:
         api_key: Bria AI API key
         prompt: Original prompt to enhance
+        timeout: Total seconds the call may take, including retries
+            (defaults to the endpoint's budget)
+        cancel_token: Cancel it to abandon the call with BriaCancelledError
         **kwargs: Additional parameters for the API
-    
+
     Returns:
         Enhanced prompt string
     """
-    url = "https://engine.prod.bria-api.com/v1/prompt_enhancer"
-    
-    headers = {
-        'api_token': api_key,
-        'Accept': 'application/json',
-        'Content-Type': 'application/json'
+    data = {
+        'prompt': prompt,
+        **kwargs
     }
-    
+
+    try:
+        result = bria_post("/prompt_enhancer", api_key, data, operation="Prompt enhancement", timeout=timeout, cancel_token=cancel_token)
+        return result.get("prompt variations", prompt)  # Return original prompt if enhancement fails
+    except BriaCancelledError:
+        raise
+    except Exception as e:
+        log_event(logging.WARNING, "bria.prompt_enhancement_failed", error=e)
+        return prompt  # Return original prompt on error
+
+async def enhance_prompt_async(
+    api_key: str,
+    prompt: str,
+    timeout: Optional[float] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    **kwargs
+) -> str:
+    """Awaitable version of enhance_prompt; takes the same arguments."""
     data = {
         'prompt': prompt,
         **kwargs
     }
-    
+
     try:
-        print(f"Making request to: {url}")
-        print(f"Headers: {headers}")
-        
-        response = requests.post(url, headers=headers, json=data)
-        response.raise_for_status()
-        
-        print(f"Response status: {response.status_code}")
-        print(f"Response body: {response.text}")
-        
-        result = response.json()
+        result = await async_bria_post("/prompt_enhancer", api_key, data, operation="Prompt enhancement", timeout=timeout, cancel_token=cancel_token)
         return result.get("prompt variations", prompt)  # Return original prompt if enhancement fails
+    except BriaCancelledError:
+        raise
     except Exception as e:
-        print(f"Error enhancing prompt: {str(e)}")
-        return prompt  # Return original prompt on error 
\ No newline at end of file
+        log_event(logging.WARNING, "bria.prompt_enhancement_failed", error=e)
+        return prompt  # Return original prompt on error
@@ -0,0 +1,248 @@
+"""
+In-process token-bucket rate limiting for Bria calls.
+Buckets are keyed by (API key, endpoint) and shared by every Streamlit
+session in the process. Callers reserve a token and queue in arrival order
+until it becomes available, so we wait locally instead of collecting 429s.
+"""
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .errors import BriaRateLimitError
+from .deadline import CancellationToken, cancelled_error
+
+load_dotenv()
+
+# Default sustained rate and burst size for every (API key, endpoint) bucket.
+# A rate of 0 disables local rate limiting.
+DEFAULT_RATE_PER_MINUTE = float(os.getenv("BRIA_RATE_LIMIT_PER_MINUTE", "60"))
+DEFAULT_BURST = int(os.getenv("BRIA_RATE_LIMIT_BURST", "10"))
+
+# Callers that would have to queue longer than this fail fast instead
+MAX_QUEUE_WAIT = float(os.getenv("BRIA_RATE_LIMIT_MAX_WAIT", "60"))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket that hands out reservations.
+
+    Tokens may go negative: each reservation takes one token immediately and
+    returns how long the caller must wait for it, which gives FIFO queueing
+    without a separate wait list.
+    """
+
+    def __init__(self, rate_per_second: float, capacity: int):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.waiting = 0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, max_wait: Optional[float] = None) -> Optional[float]:
+        """
+        Take one token.
+
+        Returns:
+            Seconds the caller must wait before using the token, or None if
+            that wait would exceed max_wait (no token is taken in that case)
+        """
+        with self._lock:
+            self._refill()
+            wait = max(0.0, (1 - self.tokens) / self.rate)
+            if max_wait is not None and wait > max_wait:
+                return None
+            self.tokens -= 1
+            if wait > 0:
+                self.waiting += 1
+            return wait
+
+    def finish_wait(self) -> None:
+        """Mark a queued reservation as no longer waiting."""
+        with self._lock:
+            self.waiting = max(0, self.waiting - 1)
+
+    def refund(self) -> None:
+        """Give back a token from a reservation that was not used."""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + 1)
+
+    def estimate_wait(self) -> float:
+        """Seconds a new caller would wait right now."""
+        with self._lock:
+            self._refill()
+            return max(0.0, (1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back all callers for at least `seconds` (used after a 429)."""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+_buckets: Dict[Tuple[str, str], TokenBucket] = {}
+_limits: Dict[str, Tuple[float, int]] = {}
+_buckets_lock = threading.Lock()
+
+
+def _key_fingerprint(api_key: str) -> str:
+    """Short digest of the API key so raw keys are never kept as dict keys."""
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+
+
+def configure_rate_limit(endpoint: str, per_minute: float, burst: int) -> None:
+    """
+    Override the rate limit for one endpoint, e.g. '/product/packshot'.
+
+    Existing buckets for the endpoint are replaced on their next use.
+    """
+    with _buckets_lock:
+        _limits[endpoint] = (per_minute, burst)
+        for key in [k for k in _buckets if k[1] == endpoint]:
+            del _buckets[key]
+
+
+def get_bucket(api_key: str, endpoint: str) -> Optional[TokenBucket]:
+    """Get or create the bucket for an API key and endpoint (None if disabled)."""
+    per_minute, burst = _limits.get(endpoint, (DEFAULT_RATE_PER_MINUTE, DEFAULT_BURST))
+    if per_minute <= 0:
+        return None
+
+    key = (_key_fingerprint(api_key), endpoint)
+    bucket = _buckets.get(key)
+    if bucket is None:
+        with _buckets_lock:
+            bucket = _buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(per_minute / 60.0, max(1, burst))
+                _buckets[key] = bucket
+    return bucket
+
+
+def _reserve(bucket: TokenBucket, endpoint: str, max_wait: Optional[float]) -> float:
+    wait = bucket.reserve(MAX_QUEUE_WAIT if max_wait is None else min(MAX_QUEUE_WAIT, max_wait))
+    if wait is None:
+        raise BriaRateLimitError(
+            f"Too many queued requests for {endpoint}; try again shortly.",
+            status_code=429,
+            operation=endpoint,
+            retry_after=bucket.estimate_wait()
+        )
+    return wait
+
+
+def acquire(
+    api_key: str,
+    endpoint: str,
+    max_wait: Optional[float] = None,
+    cancel_token: Optional[CancellationToken] = None
+) -> float:
+    """
+    Block until a request to `endpoint` may be sent with `api_key`.
+
+    Args:
+        api_key: Bria AI API key
+        endpoint: Endpoint key
+        max_wait: Fail fast instead of queueing longer than this
+        cancel_token: Abandons the wait (and gives the token back) if cancelled
+
+    Returns:
+        Seconds spent waiting in the queue
+    """
+    bucket = get_bucket(api_key, endpoint)
+    if bucket is None:
+        return 0.0
+
+    wait = _reserve(bucket, endpoint, max_wait)
+    if wait > 0:
+        try:
+            if cancel_token is None:
+                time.sleep(wait)
+            elif cancel_token.wait(wait):
+                bucket.refund()
+                raise cancelled_error(endpoint)
+        finally:
+            bucket.finish_wait()
+    return wait
+
+
+async def acquire_async(api_key: str, endpoint: str, max_wait: Optional[float] = None) -> float:
+    """Awaitable version of acquire; cancelling the task abandons the wait."""
+    bucket = get_bucket(api_key, endpoint)
+    if bucket is None:
+        return 0.0
+
+    wait = _reserve(bucket, endpoint, max_wait)
+    if wait > 0:
+        try:
+            await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            bucket.refund()
+            raise
+        finally:
+            bucket.finish_wait()
+    return wait
+
+
+def try_acquire(api_key: str, endpoint: str) -> bool:
+    """Take a token only if one is available right now, without queueing."""
+    bucket = get_bucket(api_key, endpoint)
+    if bucket is None:
+        return True
+    return bucket.reserve(max_wait=0.0) is not None
+
+
+def report_throttled(api_key: str, endpoint: str, retry_after: Optional[float]) -> None:
+    """Hold back the bucket after Bria answered 429, so queued callers wait too."""
+    bucket = get_bucket(api_key, endpoint)
+    if bucket is not None and retry_after:
+        bucket.pause(retry_after)
+
+
+def estimate_wait(api_key: str, endpoint: str) -> float:
+    """Seconds a request to `endpoint` with `api_key` would queue right now."""
+    bucket = get_bucket(api_key, endpoint)
+    return bucket.estimate_wait() if bucket is not None else 0.0
+
+
+def get_rate_limit_status(api_key: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Snapshot of every active bucket for an API key, for display in the UI.
+
+    Returns:
+        Dict mapping endpoint to {'wait', 'queued', 'tokens'}
+    """
+    fingerprint = _key_fingerprint(api_key)
+    status = {}
+    for (key_fp, endpoint), bucket in list(_buckets.items()):
+        if key_fp != fingerprint:
+            continue
+        status[endpoint] = {
+            "wait": bucket.estimate_wait(),
+            "queued": bucket.waiting,
+            "tokens": max(0.0, bucket.tokens),
+        }
+    return status
+
+
+__all__ = [
+    'TokenBucket',
+    'configure_rate_limit',
+    'acquire',
+    'acquire_async',
+    'try_acquire',
+    'report_throttled',
+    'estimate_wait',
+    'get_rate_limit_status',
+]
@@ -0,0 +1,161 @@
+"""
+Readiness probing for the result URLs of asynchronous Bria jobs.
+All due URLs are probed concurrently over the shared pooled session, each
+probe has a timeout, and every URL backs off exponentially while it is not
+ready. A token bucket caps the total probe rate of this process, so many
+sessions waiting on many results cannot flood the result host.
+"""
+import concurrent.futures
+import os
+import random
+import threading
+import time
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .bria_client import get_bria_session
+from .rate_limiter import TokenBucket
+
+load_dotenv()
+
+# First probe of a URL happens this many seconds after it is tracked
+PROBE_INITIAL_DELAY = float(os.getenv("BRIA_PROBE_INITIAL_DELAY", "2"))
+# Shortest backoff between probes of one URL, even with no initial delay
+MIN_PROBE_DELAY = 0.5
+# Longest backoff between probes of one URL
+PROBE_MAX_DELAY = float(os.getenv("BRIA_PROBE_MAX_DELAY", "15"))
+# Probes per second across the whole process
+PROBE_MAX_PER_SECOND = float(os.getenv("BRIA_PROBE_MAX_PER_SECOND", "10"))
+# Probes in flight at once
+PROBE_CONCURRENCY = int(os.getenv("BRIA_PROBE_CONCURRENCY", "8"))
+# Timeout for a single probe
+PROBE_TIMEOUT = 5
+
+
+def probe_url(url: str, timeout: float = PROBE_TIMEOUT) -> bool:
+    """Whether a result URL is available yet."""
+    try:
+        response = get_bria_session().head(url, timeout=timeout, allow_redirects=True)
+        return response.status_code == 200
+    except Exception:
+        return False
+
+
+class ReadinessProber:
+    """Schedules, rate-limits and runs concurrent readiness probes."""
+
+    def __init__(
+        self,
+        max_per_second: float = PROBE_MAX_PER_SECOND,
+        concurrency: int = PROBE_CONCURRENCY,
+        initial_delay: float = PROBE_INITIAL_DELAY,
+        max_delay: float = PROBE_MAX_DELAY
+    ):
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self._bucket = TokenBucket(max_per_second, max(1, int(max_per_second)))
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="bria-probe"
+        )
+        # url -> (monotonic time of the next probe, current backoff)
+        self._schedule: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"probes": 0, "ready": 0, "deferred": 0}
+
+    def track(self, urls: Iterable[str], initial_delay: Optional[float] = None) -> None:
+        """
+        Schedule the first probe of new URLs.
+
+        Args:
+            urls: Result URLs to probe
+            initial_delay: Seconds until the first probe; defaults to the
+                prober's initial delay
+        """
+        delay = self.initial_delay if initial_delay is None else initial_delay
+        first_probe = time.monotonic() + delay
+        with self._lock:
+            for url in urls:
+                self._schedule.setdefault(url, (first_probe, min(max(delay, MIN_PROBE_DELAY), self.max_delay)))
+
+    def forget(self, urls: Iterable[str]) -> None:
+        """Stop scheduling URLs nobody waits for any more."""
+        with self._lock:
+            for url in urls:
+                self._schedule.pop(url, None)
+
+    def next_due_in(self, urls: Iterable[str]) -> Optional[float]:
+        """Seconds until the first of urls is due, or None if there are none."""
+        now = time.monotonic()
+        with self._lock:
+            due_times = [self._schedule.get(url, (now, 0.0))[0] for url in urls]
+        if not due_times:
+            return None
+        # Due URLs deferred by the rate cap wait for the next probe token
+        return max(0.0, min(due_times) - now, self._bucket.estimate_wait())
+
+    def probe(self, urls: Iterable[str]) -> List[str]:
+        """
+        Probe the URLs that are due, concurrently.
+
+        URLs that are not ready, or that the rate cap defers, stay scheduled.
+
+        Returns:
+            The URLs found ready
+        """
+        now = time.monotonic()
+        with self._lock:
+            due = [url for url in urls if self._schedule.get(url, (now, 0.0))[0] <= now]
+
+        allowed = []
+        for url in due:
+            if self._bucket.reserve(max_wait=0.0) is None:
+                with self._lock:
+                    self._stats["deferred"] += len(due) - len(allowed)
+                break
+            allowed.append(url)
+        if not allowed:
+            return []
+
+        outcomes = list(self._executor.map(probe_url, allowed))
+        ready = []
+        now = time.monotonic()
+        with self._lock:
+            self._stats["probes"] += len(allowed)
+            for url, is_ready in zip(allowed, outcomes):
+                if is_ready:
+                    self._schedule.pop(url, None)
+                    self._stats["ready"] += 1
+                    ready.append(url)
+                    continue
+                _, delay = self._schedule.get(url, (now, self.initial_delay / 2))
+                delay = min(self.max_delay, max(delay, MIN_PROBE_DELAY) * 2)
+                # Jitter keeps URLs submitted together from being probed in lockstep
+                self._schedule[url] = (now + delay * random.uniform(0.8, 1.2), delay)
+        return ready
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats, scheduled=len(self._schedule))
+
+
+_prober: Optional[ReadinessProber] = None
+_prober_lock = threading.Lock()
+
+
+def get_readiness_prober() -> ReadinessProber:
+    """Get or create the process-wide readiness prober."""
+    global _prober
+
+    if _prober is None:
+        with _prober_lock:
+            if _prober is None:
+                _prober = ReadinessProber()
+    return _prober
+
+
+__all__ = [
+    'probe_url',
+    'ReadinessProber',
+    'get_readiness_prober',
+]
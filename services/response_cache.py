@@ -0,0 +1,283 @@
+"""
+Content-addressed cache for deterministic Bria responses.
+Seeded text-to-image calls and packshot/shadow calls on the same image bytes
+with the same parameters return the same result, so their responses can be
+reused. Entries are keyed by endpoint, canonicalized parameters and a digest
+of any image payload, and live in a bounded in-memory LRU tier backed by an
+optional disk tier, both with a TTL.
+"""
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .payload import ImageBlob
+from .bria_logging import log_event
+
+load_dotenv()
+
+# Whether service functions cache eligible calls when the caller does not say
+CACHE_ENABLED_BY_DEFAULT = os.getenv("BRIA_RESPONSE_CACHE", "false").lower() in ("1", "true", "yes")
+# Bria result URLs are only hosted for a limited time
+CACHE_TTL = float(os.getenv("BRIA_CACHE_TTL", "3600"))
+MEMORY_MAX_ENTRIES = int(os.getenv("BRIA_CACHE_MEMORY_ENTRIES", "512"))
+MEMORY_MAX_BYTES = int(os.getenv("BRIA_CACHE_MEMORY_BYTES", str(8 * 1024 * 1024)))
+# Empty string disables the disk tier
+DISK_DIR = os.getenv("BRIA_CACHE_DIR", os.path.join(".cache", "bria"))
+DISK_MAX_ENTRIES = int(os.getenv("BRIA_CACHE_DISK_ENTRIES", "5000"))
+DISK_MAX_BYTES = int(os.getenv("BRIA_CACHE_DISK_BYTES", str(64 * 1024 * 1024)))
+
+# Request fields holding base64 image payloads; replaced by a digest in keys
+BLOB_FIELDS = ('file', 'mask_file', 'ref_image_file')
+# Request fields that differ between otherwise equal requests; left out of keys
+UNKEYED_FIELDS = ('callback_url',)
+
+
+def _digest(value: Any) -> str:
+    if isinstance(value, str):
+        value = value.encode("utf-8")
+    return hashlib.sha256(value).hexdigest()
+
+
+def request_key(path: str, data: Dict[str, Any], api_key: str = "") -> str:
+    """
+    Canonical key for a Bria request.
+
+    Image payloads are replaced by their digest, per-request fields such as
+    the callback URL are dropped and parameters are serialized with sorted
+    keys, so equal requests map to the same key. The
+    API key is folded in as a digest so one account never sees another's
+    results.
+    """
+    canonical = {}
+    for field, value in data.items():
+        if field in UNKEYED_FIELDS:
+            continue
+        if isinstance(value, ImageBlob):
+            value = "sha256:" + value.digest
+        elif field in BLOB_FIELDS and value is not None:
+            value = "sha256:" + _digest(value)
+        canonical[field] = value
+
+    material = json.dumps(
+        {"path": path, "data": canonical, "key": _digest(api_key or "")},
+        sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class MemoryTier:
+    """Thread-safe LRU with a TTL, bounded by entry count and total bytes."""
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self._entries: "OrderedDict[str, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, size, value = entry
+            if expires_at < time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Dict[str, Any], size: int, expires_at: float) -> None:
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, size, value)
+            self.size += size
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.size -= size
+
+
+class DiskTier:
+    """
+    One JSON file per entry. Reads refresh the file's mtime, so evicting the
+    oldest mtimes first gives LRU order across processes sharing the folder.
+    """
+
+    def __init__(self, directory: str, max_entries: int, max_bytes: int, ttl: float):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if entry.get("expires_at", 0) < time.time():
+            self._unlink(path)
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return entry["response"], entry["expires_at"]
+
+    def put(self, key: str, value: Dict[str, Any], expires_at: float) -> None:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(key)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"expires_at": expires_at, "response": value}, f)
+            os.replace(tmp_path, path)
+            self._evict()
+        except OSError as e:
+            log_event(logging.WARNING, "bria.cache_write_failed", error=e)
+
+    def clear(self) -> None:
+        for name in self._list():
+            self._unlink(os.path.join(self.directory, name))
+
+    def _list(self):
+        try:
+            return [n for n in os.listdir(self.directory) if n.endswith(".json")]
+        except OSError:
+            return []
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            total = 0
+            now = time.time()
+            for name in self._list():
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                # Cheap expiry sweep: anything untouched for longer than the
+                # TTL has certainly expired
+                if stat.st_mtime + self.ttl < now:
+                    self._unlink(path)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+            entries.sort()
+            while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+                _, size, path = entries.pop(0)
+                self._unlink(path)
+                total -= size
+
+    @staticmethod
+    def _unlink(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class ResponseCache:
+    """Two-tier (memory, then disk) response cache with hit/miss counters."""
+
+    def __init__(self, memory: MemoryTier, disk: Optional[DiskTier]):
+        self.memory = memory
+        self.disk = disk
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            found = self.disk.get(key)
+            if found is not None:
+                value, expires_at = found
+                self.memory.put(key, value, _size_of(value), expires_at)
+
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # Callers may mutate the response they get back
+        return copy.deepcopy(value)
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        expires_at = time.time() + self.memory.ttl
+        value = copy.deepcopy(value)
+        self.memory.put(key, value, _size_of(value), expires_at)
+        if self.disk is not None:
+            self.disk.put(key, value, expires_at)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory.size,
+        }
+
+
+def _size_of(value: Dict[str, Any]) -> int:
+    return len(json.dumps(value, default=str))
+
+
+_cache = ResponseCache(
+    MemoryTier(MEMORY_MAX_ENTRIES, MEMORY_MAX_BYTES, CACHE_TTL),
+    DiskTier(DISK_DIR, DISK_MAX_ENTRIES, DISK_MAX_BYTES, CACHE_TTL) if DISK_DIR else None
+)
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide response cache."""
+    return _cache
+
+
+def use_cache(cache: Optional[bool]) -> bool:
+    """Resolve a service function's `cache` argument against the default."""
+    return CACHE_ENABLED_BY_DEFAULT if cache is None else cache
+
+
+__all__ = [
+    'request_key',
+    'MemoryTier',
+    'DiskTier',
+    'ResponseCache',
+    'get_response_cache',
+    'use_cache',
+]
@@ -0,0 +1,128 @@
+"""
+Retry policy shared by the sync and async Bria clients.
+Transient failures (429/502/503/504 and connection resets) are retried with
+exponential backoff and full jitter, honoring Retry-After, within a per-call
+budget of attempts and total sleep time.
+"""
+import os
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, FrozenSet
+
+from dotenv import load_dotenv
+
+from .errors import BriaError, BriaConnectionError
+
+load_dotenv()
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Backoff settings for one Bria call.
+
+    Attributes:
+        max_attempts: Total attempts including the first one
+        base_delay: Backoff ceiling for the first retry, in seconds
+        max_delay: Upper bound for a single backoff, in seconds
+        retry_budget: Maximum total seconds spent sleeping across retries
+        max_retry_after: Longest Retry-After value we are willing to honor
+        retry_statuses: HTTP statuses treated as transient
+    """
+    max_attempts: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+    retry_budget: float = 30.0
+    max_retry_after: float = 20.0
+    retry_statuses: FrozenSet[int] = field(default_factory=lambda: frozenset({429, 502, 503, 504}))
+
+    def is_retryable(self, error: BriaError) -> bool:
+        """Whether an error is worth another attempt."""
+        if isinstance(error, BriaConnectionError):
+            return True
+        return error.status_code in self.retry_statuses
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given retry number (0-based)."""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def next_delay(self, error: BriaError, attempt: int, slept: float) -> Optional[float]:
+        """
+        Decide how long to wait before retrying, or None to give up.
+
+        Args:
+            error: The failure from the attempt that just finished
+            attempt: Number of attempts already made (1 after the first)
+            slept: Seconds already spent sleeping for this call
+
+        Returns:
+            Delay in seconds, or None when the error is not retryable or the
+            attempt/time budget is exhausted
+        """
+        if not self.is_retryable(error) or attempt >= self.max_attempts:
+            return None
+
+        delay = self.backoff(attempt - 1)
+        if error.retry_after is not None:
+            if error.retry_after > self.max_retry_after:
+                return None
+            # Never retry earlier than the server asked; add a little jitter
+            # so callers released at the same moment do not stampede
+            delay = error.retry_after + random.uniform(0, self.base_delay)
+
+        if slept + delay > self.retry_budget:
+            return None
+        return delay
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header given either as seconds or an HTTP date.
+
+    Returns:
+        Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+_default_policy = RetryPolicy(
+    max_attempts=int(os.getenv("BRIA_RETRY_MAX_ATTEMPTS", "4")),
+    base_delay=float(os.getenv("BRIA_RETRY_BASE_DELAY", "0.5")),
+    max_delay=float(os.getenv("BRIA_RETRY_MAX_DELAY", "8")),
+    retry_budget=float(os.getenv("BRIA_RETRY_BUDGET", "30")),
+)
+
+
+def get_retry_policy() -> RetryPolicy:
+    """Return the process-wide default retry policy."""
+    return _default_policy
+
+
+def set_retry_policy(policy: RetryPolicy) -> None:
+    """Replace the process-wide default retry policy."""
+    global _default_policy
+    _default_policy = policy
+
+
+__all__ = [
+    'RetryPolicy',
+    'parse_retry_after',
+    'get_retry_policy',
+    'set_retry_policy',
+]
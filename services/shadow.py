@@ -1,6 +1,54 @@
-from typing import Dict, Any, List, Optional
-import requests
-import base64
+from typing import Dict, Any, List, Optional, Tuple
+
+from .bria_client import bria_post
+from .bria_async import async_bria_post
+from .deadline import CancellationToken
+from .payload import add_image
+from .response_cache import use_cache
+from .hedging import use_hedging
+
+def _shadow_request(
+    image_data: Optional[bytes],
+    image_url: Optional[str],
+    shadow_type: str,
+    background_color: Optional[str],
+    shadow_color: str,
+    shadow_offset: List[int],
+    shadow_intensity: int,
+    shadow_blur: Optional[int],
+    shadow_width: Optional[int],
+    shadow_height: Optional[int],
+    sku: Optional[str],
+    force_rmbg: bool,
+    content_moderation: bool
+) -> Tuple[str, Dict[str, Any]]:
+    """Build the endpoint path and request body for a shadow call."""
+    # Prepare request data
+    data = {
+        'shadow_type': shadow_type,
+        'shadow_color': shadow_color,
+        'shadow_intensity': shadow_intensity,
+        'force_rmbg': force_rmbg,
+        'content_moderation': content_moderation,
+        'shadow_offset': shadow_offset
+    }
+
+    # Add image data
+    add_image(data, image_data, image_url, endpoint="/product/shadow")
+
+    # Add optional parameters
+    if background_color:
+        data['background_color'] = background_color
+    if shadow_blur is not None:
+        data['shadow_blur'] = shadow_blur
+    if shadow_width is not None:
+        data['shadow_width'] = shadow_width
+    if shadow_height is not None:
+        data['shadow_height'] = shadow_height
+    if sku:
+        data['sku'] = sku
+
+    return "/product/shadow", data
 
 def add_shadow(
     api_key: str,
@@ -16,11 +64,15 @@ def add_shadow(
     shadow_height: Optional[int] = 70,
     sku: Optional[str] = None,
     force_rmbg: bool = False,
-    content_moderation: bool = False
+    content_moderation: bool = False,
+    cache: Optional[bool] = None,
+    timeout: Optional[float] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    hedge: Optional[bool] = None
 ) -> Dict[str, Any]:
     """
     Add shadow to an image.
-    
+
     Args:
         api_key: Bria AI API key
         image_data: Image data in bytes (optional if image_url provided)
@@ -36,59 +88,50 @@ def add_shadow(
         sku: Optional SKU identifier
         force_rmbg: Whether to force background removal
         content_moderation: Whether to enable content moderation
-    
+        cache: Reuse the response for identical image input and settings
+            (defaults to the BRIA_RESPONSE_CACHE setting)
+        timeout: Total seconds the call may take, including retries
+            (defaults to the endpoint's budget)
+        cancel_token: Cancel it to abandon the call with BriaCancelledError
+        hedge: Race a second identical request against a slow first one
+            (defaults to the BRIA_HEDGE_REQUESTS setting)
+
     Returns:
         Dict containing the API response
     """
-    url = "https://engine.prod.bria-api.com/v1/product/shadow"
-    
-    headers = {
-        'api_token': api_key,
-        'Accept': 'application/json',
-        'Content-Type': 'application/json'
-    }
-    
-    # Prepare request data
-    data = {
-        'shadow_type': shadow_type,
-        'shadow_color': shadow_color,
-        'shadow_intensity': shadow_intensity,
-        'force_rmbg': force_rmbg,
-        'content_moderation': content_moderation,
-        'shadow_offset': shadow_offset
-    }
-    
-    # Add image data
-    if image_url:
-        data['image_url'] = image_url
-    elif image_data:
-        data['file'] = base64.b64encode(image_data).decode('utf-8')
-    else:
-        raise ValueError("Either image_data or image_url must be provided")
-    
-    # Add optional parameters
-    if background_color:
-        data['background_color'] = background_color
-    if shadow_blur is not None:
-        data['shadow_blur'] = shadow_blur
-    if shadow_width is not None:
-        data['shadow_width'] = shadow_width
-    if shadow_height is not None:
-        data['shadow_height'] = shadow_height
-    if sku:
-        data['sku'] = sku
-    
-    try:
-        print(f"Making request to: {url}")
-        print(f"Headers: {headers}")
-        print(f"Data: {data}")
-        
-        response = requests.post(url, headers=headers, json=data)
-        response.raise_for_status()
-        
-        print(f"Response status: {response.status_code}")
-        print(f"Response body: {response.text}")
-        
-        return response.json()
-    except Exception as e:
-        raise Exception(f"Shadow addition failed: {str(e)}") 
\ No newline at end of file
+    path, data = _shadow_request(
+        image_data, image_url, shadow_type, background_color, shadow_color,
+        shadow_offset, shadow_intensity, shadow_blur, shadow_width,
+        shadow_height, sku, force_rmbg, content_moderation
+    )
+    return bria_post(path, api_key, data, operation="Shadow addition", cache=use_cache(cache),
+                     timeout=timeout, cancel_token=cancel_token, hedge=use_hedging(hedge))
+
+async def add_shadow_async(
+    api_key: str,
+    image_data: bytes = None,
+    image_url: str = None,
+    shadow_type: str = "regular",
+    background_color: Optional[str] = None,
+    shadow_color: str = "#000000",
+    shadow_offset: List[int] = [0, 15],
+    shadow_intensity: int = 60,
+    shadow_blur: Optional[int] = None,
+    shadow_width: Optional[int] = None,
+    shadow_height: Optional[int] = 70,
+    sku: Optional[str] = None,
+    force_rmbg: bool = False,
+    content_moderation: bool = False,
+    cache: Optional[bool] = None,
+    timeout: Optional[float] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    hedge: Optional[bool] = None
+) -> Dict[str, Any]:
+    """Awaitable version of add_shadow; takes the same arguments."""
+    path, data = _shadow_request(
+        image_data, image_url, shadow_type, background_color, shadow_color,
+        shadow_offset, shadow_intensity, shadow_blur, shadow_width,
+        shadow_height, sku, force_rmbg, content_moderation
+    )
+    return await async_bria_post(path, api_key, data, operation="Shadow addition", cache=use_cache(cache),
+                                  timeout=timeout, cancel_token=cancel_token, hedge=use_hedging(hedge))
@@ -0,0 +1,179 @@
+"""
+Single-flight coalescing of identical in-flight Bria requests.
+A double-click on a Streamlit button, or two sessions submitting the same
+request, would otherwise send the same work to Bria twice. The first caller
+for a request key runs the call; callers arriving with the same key while it
+is in flight wait for that call and share its result or error.
+"""
+import asyncio
+import concurrent.futures
+import copy
+import logging
+import os
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .bria_logging import log_event
+from .deadline import Deadline, CancellationToken, cancelled_error
+from .errors import BriaCancelledError
+
+load_dotenv()
+
+COALESCE_ENABLED = os.getenv("BRIA_COALESCE_REQUESTS", "true").lower() in ("1", "true", "yes")
+
+_calls: Dict[str, concurrent.futures.Future] = {}
+_calls_lock = threading.Lock()
+_stats = {"leaders": 0, "coalesced": 0}
+
+
+def _claim(key: str) -> Tuple[concurrent.futures.Future, bool]:
+    """Return the in-flight call for key and whether the caller must run it."""
+    with _calls_lock:
+        future = _calls.get(key)
+        if future is not None:
+            _stats["coalesced"] += 1
+            return future, False
+        future = concurrent.futures.Future()
+        _calls[key] = future
+        _stats["leaders"] += 1
+        return future, True
+
+
+def _release(key: str, future: concurrent.futures.Future) -> None:
+    with _calls_lock:
+        if _calls.get(key) is future:
+            del _calls[key]
+
+
+def run_once(
+    key: str,
+    fn: Callable[[], Any],
+    operation: str = "Bria request",
+    deadline: Optional[Deadline] = None,
+    cancel_token: Optional[CancellationToken] = None
+) -> Any:
+    """
+    Run fn, or wait for an identical call already in flight.
+
+    Args:
+        key: Canonical request key (see response_cache.request_key)
+        fn: Performs the request; only called by the first caller
+        operation: Human readable name used in log output
+        deadline: Bounds how long a caller waits for someone else's call
+        cancel_token: Lets a waiting caller give up on someone else's call
+
+    Returns:
+        fn's result; callers that attached to another call get a copy
+    """
+    if not COALESCE_ENABLED:
+        return fn()
+
+    while True:
+        future, leader = _claim(key)
+        if leader:
+            try:
+                result = fn()
+            except BriaCancelledError:
+                # Let followers retry rather than see our cancellation
+                future.cancel()
+                raise
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            else:
+                future.set_result(result)
+                return result
+            finally:
+                _release(key, future)
+
+        log_event(logging.INFO, "bria.coalesced", operation=operation)
+        _wait_for_leader(future, operation, deadline, cancel_token)
+        if future.cancelled():
+            # The leader was cancelled, not the request itself; try again
+            continue
+        return copy.deepcopy(future.result())
+
+
+def _wait_for_leader(
+    future: concurrent.futures.Future,
+    operation: str,
+    deadline: Optional[Deadline],
+    cancel_token: Optional[CancellationToken]
+) -> None:
+    """Wait until the leader's call finishes, our deadline passes or we are cancelled."""
+    wake = threading.Event()
+    future.add_done_callback(lambda _: wake.set())
+    if cancel_token is not None:
+        cancel_token.add_callback(wake.set)
+    try:
+        wake.wait(deadline.remaining() if deadline is not None else None)
+    finally:
+        if cancel_token is not None:
+            cancel_token.remove_callback(wake.set)
+
+    if cancel_token is not None and cancel_token.cancelled:
+        raise cancelled_error(operation)
+    if not future.done():
+        raise deadline.timeout_error(operation)
+
+
+async def run_once_async(
+    key: str,
+    coro_fn: Callable[[], Awaitable[Any]],
+    operation: str = "Bria request",
+    deadline: Optional[Deadline] = None
+) -> Any:
+    """
+    Awaitable version of run_once; coalesces with sync callers too.
+    Cancelling the calling task takes the place of a cancellation token.
+    """
+    if not COALESCE_ENABLED:
+        return await coro_fn()
+
+    while True:
+        future, leader = _claim(key)
+        if leader:
+            try:
+                result = await coro_fn()
+            except (asyncio.CancelledError, BriaCancelledError):
+                # Let followers retry rather than see our cancellation
+                future.cancel()
+                raise
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            else:
+                future.set_result(result)
+                return result
+            finally:
+                _release(key, future)
+
+        log_event(logging.INFO, "bria.coalesced", operation=operation)
+        try:
+            # shield so cancelling this caller leaves the shared call alone
+            result = await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(future)),
+                deadline.remaining() if deadline is not None else None
+            )
+        except asyncio.CancelledError:
+            if future.cancelled():
+                continue
+            raise
+        except asyncio.TimeoutError:
+            raise deadline.timeout_error(operation) from None
+        return copy.deepcopy(result)
+
+
+def get_single_flight_stats() -> Dict[str, int]:
+    """Counts of calls that ran versus calls that joined one in flight."""
+    with _calls_lock:
+        return dict(_stats, in_flight=len(_calls))
+
+
+__all__ = [
+    'run_once',
+    'run_once_async',
+    'get_single_flight_stats',
+]
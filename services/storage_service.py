@@ -17,6 +17,7 @@ BUCKET_NAME = "user-files"
 # Try to import Supabase - it may fail due to dependency conflicts
 SUPABASE_AVAILABLE = False
 _supabase_client = None
+_headless_client = None
 
 try:
     from supabase import create_client, Client
@@ -126,6 +127,101 @@ def upload_image(image_bytes: bytes, filename: str = None, folder: str = "images
         return {"success": False, "message": f"Upload error: {error_msg}"}
 
 
+def get_headless_client():
+    """
+    Supabase client for batch jobs that run without a Streamlit session.
+
+    Uses SUPABASE_SERVICE_KEY when set, since there is no user session for
+    row level security to check, and falls back to SUPABASE_KEY.
+    """
+    if not SUPABASE_AVAILABLE:
+        return None
+
+    url = os.getenv("SUPABASE_URL")
+    key = os.getenv("SUPABASE_SERVICE_KEY") or os.getenv("SUPABASE_KEY")
+
+    if not url or not key:
+        return None
+
+    try:
+        return create_client(url, key)
+    except Exception as e:
+        print(f"Failed to create Supabase client: {e}")
+        return None
+
+
+def upload_file(file_path: str, file_bytes: bytes, content_type: str = "image/png") -> dict:
+    """
+    Upload bytes to an exact path in the bucket, outside any Streamlit session.
+
+    Existing files at the path are overwritten, so batch runs can be repeated.
+
+    Args:
+        file_path: Path within the bucket, e.g. 'catalog/2024-06/SKU123.png'
+        file_bytes: The file data
+        content_type: MIME type stored with the file
+
+    Returns:
+        dict with 'success', 'message', and optionally 'url' and 'path'
+    """
+    global _headless_client
+
+    try:
+        if _headless_client is None:
+            _headless_client = get_headless_client()
+        if not _headless_client:
+            return {"success": False, "message": "Storage not configured."}
+
+        bucket = _headless_client.storage.from_(BUCKET_NAME)
+        bucket.upload(file_path, file_bytes, {"content-type": content_type, "upsert": "true"})
+        return {
+            "success": True,
+            "message": "File uploaded successfully!",
+            "url": bucket.get_public_url(file_path),
+            "path": file_path
+        }
+
+    except Exception as e:
+        error_msg = str(e)
+        if "Bucket not found" in error_msg:
+            return {"success": False, "message": f"Storage bucket '{BUCKET_NAME}' not found. Please create it in Supabase dashboard."}
+        return {"success": False, "message": f"Upload error: {error_msg}"}
+
+
+def list_file_names(folder: str, page_size: int = 1000) -> dict:
+    """
+    Names of the files directly inside a bucket folder, outside any Streamlit session.
+
+    Args:
+        folder: Folder within the bucket, e.g. 'catalog/2024-06'
+        page_size: Entries fetched per listing call
+
+    Returns:
+        dict with 'success', 'message', and 'names' (a set)
+    """
+    global _headless_client
+
+    try:
+        if _headless_client is None:
+            _headless_client = get_headless_client()
+        if not _headless_client:
+            return {"success": False, "message": "Storage not configured.", "names": set()}
+
+        bucket = _headless_client.storage.from_(BUCKET_NAME)
+        names = set()
+        offset = 0
+        while True:
+            page = bucket.list(folder, {"limit": page_size, "offset": offset})
+            names.update(item["name"] for item in page if item.get("name"))
+            if len(page) < page_size:
+                break
+            offset += page_size
+        return {"success": True, "message": f"{len(names)} files found", "names": names}
+
+    except Exception as e:
+        return {"success": False, "message": f"Error listing storage: {str(e)}", "names": set()}
+
+
 def download_image(file_path: str) -> dict:
     """
     Download an image from Supabase Storage.
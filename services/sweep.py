@@ -0,0 +1,138 @@
+"""
+Concurrent parameter sweeps over Bria generation settings.
+Exploring seed, steps, guidance or reference influence one click at a time
+means one blocking generation per value. A sweep takes a list of values per
+parameter, runs the cartesian product concurrently and reports each result
+with its parameter values as it arrives. A cap on the number of calls keeps
+a sweep from silently spending hundreds of generations.
+"""
+import concurrent.futures
+import itertools
+import logging
+import os
+from typing import Callable, Dict, Any, List, Optional
+
+from dotenv import load_dotenv
+
+from .bria_logging import log_event
+from .deadline import CancellationToken
+from .pipeline import result_urls
+
+load_dotenv()
+
+# Most calls a single sweep may make
+SWEEP_MAX_CALLS = int(os.getenv("BRIA_SWEEP_MAX_CALLS", "24"))
+
+# Short names used in labels, by service parameter
+PARAMETER_LABELS = {
+    "seed": "seed",
+    "steps_num": "steps",
+    "text_guidance_scale": "guidance",
+    "medium": "medium",
+    "ref_image_influence": "influence",
+}
+
+
+def sweep_combinations(axes: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """
+    The cartesian product of the parameter values, first axis slowest.
+
+    Args:
+        axes: Values to try, by service parameter name; axes with no values
+            are left out
+
+    Returns:
+        One dict of parameter values per call
+    """
+    axes = {name: list(values) for name, values in axes.items() if values}
+    if not axes:
+        return [{}]
+    return [dict(zip(axes, values)) for values in itertools.product(*axes.values())]
+
+
+def check_sweep_cost(combinations: List[Dict[str, Any]], max_calls: int = SWEEP_MAX_CALLS) -> None:
+    """
+    Raise if a sweep would make more calls than allowed.
+
+    Raises:
+        ValueError: With the number of calls and the cap
+    """
+    if len(combinations) > max_calls:
+        raise ValueError(f"The sweep needs {len(combinations)} generations, more than the cap of {max_calls}. "
+                         f"Pick fewer values or raise BRIA_SWEEP_MAX_CALLS.")
+
+
+def sweep_label(combination: Dict[str, Any]) -> str:
+    """Caption for a sweep result, e.g. 'seed 7 · steps 30'."""
+    return " · ".join(f"{PARAMETER_LABELS.get(name, name)} {value}" for name, value in combination.items())
+
+
+def run_sweep(
+    generate: Callable[..., Dict[str, Any]],
+    axes: Dict[str, List[Any]],
+    workers: int = 4,
+    max_calls: int = SWEEP_MAX_CALLS,
+    on_result: Optional[Callable[[int, Dict[str, Any], Dict[str, Any]], None]] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    **fixed_kwargs: Any
+) -> List[Dict[str, Any]]:
+    """
+    Call a generation service once per parameter combination, concurrently.
+
+    Args:
+        generate: Service function, e.g. generate_hd_image or
+            lifestyle_shot_by_image
+        axes: Values to try, by the service's parameter names
+        workers: Calls in flight at once
+        max_calls: Cost cap (see check_sweep_cost)
+        on_result: Called in the calling thread with the combination's
+            index, its parameter values and its outcome, as each call finishes
+        cancel_token: Cancels the calls in flight and skips the rest
+        **fixed_kwargs: Arguments shared by every call, e.g. api_key, prompt
+
+    Returns:
+        One outcome per combination, in sweep order, with the combination's
+        'params' and 'label' and either its 'url' or an 'error'
+
+    Raises:
+        ValueError: If the sweep exceeds the cost cap
+    """
+    combinations = sweep_combinations(axes)
+    check_sweep_cost(combinations, max_calls)
+
+    def call(combination: Dict[str, Any]) -> Dict[str, Any]:
+        outcome = {"params": combination, "label": sweep_label(combination), "url": None, "error": None}
+        if cancel_token is not None and cancel_token.cancelled:
+            outcome["error"] = "Cancelled"
+            return outcome
+        try:
+            urls = result_urls(generate(**fixed_kwargs, **combination, cancel_token=cancel_token))
+            if urls:
+                outcome["url"] = urls[0]
+            else:
+                outcome["error"] = "No image URL in the response"
+        except Exception as e:
+            outcome["error"] = f"{type(e).__name__}: {e}"
+        return outcome
+
+    outcomes: List[Optional[Dict[str, Any]]] = [None] * len(combinations)
+    log_event(logging.INFO, "bria.sweep_started", calls=len(combinations), axes=",".join(axes))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="bria-sweep") as executor:
+        futures = {executor.submit(call, combination): index for index, combination in enumerate(combinations)}
+        for future in concurrent.futures.as_completed(futures):
+            index = futures[future]
+            outcomes[index] = future.result()
+            if on_result is not None:
+                on_result(index, combinations[index], outcomes[index])
+    log_event(logging.INFO, "bria.sweep_finished", calls=len(combinations),
+              failed=sum(1 for outcome in outcomes if outcome["error"]))
+    return outcomes
+
+
+__all__ = [
+    'SWEEP_MAX_CALLS',
+    'sweep_combinations',
+    'check_sweep_cost',
+    'sweep_label',
+    'run_sweep',
+]
@@ -0,0 +1,194 @@
+"""
+Pre-upload image optimization for Bria endpoints.
+Raw uploads are often 20+ MP phone photos, while each endpoint only works at
+a fraction of that resolution. Upload time and Bria processing time both grow
+with payload size, so images are downscaled and re-encoded per endpoint
+profile before they are base64-encoded.
+"""
+import io
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Tuple
+
+from dotenv import load_dotenv
+from PIL import Image, ImageOps
+
+from utils.image_utils import optimize_image_for_api
+
+from .bria_logging import log_event
+
+load_dotenv()
+
+# Set to false to always send images exactly as uploaded
+OPTIMIZE_UPLOADS = os.getenv("BRIA_OPTIMIZE_UPLOADS", "true").lower() in ("1", "true", "yes")
+
+
+@dataclass(frozen=True)
+class UploadProfile:
+    """
+    How an image is prepared for one request field of one endpoint.
+
+    Attributes:
+        max_dimension: Longest side the endpoint actually uses
+        keep_alpha: Keep transparency (cut-out products) instead of
+            flattening onto white
+        format: Target format for opaque images
+        quality: JPEG/WEBP quality
+    """
+    max_dimension: int
+    keep_alpha: bool = False
+    format: str = 'JPEG'
+    quality: int = 90
+
+    @property
+    def key(self) -> str:
+        return f"{self.max_dimension}:{int(self.keep_alpha)}:{self.format}:{self.quality}"
+
+
+UPLOAD_PROFILES: Dict[Tuple[str, str], UploadProfile] = {
+    # Product endpoints use the alpha channel as the product cut-out
+    ('/product/packshot', 'file'): UploadProfile(2048, keep_alpha=True),
+    ('/product/shadow', 'file'): UploadProfile(2048, keep_alpha=True),
+    ('/product/lifestyle_shot_by_text', 'file'): UploadProfile(2048, keep_alpha=True),
+    ('/product/lifestyle_shot_by_image', 'file'): UploadProfile(2048, keep_alpha=True),
+    # The reference image only guides the scene
+    ('/product/lifestyle_shot_by_image', 'ref_image_file'): UploadProfile(1536),
+    # Its mask must match it pixel for pixel, see optimize_mask_pair
+    ('/gen_fill', 'file'): UploadProfile(2048),
+    ('/erase_foreground', 'file'): UploadProfile(2048),
+}
+
+# EXIF tag holding the camera orientation
+EXIF_ORIENTATION = 0x0112
+
+_stats = {"images": 0, "optimized": 0, "bytes_in": 0, "bytes_out": 0}
+_stats_lock = threading.Lock()
+
+
+def get_upload_profile(path: str, field: str = 'file') -> Optional[UploadProfile]:
+    """Return the profile for an endpoint's image field, or None to send as-is."""
+    if not OPTIMIZE_UPLOADS:
+        return None
+    return UPLOAD_PROFILES.get((path, field))
+
+
+def optimize_upload(image_data: bytes, profile: UploadProfile, label: str = "Upload") -> bytes:
+    """
+    Downscale and re-encode image bytes according to a profile.
+
+    The original bytes are returned if they cannot be decoded or the
+    optimized version would not be smaller.
+
+    Args:
+        image_data: Raw image bytes
+        profile: Upload profile for the target endpoint and field
+        label: Name used in log output
+
+    Returns:
+        Image bytes to upload
+    """
+    try:
+        optimized = optimize_image_for_api(
+            image_data,
+            max_dimension=profile.max_dimension,
+            quality=profile.quality,
+            format=profile.format,
+            keep_alpha=profile.keep_alpha
+        )
+    except Exception as e:
+        log_event(logging.WARNING, "bria.upload_not_optimized", upload=label, error=e)
+        optimized = image_data
+
+    if len(optimized) >= len(image_data):
+        optimized = image_data
+
+    saved = len(image_data) - len(optimized)
+    with _stats_lock:
+        _stats["images"] += 1
+        _stats["bytes_in"] += len(image_data)
+        _stats["bytes_out"] += len(optimized)
+        if saved:
+            _stats["optimized"] += 1
+
+    if saved:
+        log_event(logging.INFO, "bria.upload_optimized", upload=label, bytes_in=len(image_data),
+                  bytes_out=len(optimized), saved_pct=saved * 100 // len(image_data))
+    return optimized
+
+
+def optimize_mask_pair(
+    image_data: bytes,
+    mask_data: bytes,
+    profile: Optional[UploadProfile],
+    label: str = "Upload"
+) -> Tuple[bytes, bytes]:
+    """
+    Optimize an image and keep its mask aligned with it.
+
+    Masks are drawn on the upright image, so the image always goes out
+    upright: optimize_image_for_api applies the EXIF orientation, and an
+    image optimize_upload keeps as uploaded is transposed anyway if it still
+    carries one. The mask gets the same treatment, then is resized to the
+    image's exact size with NEAREST, which keeps a binary mask binary, and
+    saved as lossless PNG.
+
+    Args:
+        image_data: Raw image bytes
+        mask_data: Raw mask bytes
+        profile: Upload profile for the image, or None to keep its size
+        label: Name used in log output
+
+    Returns:
+        (image bytes, mask bytes) to upload
+
+    Raises:
+        ValueError: If the mask's aspect ratio does not match the image's
+    """
+    if profile is not None:
+        image_data = optimize_upload(image_data, profile, label)
+    try:
+        with Image.open(io.BytesIO(image_data)) as image:
+            size = image.size
+            rotated = image.getexif().get(EXIF_ORIENTATION, 1) != 1
+        if rotated:
+            image_data = optimize_image_for_api(
+                image_data,
+                max_dimension=max(size),
+                quality=profile.quality if profile else 95,
+                format=profile.format if profile else 'JPEG',
+                keep_alpha=profile.keep_alpha if profile else False
+            )
+            with Image.open(io.BytesIO(image_data)) as image:
+                size = image.size
+        with Image.open(io.BytesIO(mask_data)) as mask:
+            mask = ImageOps.exif_transpose(mask)
+    except OSError as e:
+        # Undecodable input goes out untouched; Bria reports what it cannot read
+        log_event(logging.WARNING, "bria.upload_not_optimized", upload=label, error=e)
+        return image_data, mask_data
+
+    # Cross-multiplied to compare width/height ratios within 1%
+    if abs(mask.width * size[1] - mask.height * size[0]) > 0.01 * mask.height * size[0]:
+        raise ValueError(f"The mask is {mask.width}x{mask.height} but the image is {size[0]}x{size[1]}; "
+                         f"their aspect ratios must match")
+    output = io.BytesIO()
+    mask.resize(size, Image.Resampling.NEAREST).save(output, format='PNG')
+    return image_data, output.getvalue()
+
+
+def get_upload_stats() -> Dict[str, Any]:
+    """Totals for images prepared for upload, including bytes saved."""
+    with _stats_lock:
+        return dict(_stats, bytes_saved=_stats["bytes_in"] - _stats["bytes_out"])
+
+
+__all__ = [
+    'UploadProfile',
+    'UPLOAD_PROFILES',
+    'get_upload_profile',
+    'optimize_upload',
+    'optimize_mask_pair',
+    'get_upload_stats',
+]
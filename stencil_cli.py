@@ -0,0 +1,257 @@
+"""
+Command line entry point for Stencil batch jobs.
+
+Usage:
+    python stencil_cli.py catalog products/ --out results/
+    python stencil_cli.py catalog manifest.csv --storage-prefix catalog/2024-06 --workers 8
+    python stencil_cli.py catalog products/ --pipeline shadow_variants.json
+    python stencil_cli.py prompts campaign.csv --out campaign/ --workers 8
+    python stencil_cli.py prompts campaign.csv --renditions
+"""
+import argparse
+import csv
+import json
+import os
+import signal
+import sys
+import time
+
+from dotenv import load_dotenv
+
+from services.bria_client import get_bria_session
+from services.catalog import STEPS, LocalSink, StorageSink, load_catalog, run_catalog, write_error_report
+from services.deadline import CancellationToken
+from services.pipeline import parse_pipeline
+from services.prompt_batch import PROMPT_FIELDS, load_prompts, run_prompt_batch
+from utils.renditions import RENDITION_RATIOS, create_renditions
+
+load_dotenv()
+
+
+def print_progress(progress):
+    """One line per finished product, with running totals and an ETA."""
+    item = progress["item"]
+    done, total = progress["done"], progress["total"]
+    rate = done / progress["elapsed"] if progress["elapsed"] else 0
+    eta = (total - done) / rate if rate else 0
+    line = f"[{done}/{total}] {item['status']:<9} {item['sku']} ({item['seconds']:.1f}s, eta {eta:.0f}s)"
+    if item["error"]:
+        line += f" - {item['error']}"
+    print(line, flush=True)
+
+
+def cancel_on_interrupt(token):
+    """First Ctrl+C stops the run cleanly; a second one aborts."""
+    def handler(signum, frame):
+        if token.cancelled:
+            raise KeyboardInterrupt
+        print("Stopping after products in flight... (Ctrl+C again to abort)", file=sys.stderr, flush=True)
+        token.cancel()
+    signal.signal(signal.SIGINT, handler)
+
+
+def run_catalog_command(args):
+    api_key = get_api_key(args)
+    if not api_key:
+        return 2
+
+    items = load_catalog(args.source, args.background_color)
+    if not items:
+        print(f"No product images found in {args.source}.", file=sys.stderr)
+        return 1
+
+    if args.storage_prefix:
+        sink = StorageSink(args.storage_prefix)
+        report_dir = args.out or "."
+    else:
+        sink = LocalSink(args.out or "catalog_output")
+        report_dir = str(sink.directory)
+
+    pipeline = None
+    steps = [step.strip() for step in args.steps.split(",") if step.strip()]
+    if args.pipeline:
+        try:
+            with open(args.pipeline, encoding="utf-8") as handle:
+                pipeline = parse_pipeline(json.load(handle))
+        except (OSError, ValueError) as e:
+            print(f"Invalid pipeline {args.pipeline}: {e}", file=sys.stderr)
+            return 2
+        steps = [step.name for step in pipeline]
+    else:
+        unknown = [step for step in steps if step not in STEPS]
+        if unknown or not steps:
+            print(f"Unknown steps {', '.join(unknown) or '(none)'}; choose from {', '.join(STEPS)}.", file=sys.stderr)
+            return 2
+    token = CancellationToken()
+    cancel_on_interrupt(token)
+    print(f"Processing {len(items)} products ({' + '.join(steps)}) with {args.workers} workers", flush=True)
+
+    summary = run_catalog(
+        items, api_key, sink,
+        steps=steps,
+        pipeline=pipeline,
+        workers=args.workers,
+        skip_existing=not args.overwrite,
+        on_progress=None if args.quiet else print_progress,
+        cancel_token=token
+    )
+
+    print(
+        f"Done in {summary['elapsed']:.0f}s: {summary['ok']} ok, {summary['skipped']} skipped, "
+        f"{summary['failed']} failed, {summary['cancelled']} cancelled"
+    )
+    if summary["errors"]:
+        os.makedirs(report_dir, exist_ok=True)
+        report = os.path.join(report_dir, f"catalog_errors_{time.strftime('%Y%m%d_%H%M%S')}.csv")
+        write_error_report(summary["errors"], report)
+        print(f"Error report: {report} (pass it as the source to retry the failed products)")
+    return 1 if summary["failed"] or token.cancelled else 0
+
+
+def get_api_key(args):
+    api_key = args.api_key or os.getenv("BRIA_API_KEY")
+    if not api_key:
+        print("Set BRIA_API_KEY or pass --api-key.", file=sys.stderr)
+    return api_key
+
+
+def prompt_file_name(index, spec, ratio=None):
+    """Result file name: position in the prompt file, the start of the prompt, then any rendition ratio."""
+    slug = "".join(c if c.isalnum() else "_" for c in spec.prompt.lower()[:40]).strip("_")
+    suffix = f"_{ratio.replace(':', 'x')}" if ratio else ""
+    return f"{index + 1:04d}_{slug or 'prompt'}{suffix}.png"
+
+
+def run_prompts_command(args):
+    api_key = get_api_key(args)
+    if not api_key:
+        return 2
+
+    try:
+        specs = load_prompts(args.source)
+    except (OSError, ValueError) as e:
+        print(f"Invalid prompt file {args.source}: {e}", file=sys.stderr)
+        return 2
+    if not specs:
+        print(f"No prompts found in {args.source}.", file=sys.stderr)
+        return 1
+
+    if args.storage_prefix:
+        sink = StorageSink(args.storage_prefix)
+        report_dir = args.out or "."
+    else:
+        sink = LocalSink(args.out or "prompt_output")
+        report_dir = str(sink.directory)
+
+    token = CancellationToken()
+    cancel_on_interrupt(token)
+    started = time.monotonic()
+    errors = []
+    counts = {"done": 0}
+
+    def save(index, spec, outcome):
+        # Results stream into the sink as each prompt finishes
+        if outcome["url"]:
+            try:
+                response = get_bria_session().get(outcome["url"], timeout=60)
+                response.raise_for_status()
+                if args.renditions:
+                    # One generation, cropped locally to every ad format
+                    outcome["output"] = "; ".join(
+                        sink.write(prompt_file_name(index, spec, ratio), data)
+                        for ratio, data in create_renditions(response.content).items()
+                    )
+                else:
+                    outcome["output"] = sink.write(prompt_file_name(index, spec), response.content)
+            except Exception as e:
+                outcome["error"] = f"{type(e).__name__}: {e}"
+        if outcome["error"]:
+            errors.append(dict(spec.as_dict(), number=index + 1, error=outcome["error"]))
+        counts["done"] += 1
+        if not args.quiet:
+            status = "failed" if outcome["error"] else "ok"
+            print(f"[{counts['done']}/{len(specs)}] {status:<6} {spec.prompt[:60]}"
+                  + (f" - {outcome['error']}" if outcome["error"] else ""), flush=True)
+
+    print(f"Generating {len(specs)} prompts with {args.workers} workers", flush=True)
+    run_prompt_batch(
+        specs, api_key,
+        workers=args.workers,
+        # Renditions are cropped from a square source, which fits every format
+        aspect_ratio="1:1" if args.renditions else args.aspect_ratio,
+        on_result=save,
+        cancel_token=token,
+        steps_num=args.steps_num,
+        text_guidance_scale=args.guidance,
+        enhance_image=args.enhance_image
+    )
+
+    print(f"Done in {time.monotonic() - started:.0f}s: {len(specs) - len(errors)} ok, {len(errors)} failed")
+    if errors:
+        os.makedirs(report_dir, exist_ok=True)
+        report = os.path.join(report_dir, f"prompt_errors_{time.strftime('%Y%m%d_%H%M%S')}.csv")
+        with open(report, "w", newline="", encoding="utf-8") as handle:
+            writer = csv.DictWriter(handle, fieldnames=["number", *PROMPT_FIELDS, "error"])
+            writer.writeheader()
+            writer.writerows(errors)
+        print(f"Error report: {report} (pass it as the source to retry the failed prompts)")
+    return 1 if errors else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="stencil_cli.py", description="Stencil batch jobs")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    catalog = commands.add_parser(
+        "catalog",
+        help="Packshots and shadows for a product directory or CSV manifest",
+        description="Run every product through create_packshot and add_shadow. A manifest is a CSV "
+                    "with a 'path' column and optional 'sku' and 'background_color' columns."
+    )
+    catalog.add_argument("source", help="Directory of product images, or a CSV manifest")
+    catalog.add_argument("--out", help="Local output folder (default: catalog_output); "
+                                       "with --storage-prefix, where the error report goes")
+    catalog.add_argument("--storage-prefix", help="Upload results to Supabase storage under this prefix instead")
+    catalog.add_argument("--steps", default=",".join(STEPS),
+                         help=f"Comma-separated pipeline steps (default: {','.join(STEPS)})")
+    catalog.add_argument("--pipeline", help="JSON pipeline file run instead of --steps; "
+                                            "see services/pipeline.py for the format")
+    catalog.add_argument("--background-color", default="#FFFFFF",
+                         help="Packshot background for products without one in the manifest")
+    catalog.add_argument("--workers", type=int, default=4, help="Products processed concurrently (default: 4)")
+    catalog.add_argument("--overwrite", action="store_true", help="Reprocess products already in the output folder")
+    catalog.add_argument("--quiet", action="store_true", help="Only print the summary")
+    catalog.add_argument("--api-key", help="Bria API key (default: BRIA_API_KEY)")
+    catalog.set_defaults(func=run_catalog_command)
+
+    prompts = commands.add_parser(
+        "prompts",
+        help="One generated image per prompt in a CSV or JSONL file",
+        description="Run generate_hd_image over a prompt file. A CSV needs a 'prompt' column; JSONL lines are "
+                    "objects with a 'prompt' key. Both may set style, aspect_ratio, seed and negative_prompt."
+    )
+    prompts.add_argument("source", help="CSV or JSONL prompt file")
+    prompts.add_argument("--out", help="Local output folder (default: prompt_output); "
+                                       "with --storage-prefix, where the error report goes")
+    prompts.add_argument("--storage-prefix", help="Upload results to Supabase storage under this prefix instead")
+    prompts.add_argument("--aspect-ratio", default="1:1", help="For prompts that do not set one (default: 1:1)")
+    prompts.add_argument("--steps-num", type=int, default=30, help="Refinement steps, 20-50 (default: 30)")
+    prompts.add_argument("--guidance", type=float, default=7.5, help="Prompt guidance, 1-10 (default: 7.5)")
+    prompts.add_argument("--enhance-image", action="store_true", help="Apply Bria's quality enhancement")
+    prompts.add_argument("--renditions", action="store_true",
+                         help=f"Generate each prompt once, square unless it sets a ratio, and save smart crops for {', '.join(RENDITION_RATIOS)}")
+    prompts.add_argument("--workers", type=int, default=4, help="Prompts generated concurrently (default: 4)")
+    prompts.add_argument("--quiet", action="store_true", help="Only print the summary")
+    prompts.add_argument("--api-key", help="Bria API key (default: BRIA_API_KEY)")
+    prompts.set_defaults(func=run_prompts_command)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
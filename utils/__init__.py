@@ -12,9 +12,16 @@ from .image_utils import (
     validate_image,
     optimize_image_for_api,
     create_thumbnail,
+    create_contact_sheet,
     hex_to_rgb,
     rgb_to_hex
 )
+from .renditions import (
+    RENDITION_RATIOS,
+    rendition_boxes,
+    encode_crop,
+    create_renditions
+)
 
 __all__ = [
     'image_to_bytes',
@@ -26,6 +33,11 @@ __all__ = [
     'validate_image',
     'optimize_image_for_api',
     'create_thumbnail',
+    'create_contact_sheet',
     'hex_to_rgb',
-    'rgb_to_hex'
+    'rgb_to_hex',
+    'RENDITION_RATIOS',
+    'rendition_boxes',
+    'encode_crop',
+    'create_renditions'
 ]
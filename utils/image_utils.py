@@ -5,9 +5,9 @@ Common helper functions for image processing and API interactions
 
 import io
 import base64
-from PIL import Image
+from PIL import Image, ImageDraw, ImageFont, ImageOps
 import requests
-from typing import Optional, Union, Tuple
+from typing import List, Optional, Union, Tuple
 
 
 def image_to_bytes(image: Union[Image.Image, str], format: str = 'PNG') -> bytes:
@@ -166,7 +166,9 @@ def validate_image(
 def optimize_image_for_api(
     image: Union[Image.Image, bytes],
     max_dimension: int = 2048,
-    quality: int = 90
+    quality: int = 90,
+    format: str = 'JPEG',
+    keep_alpha: bool = False
 ) -> bytes:
     """
     Optimize image for API upload
@@ -174,7 +176,10 @@ def optimize_image_for_api(
     Args:
         image: PIL Image or bytes
         max_dimension: Maximum width or height
-        quality: JPEG quality (1-100)
+        quality: JPEG/WEBP quality (1-100)
+        format: Output format (JPEG, PNG or WEBP)
+        keep_alpha: Keep transparency; images with alpha are saved as PNG
+            instead of being flattened onto white when format is JPEG
     
     Returns:
         Optimized image bytes
@@ -182,21 +187,36 @@ def optimize_image_for_api(
     if isinstance(image, bytes):
         image = bytes_to_image(image)
     
+    # Re-encoding drops EXIF, so apply the camera orientation to the pixels
+    image = ImageOps.exif_transpose(image)
+    
+    has_alpha = image.mode in ('RGBA', 'LA') or (
+        image.mode == 'P' and 'transparency' in image.info
+    )
+    if image.mode not in ('RGB', 'RGBA', 'L'):
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+    
     # Resize if too large
     if max(image.size) > max_dimension:
         ratio = max_dimension / max(image.size)
         new_size = tuple(int(dim * ratio) for dim in image.size)
         image = image.resize(new_size, Image.Resampling.LANCZOS)
     
-    # Convert RGBA to RGB if needed
-    if image.mode == 'RGBA':
+    format = format.upper()
+    if has_alpha and keep_alpha:
+        if format == 'JPEG':
+            format = 'PNG'
+    elif has_alpha and format == 'JPEG':
+        # Convert RGBA to RGB if needed
         background = Image.new('RGB', image.size, (255, 255, 255))
-        background.paste(image, mask=image.split()[3])
+        background.paste(image, mask=image.split()[-1])
         image = background
     
-    # Save as JPEG for smaller size
     output = io.BytesIO()
-    image.save(output, format='JPEG', quality=quality, optimize=True)
+    if format == 'PNG':
+        image.save(output, format='PNG', optimize=True)
+    else:
+        image.save(output, format=format, quality=quality, optimize=True)
     return output.getvalue()
 
 
@@ -221,6 +241,49 @@ def create_thumbnail(
     return image_to_bytes(image)
 
 
+def create_contact_sheet(
+    images: List[Tuple[Optional[bytes], str]],
+    columns: int = 4,
+    thumb_size: Tuple[int, int] = (256, 256),
+    padding: int = 12,
+    label_height: int = 28
+) -> bytes:
+    """
+    Lay out labelled thumbnails on one sheet
+    
+    Args:
+        images: (image bytes, label) pairs; None bytes leave a grey
+            placeholder, e.g. for a failed generation
+        columns: Thumbnails per row
+        thumb_size: Largest thumbnail size (width, height)
+        padding: Space around each thumbnail in pixels
+        label_height: Height of the label strip under each thumbnail
+    
+    Returns:
+        PNG contact sheet bytes
+    """
+    columns = max(1, min(columns, len(images)))
+    rows = -(-len(images) // columns)
+    cell_w, cell_h = thumb_size[0] + padding, thumb_size[1] + label_height + padding
+    sheet = Image.new('RGB', (columns * cell_w + padding, rows * cell_h + padding), 'white')
+    draw = ImageDraw.Draw(sheet)
+    font = ImageFont.load_default()
+    
+    for idx, (image_bytes, label) in enumerate(images):
+        x = padding + (idx % columns) * cell_w
+        y = padding + (idx // columns) * cell_h
+        if image_bytes:
+            thumb = bytes_to_image(image_bytes).convert('RGB')
+            thumb.thumbnail(thumb_size, Image.Resampling.LANCZOS)
+            # Centre thumbnails that do not fill the cell, e.g. 16:9 results
+            sheet.paste(thumb, (x + (thumb_size[0] - thumb.width) // 2, y + (thumb_size[1] - thumb.height) // 2))
+        else:
+            draw.rectangle([x, y, x + thumb_size[0], y + thumb_size[1]], fill=(220, 220, 220))
+        draw.text((x, y + thumb_size[1] + 6), label, fill='black', font=font)
+    
+    return image_to_bytes(sheet)
+
+
 def hex_to_rgb(hex_color: str) -> Tuple[int, int, int]:
     """
     Convert hex color to RGB tuple